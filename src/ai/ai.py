@@ -1,241 +1,725 @@
-from typing import List, Dict, Tuple
+import time
+from typing import Dict, List, Tuple, Union
 
+from .analysis_cache import AnalysisCache
+from .time_manager import TimeManager
+from .weights import DEFAULT_HEURISTIC_WEIGHTS
 import utils.colors as colors
-from board.token import Token
-from utils.movement import get_potential_moves, has_neighbours, is_destination_level_higher_than_current_level, is_inside_board
+from utils.events import ConsoleSink, EventSink
+from board.position import BLACK, STACK_CAPACITY, WHITE, Position
+from utils.movement import get_potential_moves, is_inside_board
+
+
+# Stacks of the 8x8 starting position, node budgets are given for positions with this many stacks
+REFERENCE_STACKS_COUNT = 24
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline of a time limited search has passed.
+    """
 
 
 class AI:
 
     def __init__(
             self,
-            max_points
+            max_points,
+            depth: int = 3,
+            quiescence_depth: int = 4,
+            use_pvs: bool = True,
+            aspiration_window: int = 20,
+            use_late_move_reductions: bool = False,
+            late_move_threshold: int = 4,
+            use_futility_pruning: bool = False,
+            futility_margin: int = 30,
+            analysis_cache: Union[AnalysisCache, None] = None,
+            batch_evaluator=None,
+            use_batch_evaluation: bool = False,
+            heuristic_weights: Union[Dict[str, int], None] = None,
+            evaluator=None,
+            node_budget: Union[int, None] = None,
+            min_beam_width: int = 6,
+            time_manager: Union[TimeManager, None] = None,
+            events: Union[EventSink, None] = None
         ) -> None:
         self.white_points = 0
         self.black_points = 0
         self.max_points = max_points
+        self.depth = depth
+        # Maximum number of plies searched past the horizon, 0 disables the quiescence search
+        self.quiescence_depth = quiescence_depth
+        # Search children after the first one with a null window and re-search them only if they fail high
+        self.use_pvs = use_pvs
+        # Half width of the window around the previous iteration's score, 0 disables iterative deepening
+        self.aspiration_window = aspiration_window
+        # Search quiet moves after the first `late_move_threshold` moves one ply shallower
+        self.use_late_move_reductions = use_late_move_reductions
+        self.late_move_threshold = late_move_threshold
+        # Skip quiet moves at the frontier when the static score is more than the margin outside the window
+        self.use_futility_pruning = use_futility_pruning
+        self.futility_margin = futility_margin
+        # Optional persistent cache of search results, consulted before searching a position
+        self.analysis_cache = analysis_cache
+        # Optional `ai.batch_eval.BatchEvaluator`, which evaluates all children of a frontier node at once, and
+        # the tactical children of quiescence nodes
+        self.batch_evaluator = batch_evaluator
+        # Weights of the heuristic terms, see `ai.weights`. A batch evaluator has to use the same weights.
+        self.heuristic_weights = dict(DEFAULT_HEURISTIC_WEIGHTS if heuristic_weights is None else heuristic_weights)
+        # Creates a NumPy batch evaluator with the heuristic weights, unless a batch evaluator is given
+        if use_batch_evaluation and batch_evaluator is None:
+            from .batch_eval import BatchEvaluator
+            self.batch_evaluator = BatchEvaluator(self.is_center, heuristic_weights=self.heuristic_weights)
+        # Optional evaluator which replaces the heuristic, such as `ai.mlp_eval.MLPEvaluator`. It is also used
+        # as the batch evaluator at the frontier and in quiescence, unless another batch evaluator is given.
+        self.evaluator = evaluator
+        if evaluator is not None:
+            self.heuristic = evaluator.evaluate_position
+            if batch_evaluator is None:
+                self.batch_evaluator = evaluator
+        # Estimated number of leaves a search may visit, the depth and beam width are chosen to stay below it
+        self.node_budget = node_budget
+        # Narrowest move list of inner nodes before a shallower search is preferred, see `choose_search_limits`
+        self.min_beam_width = min_beam_width
+        # Number of moves searched at inner nodes, None searches all of them
+        self.beam_width = None
+        # Divides the clock between the moves of a timed game, see `search_timed`
+        self.time_manager = TimeManager() if time_manager is None else time_manager
+        # Receives the thinking and result events of `ai_make_move`, a board sets its own sink before every move
+        self.events: EventSink = ConsoleSink() if events is None else events
+        self.nodes_searched = 0
+        # Triangular principal variation table, `pv_table[ply]` is the best line found from the node at that ply
+        self.pv_table: Dict[int, List[Tuple[int, int, int]]] = {}
+        # Quiet moves which caused a cutoff at each ply, tried early in the other nodes of the ply
+        self.killer_moves: Dict[int, List[Tuple[int, int, int]]] = {}
+        # Principal variation of the previous iteration of iterative deepening, its moves are tried first
+        self.previous_pv: List[Tuple[int, int, int]] = []
+        # Cutoffs caused by each quiet move, weighted by the remaining depth, orders the quiet moves without a killer
+        self.history: Dict[Tuple[int, int, int], int] = {}
+        self.root_ply = 0
+        # `time.perf_counter` value after which a time limited search is stopped, see `search`
+        self.deadline = None
+        self.completed_depth = 0
 
     def ai_get_next_positions(
             self,
-            board_dict,
-            board_size,
-            player_color: Tuple[int, int, int],
-            is_one_stack_left
-        ) -> List[Dict[Tuple[int, int], List[Token]]]:
+            position: Position,
+            player_color: int,
+            is_one_stack_left: bool
+        ) -> List[Tuple[bool, Tuple[int, int, int]]]:
         """
-        Generates a list of potential board configurations after one move, 
-        given the current state of the board and the player's color.
+        Generates a list of potential moves, given the current position and the player's color code.
 
         This method iterates through all the stacks on the board. For each stack, it determines 
         if a move is possible based on the current player's color and the surrounding tiles. 
-        If a move is possible, the method simulates the move, resulting in a new board configuration, 
-        which is then added to the list of potential positions.
+        Moves are described by (source index, token level, destination index) instructions, which 
+        can be applied with `ai_move_stack`, so no board configuration has to be built here.
 
         Returns:
-            A list of dictionaries representing the board configurations after each potential move.
-            Each dictionary is similar in structure to board_dict, with the move applied.
+            A list of (position status, move instructions) tuples, where the position status tells 
+            if the move forms the stack which ends the game.
         """
         next_positions = []
+        cells = position.cells
+        heights = position.heights
 
-        for tile, stack in board_dict.items():
-            if not stack:
+        for source, source_height in enumerate(heights):
+            if not source_height:
                 continue
 
-            tile_has_neighbours = has_neighbours(board_dict, board_size, tile[0], tile[1])
-            neighbour_tiles = [
-                        (tile[0]-1, tile[1]-1),
-                        (tile[0]-1, tile[1]+1),
-                        (tile[0]+1, tile[1]+1),
-                        (tile[0]+1, tile[1]-1)
-                    ]
-
-            for token in stack:
-                # Has no neighbours
-                if token.level == 1 and token.color == player_color and not tile_has_neighbours:
-                    potential_moves = get_potential_moves(board_dict, board_size, tile[0], tile[1])
-                    for potential_tile in potential_moves:
-                        # Check if potential tile is inside the board
-                        if not is_inside_board(potential_tile, board_size):
-                            continue
-
-                        potential_tile_stack = board_dict[potential_tile]
-                        
-                        # Save which token level will need to be reverted
-                        revert_level = len(potential_tile_stack) + 1
-
-                        # Save old token level
-                        old_token_level = token.level
-                        
-                        # Change the state
-                        board_dict = self.ai_move_stack(board_dict, tile, token.level, potential_tile)
-
-                        # Check if 8-token stack was formed
-                        full_stack_formed = len(potential_tile_stack) + len(stack) - (old_token_level - 1) == 8
-
-                        # Check if the last stack formed
-                        position_status = False
-                        if full_stack_formed:
-                            if is_one_stack_left:
-                                position_status = True
-                            else:
-                                white_formed_stack = board_dict[potential_tile][-1].color == colors.WHITE
-                                black_formed_stack = board_dict[potential_tile][-1].color == colors.BLACK
-                                white_is_about_to_win = self.white_points == (self.max_points // 2)
-                                black_is_about_to_win = self.black_points == (self.max_points // 2)
-                                if (white_formed_stack and white_is_about_to_win) or (black_formed_stack and black_is_about_to_win):
-                                    position_status = True
-                            
-
-                        # if is_one_stack_left and full_stack_formed:
-                        #     position_status = True
-                        # else:
-                        #     # Check if the game is over
-                        #     white_formed_stack = board_dict[potential_tile][-1].color == colors.WHITE
-                        #     black_formed_stack = board_dict[potential_tile][-1].color == colors.BLACK
-                        #     white_is_about_to_win = self.white_points == (self.max_points // 2)
-                        #     black_is_about_to_win = self.black_points == (self.max_points // 2)
-                        #     if full_stack_formed and ((white_formed_stack and white_is_about_to_win) or (black_formed_stack and black_is_about_to_win)):
-                        #         position_status = True
-
-                        # Revert the state
-                        board_dict = self.ai_move_stack(board_dict, potential_tile, revert_level, tile)
-
-                        next_positions.append((position_status, (tile, token.level, potential_tile, revert_level)))
-
-                # Has neighbours
-                if token.color == player_color and tile_has_neighbours:
-                    for neighbour_tile in neighbour_tiles:
-                        # Check if neighbour tile is inside the board
-                        if not is_inside_board(neighbour_tile, board_size):
-                            continue
-
-                        neighbour_stack = board_dict[neighbour_tile]
-
-                        # Check if token would have higher level if moved to destination stack
-                        if not neighbour_stack or not is_destination_level_higher_than_current_level(token, neighbour_stack):
-                            continue
-
-                        # Check if resulting stack would have more than 8 tokens
-                        if len(neighbour_stack) + len(stack) - (token.level - 1) > 8:
-                            continue
-
-                        # Save which token level will need to be reverted
-                        revert_level = len(neighbour_stack) + 1
-
-                        # Save old token level
-                        old_token_level = token.level
-
-                        # Change the state
-                        board_dict = self.ai_move_stack(board_dict, tile, token.level, neighbour_tile)
-
-                        # Check if 8-token stack was formed
-                        full_stack_formed = len(neighbour_stack) + len(stack) - (old_token_level - 1) == 8
-
-                        # Check if the last stack formed
-                        position_status = False
-                        if full_stack_formed:
-                            if is_one_stack_left:
-                                position_status = True
-                            else:
-                                white_formed_stack = board_dict[neighbour_tile][-1].color == colors.WHITE
-                                black_formed_stack = board_dict[neighbour_tile][-1].color == colors.BLACK
-                                white_is_about_to_win = self.white_points == (self.max_points // 2)
-                                black_is_about_to_win = self.black_points == (self.max_points // 2)
-                                if (white_formed_stack and white_is_about_to_win) or (black_formed_stack and black_is_about_to_win):
-                                    position_status = True
-
-                        # position_status = False
-                        # if is_one_stack_left and full_stack_formed:
-                        #     position_status = True
-                        # else:
-                        #     # Check if the game is over
-                        #     white_formed_stack = board_dict[neighbour_tile][-1] == colors.WHITE
-                        #     black_formed_stack = board_dict[neighbour_tile][-1] == colors.BLACK
-                        #     white_is_about_to_win = self.white_points == self.max_points // 2
-                        #     black_is_about_to_win = self.black_points == self.max_points // 2
-                        #     if full_stack_formed and ((white_formed_stack and white_is_about_to_win) or (black_formed_stack and black_is_about_to_win)):
-                        #         position_status = True
-
-                        # Revert the state
-                        board_dict = self.ai_move_stack(board_dict, neighbour_tile, revert_level, tile)
-                        
-                        next_positions.append((position_status, (tile, token.level, neighbour_tile, revert_level)))
+            source_base = source * STACK_CAPACITY
+            source_neighbours = position.neighbours[source]
+            tile_has_neighbours = False
+            for neighbour in source_neighbours:
+                if heights[neighbour]:
+                    tile_has_neighbours = True
+                    break
+
+            # Has no neighbours, only the whole stack can be moved towards the closest stacks
+            if not tile_has_neighbours:
+                if cells[source_base] != player_color:
+                    continue
+
+                row, column = position.tiles[source]
+                for potential_tile in get_potential_moves(position, position.board_size, row, column):
+                    # Check if potential tile is inside the board
+                    if not is_inside_board(potential_tile, position.board_size):
+                        continue
+
+                    destination = position.tile_indices[potential_tile]
+
+                    # Check if the stack which ends the game would be formed
+                    full_stack_formed = heights[destination] + source_height == 8
+                    position_status = full_stack_formed and self.is_final_stack(cells[source_base + source_height - 1], is_one_stack_left)
+
+                    next_positions.append((position_status, (source, 1, destination)))
+                continue
+
+            # Has neighbours
+            for level in range(1, source_height + 1):
+                if cells[source_base + level - 1] != player_color:
+                    continue
+
+                for destination in source_neighbours:
+                    destination_height = heights[destination]
+
+                    # Check if token would have higher level if moved to destination stack
+                    if level > destination_height:
+                        continue
+
+                    # Check if resulting stack would have more than 8 tokens
+                    resulting_stack_size = destination_height + source_height - (level - 1)
+                    if resulting_stack_size > 8:
+                        continue
+
+                    # Check if the stack which ends the game would be formed
+                    position_status = resulting_stack_size == 8 and self.is_final_stack(cells[source_base + source_height - 1], is_one_stack_left)
+
+                    next_positions.append((position_status, (source, level, destination)))
 
         return next_positions
 
+    def is_final_stack(
+            self,
+            stack_owner: int,
+            is_one_stack_left: bool
+        ) -> bool:
+        """
+        Checks if forming a full stack owned by the given color would end the game.
+        """
+        if is_one_stack_left:
+            return True
+        if stack_owner == WHITE:
+            return self.white_points == (self.max_points // 2)
+        return self.black_points == (self.max_points // 2)
+
     def ai_move_stack(
             self, 
-            board_dict, 
-            source_tile: Tuple[int, int], 
+            position: Position, 
+            source: int, 
             source_token_level: int, 
-            destination_tile: Tuple[int, int]
-        ) -> Dict[Tuple[int, int], List[Token]]:
+            destination: int
+        ) -> None:
         """
-        Simulates the movement of a stack of tokens from a source tile to a destination tile on the board.
-
-        This function creates a deep copy of the current board state and then moves a specified 
-        number of tokens from the source tile to the destination tile. The movement respects the 
-        rules of the game, such as token stacking order and maximum stack height.
+        Applies the movement of a stack of tokens from a source tile to a destination tile in place.
 
-        Returns:
-            A new dictionary representing the state of the board after the move. This dictionary 
-            has the same structure as board_dict but reflects the changes after the move.
+        The move only copies the color codes of the moved tokens between the preallocated tile buffers 
+        of the position and pushes an undo record, which is popped by `ai_revert_move_stack`.
         """
-        # new_board = copy.deepcopy(board_dict)
-        new_board = board_dict
-        source_token_index = source_token_level - 1
-        destination_max_level = len(new_board[destination_tile])
+        position.make_move(source, source_token_level, destination)
 
-        selected_tokens = new_board[source_tile][source_token_index:]
-        for token in selected_tokens:
-            token.move(destination_tile[0], destination_tile[1], destination_max_level+1)
-            destination_max_level += 1
-
-        new_board[destination_tile] = [*new_board[destination_tile], *selected_tokens]
-        new_board[source_tile] = new_board[source_tile][:source_token_index]
-
-        return new_board
+    def ai_revert_move_stack(
+            self,
+            position: Position
+        ) -> None:
+        """
+        Reverts the last move applied by `ai_move_stack`.
+        """
+        position.unmake_move()
     
     def ai_make_move(
             self, 
             board_dict,
             board_size,
             current_player_color,
-            is_one_stack_left
-        ) -> None:
+            is_one_stack_left,
+            remaining_time: Union[float, None] = None,
+            increment: float = 0.0
+        ) -> Union[Tuple[Tuple[int, int], int, Tuple[int, int]], None]:
+        """
+        Finds the move of the AI in the current game state.
 
+        Without a remaining time the position is searched to the configured depth, in a timed game the
+        time of the search is chosen by the time manager from the player's clock, see `search_timed`.
+        """
+        position = Position.from_board_dict(board_dict, board_size)
         is_maximizing_player = current_player_color == colors.WHITE
-        print('AI is thinking...', end=' ', flush=True)
-        best_heuristic_value, best_move = self.minimax(board_dict, board_size, 3, is_maximizing_player, is_one_stack_left)
-        print(f'H = {best_heuristic_value}')
+        player_color = WHITE if is_maximizing_player else BLACK
+        self.events.on_ai_thinking()
+
+        # Reuse the result of an earlier search of this position or a symmetric one
+        if self.analysis_cache is not None:
+            settings = self.get_settings_fingerprint()
+            # Without a node budget the search is full-width, so results limited by a beam are not deep enough
+            cached_result = self.analysis_cache.lookup(position, player_color, self.white_points, self.black_points, is_one_stack_left, settings, self.depth, self.node_budget is None)
+            if cached_result is not None:
+                best_heuristic_value, best_tile_move = cached_result
+                self.events.on_ai_move(best_heuristic_value, None, True)
+                return best_tile_move
+
+        if remaining_time is None:
+            best_heuristic_value, best_move = self.search(position, is_maximizing_player, is_one_stack_left)
+            self.events.on_ai_move(best_heuristic_value, None, False)
+        else:
+            best_heuristic_value, best_move = self.search_timed(position, is_maximizing_player, is_one_stack_left, remaining_time, increment)
+            self.events.on_ai_move(best_heuristic_value, self.completed_depth, False)
+
+        best_tile_move = None
+        if best_move is not None:
+            source, token_level, destination = best_move
+            best_tile_move = position.tiles[source], token_level, position.tiles[destination]
+
+        # The depth of the search may be limited by the node budget or the clock, and a forced move is not searched at all
+        if self.analysis_cache is not None and self.completed_depth > 0:
+            settings = self.get_settings_fingerprint()
+            self.analysis_cache.store(position, player_color, self.white_points, self.black_points, is_one_stack_left, settings, self.completed_depth, self.beam_width is None, best_heuristic_value, best_tile_move)
+
+        return best_tile_move
+
+    def get_settings_fingerprint(
+            self
+        ) -> bytes:
+        """
+        Encodes the settings which change the score or the move found by a search, for the analysis cache key.
+
+        Results of other heuristic weights, evaluators, quiescence depths or selective search settings are 
+        never reused. Principal variation search and aspiration windows only change the speed of the 
+        search, so they are left out.
+        """
+        settings = (
+            sorted(self.heuristic_weights.items()),
+            None if self.evaluator is None else self.evaluator.get_fingerprint(),
+            self.quiescence_depth,
+            self.node_budget,
+            self.min_beam_width,
+            self.use_late_move_reductions,
+            self.late_move_threshold,
+            self.use_futility_pruning,
+            self.futility_margin
+        )
+        return repr(settings).encode()
+
+    def ai_analyze(
+            self,
+            board_dict,
+            board_size,
+            current_player_color,
+            is_one_stack_left,
+            lines_count: int
+        ) -> List[Tuple[int, List[Tuple[Tuple[int, int], int, Tuple[int, int]]]]]:
+        """
+        Finds the best `lines_count` moves of the current player, for analysis and hints.
+
+        Returns:
+            The score from white's point of view and the principal variation of every line, with moves 
+            in (source tile, token level, destination tile) form, ordered from the best line.
+        """
+        position = Position.from_board_dict(board_dict, board_size)
+        lines = self.search_multi_pv(position, current_player_color == colors.WHITE, is_one_stack_left, lines_count)
+        return [
+            (value, [(position.tiles[source], token_level, position.tiles[destination]) for source, token_level, destination in principal_variation])
+            for value, principal_variation in lines
+        ]
+
+    def search(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            deadline: Union[float, None] = None,
+            time_manager: Union[TimeManager, None] = None
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        """
+        Searches the position to the configured depth and returns the best score and move.
+
+        With aspiration windows enabled, the position is searched with iterative deepening, and every 
+        iteration after the first one starts with a narrow window around the previous iteration's score. 
+        If the score falls outside the window, the failing side of the window is opened and the 
+        iteration is searched again. The number of visited nodes is kept in `nodes_searched`.
+
+        With a deadline, a `time.perf_counter` value, the position is always searched with iterative 
+        deepening and the search stops once the deadline has passed. The result of the deepest completed 
+        iteration is returned and its depth is kept in `completed_depth`. The first iteration is always 
+        completed, so a move is returned even if the deadline is too short.
+
+        With a started time manager, its deadline is used, the depth is only limited by its `max_depth` 
+        and it decides before every iteration whether to start it. The first iteration is also stopped at 
+        the deadline, in which case `SearchTimeout` is raised after the position is restored.
+        """
+        self.nodes_searched = 0
+        self.root_ply = len(position.undo_stack)
+        self.pv_table = {}
+        self.killer_moves = {}
+        self.history = {}
+        self.previous_pv = []
+        self.beam_width = None
+        max_depth = self.depth
+        if self.node_budget is not None:
+            max_depth, self.beam_width = self.choose_search_limits(position, is_maximizing_player, is_one_stack_left)
+        if time_manager is not None:
+            deadline = time_manager.deadline
+            # Iterations deeper than the node budget allows stay selective, even if the budget left no beam
+            if self.node_budget is not None and self.beam_width is None and max_depth < self.depth:
+                self.beam_width = self.min_beam_width
+            if self.beam_width is not None:
+                time_manager.branching_factor = min(time_manager.branching_factor, self.beam_width)
+            max_depth = max(max_depth, time_manager.max_depth)
+
+        if not self.aspiration_window and deadline is None:
+            self.completed_depth = max_depth
+            return self.minimax(position, max_depth, is_maximizing_player, is_one_stack_left)
+
+        self.completed_depth = 0
+        # A timed game can not afford to finish the first iteration after the deadline
+        self.deadline = deadline if time_manager is not None else None
+        try:
+            best_value, best_move = self.search_root(position, 1, is_maximizing_player, is_one_stack_left)
+            self.completed_depth = 1
+            self.previous_pv = list(self.pv_table.get(0, []))
+            self.deadline = deadline
+            for depth in range(2, max_depth + 1):
+                if time_manager is not None and time_manager.should_stop(best_move):
+                    break
+                alpha = best_value - self.aspiration_window if self.aspiration_window else float('-inf')
+                beta = best_value + self.aspiration_window if self.aspiration_window else float('inf')
+                move = best_move
+                while True:
+                    value, move = self.search_root(position, depth, is_maximizing_player, is_one_stack_left, alpha, beta, move)
+                    if value <= alpha:
+                        alpha = float('-inf')
+                    elif value >= beta:
+                        beta = float('inf')
+                    else:
+                        break
+                best_value, best_move = value, move
+                self.completed_depth = depth
+                self.previous_pv = list(self.pv_table.get(0, []))
+        except SearchTimeout:
+            # The search was stopped in the middle of a line, so take back the moves made on the way down
+            while len(position.undo_stack) > self.root_ply:
+                self.ai_revert_move_stack(position)
+            if not self.completed_depth:
+                raise
+        finally:
+            self.deadline = None
+
+        return best_value, best_move
+
+    def search_timed(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            remaining_time: float,
+            increment: float
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        """
+        Searches the position for a move of a timed game, with the time given by the time manager.
+
+        A forced move is played without a search. Otherwise the time manager is started with the number 
+        of moves and whether the position is critical, a player being one full stack away from winning, 
+        and the position is searched with iterative deepening until it stops the search. If not even the 
+        first iteration finishes in time, or there is no time left to start it, the best of the moves 
+        searched so far is played, or the first move if there is none, so that the clock does not run out.
+        """
+        player_color = WHITE if is_maximizing_player else BLACK
+        next_positions = self.ai_get_next_positions(position, player_color, is_one_stack_left)
+        self.nodes_searched = 0
+        self.completed_depth = 0
+        self.pv_table = {}
+        if len(next_positions) == 1:
+            move = next_positions[0][1]
+            self.ai_move_stack(position, *move)
+            value = self.heuristic(position)
+            self.ai_revert_move_stack(position)
+            return value, move
+
+        winning_points = self.max_points // 2 + 1
+        is_critical = max(self.white_points, self.black_points) >= winning_points - 1
+        self.time_manager.start_move(remaining_time, increment, len(next_positions), is_critical)
+        try:
+            if self.time_manager.hard_limit > 0:
+                return self.search(position, is_maximizing_player, is_one_stack_left, time_manager=self.time_manager)
+        except SearchTimeout:
+            pass
+        root_line = self.pv_table.get(0)
+        move = root_line[0] if root_line else next_positions[0][1] if next_positions else None
+        return self.heuristic(position), move
+
+    def choose_search_limits(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool
+        ) -> Tuple[int, Union[int, None]]:
+        """
+        Chooses the search depth and the beam width at inner nodes from the branching factor of the position.
+
+        The number of leaves of a search is estimated from the number of moves at the root and the average 
+        number of replies, assuming that the players keep alternating between similar numbers of moves. 
+        The estimate ignores alpha-beta cutoffs and the quiescence search, so it is an upper bound of the 
+        tree shape rather than a prediction of visited nodes. Evaluating a position takes time proportional 
+        to its number of stacks, so positions with more stacks than `REFERENCE_STACKS_COUNT` get a 
+        proportionally smaller budget. The configured depth is kept if its tree fits the budget, otherwise 
+        the moves of inner nodes are cut to the widest beam which fits. If that beam would be narrower than 
+        `min_beam_width`, the next shallower depth is tried.
+
+        Returns:
+            The depth and the beam width, None if all moves can be searched.
+        """
+        root_moves_count, replies_count = self.measure_branching_factors(position, is_maximizing_player, is_one_stack_left)
+        stacks_count = sum(1 for height in position.heights if height)
+        leaves_budget = self.node_budget * min(REFERENCE_STACKS_COUNT / max(stacks_count, 1), 1)
+
+        def estimate_leaves(depth, beam_width):
+            leaves_count = root_moves_count
+            for ply in range(1, depth):
+                moves_count = replies_count if ply % 2 else root_moves_count
+                leaves_count *= moves_count if beam_width is None else min(moves_count, beam_width)
+            return leaves_count
+
+        for depth in range(self.depth, 1, -1):
+            if estimate_leaves(depth, None) <= leaves_budget:
+                return depth, None
+            for beam_width in range(max(root_moves_count, int(replies_count)), self.min_beam_width - 1, -1):
+                if estimate_leaves(depth, beam_width) <= leaves_budget:
+                    return depth, beam_width
+        return 1, None
+
+    def measure_branching_factors(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            samples_count: int = 8
+        ) -> Tuple[int, float]:
+        """
+        Counts the moves at the root and the average number of replies after a sample of evenly spaced root moves.
+        """
+        player_color = WHITE if is_maximizing_player else BLACK
+        next_positions = self.ai_get_next_positions(position, player_color, is_one_stack_left)
+        if not next_positions:
+            return 0, 0.0
+        step = max(len(next_positions) // samples_count, 1)
+        replies_counts = []
+        for _, (source, token_level, destination) in next_positions[::step]:
+            self.ai_move_stack(position, source, token_level, destination)
+            replies_counts.append(len(self.ai_get_next_positions(position, -player_color, is_one_stack_left)))
+            self.ai_revert_move_stack(position)
+        return len(next_positions), max(sum(replies_counts) / len(replies_counts), 1.0)
+
+    def limit_moves(
+            self,
+            position: Position,
+            next_positions: List[Tuple[bool, Tuple[int, int, int]]]
+        ) -> List[Tuple[bool, Tuple[int, int, int]]]:
+        """
+        Keeps the moves of an inner node which fit the beam width.
+
+        Moves which end the game or are tactical (see `is_tactical_move`) are always kept, and the beam is 
+        filled with the quiet moves which build the tallest stacks, as those are the closest to scoring.
+        """
+        tactical_moves = []
+        quiet_moves = []
+        heights = position.heights
+        for next_position in next_positions:
+            next_position_is_final, (source, token_level, destination) = next_position
+            if next_position_is_final or self.is_tactical_move(position, source, token_level, destination):
+                tactical_moves.append(next_position)
+            else:
+                quiet_moves.append(next_position)
+        # Height of the destination stack after the move, the sort keeps the generation order of equal heights
+        quiet_moves.sort(key=lambda next_position: heights[next_position[1][2]] + heights[next_position[1][0]] - next_position[1][1], reverse=True)
+        return tactical_moves + quiet_moves[:max(self.beam_width - len(tactical_moves), 0)]
+
+    def search_root(
+            self,
+            position: Position,
+            depth: int,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            alpha=float('-inf'),
+            beta=float('inf'),
+            previous_best_move: Union[Tuple[int, int, int], None] = None
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        """
+        Searches the root position, trying the best move of the previous iteration first.
+
+        Among moves with the same score, `minimax` keeps the one generated first. To return the same 
+        move regardless of the order in which the moves are searched, a move generated before the 
+        current best move also replaces it when its score is equal.
+        """
+        self.nodes_searched += 1
+        ply = len(position.undo_stack) - self.root_ply
+
+        next_positions = self.ai_get_next_positions(position, WHITE if is_maximizing_player else BLACK, is_one_stack_left)
+        if not next_positions:
+            return self.minimax(position, depth, is_maximizing_player, is_one_stack_left, alpha, beta)
+
+        move_order = list(range(len(next_positions)))
+        for move_index, (_, next_board_instructions) in enumerate(next_positions):
+            if next_board_instructions == previous_best_move:
+                move_order.remove(move_index)
+                move_order.insert(0, move_index)
+                break
+
+        sign = 1 if is_maximizing_player else -1
+        best_value = float('-inf') if is_maximizing_player else float('inf')
+        best_move = None
+        best_move_index = len(next_positions)
+
+        for move_index in move_order:
+            next_position_is_final, next_board_instructions = next_positions[move_index]
+            source, token_level, destination = next_board_instructions
+            # Score which is enough for this move to replace the best move
+            wins_ties = move_index < best_move_index
+            bound = alpha if is_maximizing_player else beta
+
+            self.ai_move_stack(position, source, token_level, destination)
+
+            if next_position_is_final:
+                heuristic_value = self.heuristic(position)
+            elif best_move is None or bound in (float('-inf'), float('inf')):
+                heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, alpha, beta)
+            else:
+                # Null window just below the bound for moves that win ties, just above it for the others
+                null_window_bound = bound - sign if wins_ties else bound
+                null_window = (null_window_bound, null_window_bound + 1) if sign == 1 else (null_window_bound - 1, null_window_bound)
+                heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *null_window)
+                if sign * heuristic_value > sign * null_window_bound:
+                    re_search_window = (null_window_bound, beta) if sign == 1 else (alpha, null_window_bound)
+                    heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *re_search_window)
+
+            self.ai_revert_move_stack(position)
+
+            if sign * heuristic_value > sign * best_value or (heuristic_value == best_value and wins_ties):
+                best_value = heuristic_value
+                best_move = next_board_instructions
+                best_move_index = move_index
+                self.pv_table[ply] = [best_move] if next_position_is_final else [best_move] + self.pv_table[ply + 1]
+
+            if is_maximizing_player:
+                alpha = max(alpha, best_value)
+            else:
+                beta = min(beta, best_value)
+            if beta <= alpha:
+                break
+
+        return best_value, best_move
+
+    def search_multi_pv(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            lines_count: int
+        ) -> List[Tuple[int, List[Tuple[int, int, int]]]]:
+        """
+        Searches the position to the configured depth and returns the best `lines_count` root moves.
+
+        Every returned line has the exact score of its root move and its principal variation, which starts 
+        with the root move. Passes of a player without legal moves are left out of the variations. Lines 
+        are ordered from the best to the worst, moves with equal scores in the order in which they are 
+        generated, so the first line is the move `search` returns without selective pruning.
+
+        The position is searched with iterative deepening, and every iteration searches the best lines 
+        of the previous one first. Once `lines_count` lines are known, the score of the worst of them 
+        is a bound for the remaining moves: they are searched with a null window around it and only 
+        the moves which beat it are searched again for their exact score.
+        """
+        self.nodes_searched = 0
+        self.root_ply = len(position.undo_stack)
+        self.pv_table = {}
+        self.killer_moves = {}
+        self.history = {}
+        self.previous_pv = []
+        self.beam_width = None
+
+        next_positions = self.ai_get_next_positions(position, WHITE if is_maximizing_player else BLACK, is_one_stack_left)
+        move_order = list(range(len(next_positions)))
+        lines = []
+
+        for depth in range(1, self.depth + 1):
+            lines = self.search_root_lines(position, depth, is_maximizing_player, is_one_stack_left, next_positions, move_order, lines_count)
+            line_indices = [move_index for _, move_index, _ in lines]
+            move_order = line_indices + [move_index for move_index in move_order if move_index not in line_indices]
+
+        return [(value, principal_variation) for value, _, principal_variation in lines]
+
+    def search_root_lines(
+            self,
+            position: Position,
+            depth: int,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            next_positions: List[Tuple[bool, Tuple[int, int, int]]],
+            move_order: List[int],
+            lines_count: int
+        ) -> List[Tuple[int, int, List[Tuple[int, int, int]]]]:
+        """
+        Searches the root moves in the given order and keeps the best `lines_count` of them.
+
+        Returns:
+            (score, move index, principal variation) tuples, ordered from the best to the worst line.
+        """
+        self.nodes_searched += 1
+        sign = 1 if is_maximizing_player else -1
+        lines = []
+
+        for move_index in move_order:
+            next_position_is_final, next_board_instructions = next_positions[move_index]
+            source, token_level, destination = next_board_instructions
+
+            self.ai_move_stack(position, source, token_level, destination)
 
-        return best_move
+            is_exact = True
+            if next_position_is_final:
+                heuristic_value = self.heuristic(position)
+            elif len(lines) < lines_count:
+                heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left)
+            else:
+                # Null window just below the worst line for moves that win ties with it, just above it for the others
+                worst_value, worst_move_index, _ = lines[-1]
+                null_window_bound = worst_value - sign if move_index < worst_move_index else worst_value
+                null_window = (null_window_bound, null_window_bound + 1) if sign == 1 else (null_window_bound - 1, null_window_bound)
+                heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *null_window)
+                is_exact = sign * heuristic_value > sign * null_window_bound
+                if is_exact:
+                    re_search_window = (null_window_bound, float('inf')) if sign == 1 else (float('-inf'), null_window_bound)
+                    heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *re_search_window)
+
+            if is_exact:
+                principal_variation = [next_board_instructions] if next_position_is_final else [next_board_instructions] + self.pv_table[1]
+                lines.append((heuristic_value, move_index, principal_variation))
+                lines.sort(key=lambda line: (-sign * line[0], line[1]))
+                del lines[lines_count:]
+
+            self.ai_revert_move_stack(position)
+
+        return lines
 
     def minimax(
             self, 
-            board_dict: Dict[Tuple[int, int], List[Token]],
-            board_size: int,
+            position: Position,
             depth: int,
             is_maximizing_player: bool,
             is_one_stack_left: bool,
             alpha=float('-inf'), 
             beta=float('inf'),
             prev_player_next_positions = 1
-        ) -> Tuple[int, Dict[Tuple[int, int], List[Token]]]:
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        self.nodes_searched += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        ply = len(position.undo_stack) - self.root_ply
+        self.pv_table[ply] = []
+
         if depth == 0:
-            return self.heuristic(board_dict, board_size), board_dict
+            if self.quiescence_depth:
+                return self.quiescence(position, self.quiescence_depth, is_maximizing_player, is_one_stack_left, alpha, beta), None
+            return self.heuristic(position), None
 
-        player_color = colors.WHITE if is_maximizing_player else colors.BLACK
+        player_color = WHITE if is_maximizing_player else BLACK
         best_move = None
-        next_positions = self.ai_get_next_positions(board_dict, board_size, player_color, is_one_stack_left)
+        next_positions = self.ai_get_next_positions(position, player_color, is_one_stack_left)
 
         if len(next_positions) == 0:
             if prev_player_next_positions == 0 and len(next_positions) == 0:
                 # For preventing infinte loop
-                heuristic_value = self.heuristic(board_dict, board_size)
+                heuristic_value = self.heuristic(position)
             else:
                 # Default algorithm path
-                heuristic_value, _ = self.minimax(board_dict, board_size, depth, not is_maximizing_player, is_one_stack_left, alpha, beta, len(next_positions))
+                heuristic_value, _ = self.minimax(position, depth, not is_maximizing_player, is_one_stack_left, alpha, beta, len(next_positions))
             if is_maximizing_player:
                 if heuristic_value > float('-inf'):
                     best_value = heuristic_value
@@ -243,112 +727,369 @@ class AI:
                 if heuristic_value < float('inf'):
                     best_value = heuristic_value
             return best_value, best_move
+
+        if self.beam_width is not None and ply > 0 and len(next_positions) > self.beam_width:
+            next_positions = self.limit_moves(position, next_positions)
+        # The root keeps the generation order, which decides between moves with the same score
+        if ply > 0:
+            next_positions = self.order_moves(position, next_positions, is_maximizing_player, ply)
         
+        # Evaluate all children of a frontier node in one batch, which gives the exact minimax value of the node
+        if depth == 1 and self.batch_evaluator is not None and not self.quiescence_depth:
+            self.nodes_searched += len(next_positions)
+            heuristic_values = self.batch_evaluator.evaluate_children(position, [next_position[1] for next_position in next_positions])
+            best_index = int(heuristic_values.argmax() if is_maximizing_player else heuristic_values.argmin())
+            self.pv_table[ply] = [next_positions[best_index][1]]
+            return int(heuristic_values[best_index]), next_positions[best_index][1]
+
+        # With quiescence, the batch gives the stand-pat scores the quiescence search of every child starts from
+        child_scores = None
+        if depth == 1 and self.batch_evaluator is not None:
+            child_scores = self.batch_evaluate_children(position, next_positions)
+
+        # Futility pruning, quiet moves at the frontier can not bring the score back into the window
+        futility_value = None
+        if self.use_futility_pruning and depth == 1:
+            static_value = self.heuristic(position)
+            if is_maximizing_player and static_value + self.futility_margin <= alpha:
+                futility_value = static_value + self.futility_margin
+            elif not is_maximizing_player and static_value - self.futility_margin >= beta:
+                futility_value = static_value - self.futility_margin
 
         if is_maximizing_player:
             best_value = float('-inf')
-            for next_position in next_positions:
+            for move_number, next_position in enumerate(next_positions):
                 next_position_is_final = next_position[0]
                 next_board_instructions = next_position[1]
 
-                source_tile = next_board_instructions[0]
-                token_level = next_board_instructions[1]
-                destination_tile = next_board_instructions[2]
-                token_revert_level = next_board_instructions[3]
+                source, token_level, destination = next_board_instructions
+                is_quiet_move = not next_position_is_final and not self.is_tactical_move(position, source, token_level, destination)
 
-                next_board = self.ai_move_stack(board_dict, source_tile, token_level, destination_tile)
+                if futility_value is not None and is_quiet_move:
+                    best_value = max(best_value, futility_value)
+                    continue
+
+                self.ai_move_stack(position, source, token_level, destination)
 
                 if next_position_is_final:
-                    heuristic_value = self.heuristic(next_board, board_size)
+                    heuristic_value = self.heuristic(position) if child_scores is None else child_scores[move_number]
+                elif child_scores is not None:
+                    self.pv_table[ply + 1] = []
+                    heuristic_value = self.quiescence(position, self.quiescence_depth, False, is_one_stack_left, alpha, beta, child_scores[move_number])
                 else:
-                    heuristic_value, _ = self.minimax(next_board, board_size, depth - 1, False, is_one_stack_left, alpha, beta)
+                    heuristic_value = self.search_child(position, depth, move_number, is_quiet_move, True, is_one_stack_left, alpha, beta)
 
                 if heuristic_value > best_value:
                     best_value = heuristic_value
                     best_move = next_board_instructions
+                    self.pv_table[ply] = [best_move] if next_position_is_final else [best_move] + self.pv_table[ply + 1]
 
-                next_board = self.ai_move_stack(board_dict, destination_tile, token_revert_level, source_tile)
+                self.ai_revert_move_stack(position)
 
                 alpha = max(alpha, best_value)
                 if beta <= alpha:
+                    if is_quiet_move:
+                        self.store_cutoff_move(ply, next_board_instructions, depth)
                     break
 
             return best_value, best_move
         
         else:
             best_value = float('inf')
-            for next_position in next_positions:
+            for move_number, next_position in enumerate(next_positions):
                 next_position_is_final = next_position[0]
                 next_board_instructions = next_position[1]
 
-                source_tile = next_board_instructions[0]
-                token_level = next_board_instructions[1]
-                destination_tile = next_board_instructions[2]
-                token_revert_level = next_board_instructions[3]
+                source, token_level, destination = next_board_instructions
+                is_quiet_move = not next_position_is_final and not self.is_tactical_move(position, source, token_level, destination)
+
+                if futility_value is not None and is_quiet_move:
+                    best_value = min(best_value, futility_value)
+                    continue
 
-                next_board = self.ai_move_stack(board_dict, source_tile, token_level, destination_tile)
+                self.ai_move_stack(position, source, token_level, destination)
 
                 if next_position_is_final:
-                    heuristic_value = self.heuristic(next_board, board_size)
+                    heuristic_value = self.heuristic(position) if child_scores is None else child_scores[move_number]
+                elif child_scores is not None:
+                    self.pv_table[ply + 1] = []
+                    heuristic_value = self.quiescence(position, self.quiescence_depth, True, is_one_stack_left, alpha, beta, child_scores[move_number])
                 else:
-                    heuristic_value, _ = self.minimax(next_board, board_size, depth - 1, True, is_one_stack_left, alpha, beta)
+                    heuristic_value = self.search_child(position, depth, move_number, is_quiet_move, False, is_one_stack_left, alpha, beta)
 
                 if heuristic_value < best_value:
                     best_value = heuristic_value
                     best_move = next_board_instructions
+                    self.pv_table[ply] = [best_move] if next_position_is_final else [best_move] + self.pv_table[ply + 1]
 
-                next_board = self.ai_move_stack(board_dict, destination_tile, token_revert_level, source_tile)
+                self.ai_revert_move_stack(position)
 
                 beta = min(beta, best_value)
                 if beta <= alpha:
+                    if is_quiet_move:
+                        self.store_cutoff_move(ply, next_board_instructions, depth)
                     break
 
             return best_value, best_move
 
+    def order_moves(
+            self,
+            position: Position,
+            next_positions: List[Tuple[bool, Tuple[int, int, int]]],
+            is_maximizing_player: bool,
+            ply: int
+        ) -> List[Tuple[bool, Tuple[int, int, int]]]:
+        """
+        Orders the moves of an inner node so that the best move is usually searched first.
+
+        The move of the previous iteration's principal variation at this ply comes first, then moves which
+        end the game and tactical moves (see `is_tactical_move`): 8-stacks won by the player to move, 
+        7-stacks and 8-stacks given to the opponent. The killer moves of the ply follow, and the other 
+        quiet moves are ordered by their history of cutoffs. The sort keeps the generation order of equal 
+        moves. With the best move first, the null windows of principal variation search rarely have to 
+        be re-searched.
+        """
+        killer_moves = self.killer_moves.get(ply, [])
+        pv_move = self.get_first_move(ply)
+        player_color = WHITE if is_maximizing_player else BLACK
+
+        def get_rank(next_position):
+            next_position_is_final, move = next_position
+            if move == pv_move:
+                return -1,
+            if next_position_is_final:
+                return 0,
+            if self.is_tactical_move(position, *move):
+                source, token_level, destination = move
+                if position.heights[destination] + position.heights[source] - (token_level - 1) < 8:
+                    return 2,
+                # The completed stack goes to the owner of the top token
+                top_token = position.cells[source * STACK_CAPACITY + position.heights[source] - 1]
+                return 1 if top_token == player_color else 3,
+            if move in killer_moves:
+                return 4 + killer_moves.index(move),
+            return 6, -self.history.get(move, 0)
+
+        return sorted(next_positions, key=get_rank)
+
+    def get_first_move(
+            self,
+            ply: int
+        ) -> Union[Tuple[int, int, int], None]:
+        """
+        Returns the move which `order_moves` searches first at the ply, the move of the previous principal variation.
+        """
+        return self.previous_pv[ply] if ply < len(self.previous_pv) else None
+
+    def store_cutoff_move(
+            self,
+            ply: int,
+            move: Tuple[int, int, int],
+            depth: int
+        ) -> None:
+        """
+        Keeps a quiet move which caused a cutoff as the first of the two killer moves of the ply.
+
+        The cutoff is also added to the history of the move, weighted by the square of the remaining 
+        depth, since cutoffs close to the root save the most nodes.
+        """
+        killer_moves = self.killer_moves.setdefault(ply, [])
+        if move in killer_moves:
+            killer_moves.remove(move)
+        killer_moves.insert(0, move)
+        del killer_moves[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def search_child(
+            self,
+            position: Position,
+            depth: int,
+            move_number: int,
+            is_quiet_move: bool,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            alpha,
+            beta
+        ) -> int:
+        """
+        Searches the position reached by a move of the player to move, which is given by `is_maximizing_player`.
+
+        The first move is searched with the full window. With principal variation search, later quiet moves 
+        are searched with a null window first and re-searched only if they fail high. Tactical moves often 
+        beat the best move so far, and moves with less than two plies left below them are cheap to search, 
+        so both are searched with the full window, where a null window search would mostly be wasted. 
+        With late move reductions, quiet moves ordered late are first searched one ply shallower, and only 
+        if that reduced search fails high, the move is verified by a search at full depth.
+        """
+        bound = alpha if is_maximizing_player else beta
+
+        if move_number > 0 and bound not in (float('-inf'), float('inf')):
+            null_window = (alpha, alpha + 1) if is_maximizing_player else (beta - 1, beta)
+
+            if self.use_late_move_reductions and is_quiet_move and depth >= 2 and move_number >= self.late_move_threshold:
+                heuristic_value, _ = self.minimax(position, depth - 2, not is_maximizing_player, is_one_stack_left, *null_window)
+                fails_high = heuristic_value > alpha if is_maximizing_player else heuristic_value < beta
+                if not fails_high:
+                    return heuristic_value
+
+            if self.use_pvs and depth >= 3 and is_quiet_move:
+                # Null window search only proves that the move is not better than the best one so far
+                heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *null_window)
+                if alpha < heuristic_value < beta:
+                    # The failed null window search is a bound on the score, so the re-search window starts from it
+                    window = (heuristic_value, beta) if is_maximizing_player else (alpha, heuristic_value)
+                    heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, *window)
+                return heuristic_value
+
+        heuristic_value, _ = self.minimax(position, depth - 1, not is_maximizing_player, is_one_stack_left, alpha, beta)
+        return heuristic_value
+
+    def quiescence(
+            self,
+            position: Position,
+            depth: int,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            alpha=float('-inf'),
+            beta=float('inf'),
+            stand_pat: Union[int, None] = None
+        ) -> int:
+        """
+        Extends the search past the horizon with stack-completing and stack-threatening moves only.
+
+        The 8-stack term dominates the heuristic, so evaluating a position where a stack can be 
+        completed in one move is unreliable. The static evaluation is used as a stand-pat score, since 
+        the player to move is not forced to play a tactical move, and the search stops as soon as the 
+        stand-pat score is already outside the alpha-beta window.
+
+        With a batch evaluator, the tactical children are evaluated in one batch and every child starts 
+        from its score as the stand-pat score, which is otherwise evaluated here.
+        """
+        self.nodes_searched += 1
+
+        if stand_pat is None:
+            stand_pat = self.heuristic(position)
+        if depth == 0:
+            return stand_pat
+
+        if is_maximizing_player:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+
+        player_color = WHITE if is_maximizing_player else BLACK
+        best_value = stand_pat
+
+        next_positions = [
+            next_position
+            for next_position in self.ai_get_next_positions(position, player_color, is_one_stack_left)
+            if self.is_tactical_move(position, *next_position[1])
+        ]
+        ply = len(position.undo_stack) - self.root_ply
+        next_positions = self.order_moves(position, next_positions, is_maximizing_player, ply)
+        child_scores = None if self.batch_evaluator is None else self.batch_evaluate_children(position, next_positions)
+        for move_number, (next_position_is_final, (source, token_level, destination)) in enumerate(next_positions):
+            child_score = None if child_scores is None else child_scores[move_number]
+            self.ai_move_stack(position, source, token_level, destination)
+
+            if next_position_is_final:
+                heuristic_value = self.heuristic(position) if child_score is None else child_score
+            else:
+                heuristic_value = self.quiescence(position, depth - 1, not is_maximizing_player, is_one_stack_left, alpha, beta, child_score)
+
+            self.ai_revert_move_stack(position)
+
+            if is_maximizing_player:
+                best_value = max(best_value, heuristic_value)
+                alpha = max(alpha, best_value)
+            else:
+                best_value = min(best_value, heuristic_value)
+                beta = min(beta, best_value)
+            if beta <= alpha:
+                break
+
+        return best_value
+
+    def batch_evaluate_children(
+            self,
+            position: Position,
+            next_positions: List[Tuple[bool, Tuple[int, int, int]]]
+        ) -> List[int]:
+        """
+        Evaluates the positions reached by all moves in one call of the batch evaluator.
+        """
+        if not next_positions:
+            return []
+        return self.batch_evaluator.evaluate_children(position, [next_position[1] for next_position in next_positions]).tolist()
+
+    def is_tactical_move(
+            self,
+            position: Position,
+            source: int,
+            token_level: int,
+            destination: int
+        ) -> bool:
+        """
+        Checks if a move completes an 8-stack or leaves a 7-stack that can be completed by any single token.
+
+        Full stacks are not removed during the search, so moves of a stack which is already full are not 
+        considered tactical, otherwise an isolated full stack would be moved back and forth.
+        """
+        source_height = position.heights[source]
+        if source_height == 8:
+            return False
+        return position.heights[destination] + source_height - (token_level - 1) >= 7
+
     def heuristic(
             self, 
-            board_dict: Dict[Tuple[int, int], List[Token]],
-            board_size: int
+            position: Position
         ) -> int:
         score = 0
-        white_tokens = 0
-        black_tokens = 0
-
-        for tile, stack in board_dict.items():
-            if not stack:
+        cells = position.cells
+        board_size = position.board_size
+        weights = self.heuristic_weights
+        token_weight = weights['token']
+        height_weight = weights['height']
+        mobility_weight = weights['mobility']
+        center_weight = weights['center']
+        full_stack_weight = weights['full_stack']
+
+        for index, stack_height in enumerate(position.heights):
+            if not stack_height:
                 continue
 
-            # Count the tokens on the stack
-            for token in stack:
-                if token.color == colors.WHITE:
-                    white_tokens += 1
-                else:
-                    black_tokens += 1
+            stack_base = index * STACK_CAPACITY
+            tile = position.tiles[index]
+
+            # Count the tokens on the stack, white tokens are +1 and black tokens are -1
+            score += token_weight * sum(cells[stack_base:stack_base + stack_height])
+
+            # Color code of the stack owner, +1 for white and -1 for black
+            stack_owner = cells[stack_base + stack_height - 1]
 
             # Stack Height Value
-            stack_height = len(stack)
-            stack_height_score = 2 * (stack_height - 1)
-            stack_height_score = stack_height_score if stack[-1].color == colors.WHITE else -stack_height_score
+            stack_height_score = height_weight * (stack_height - 1)
 
             # Mobility Score
-            mobility = len(get_potential_moves(board_dict, board_size, tile[0], tile[1]))
-            mobility_score = mobility * 2
-            mobility_score = mobility_score if stack[-1].color == colors.WHITE else -mobility_score
+            mobility = len(get_potential_moves(position, board_size, tile[0], tile[1]))
+            mobility_score = mobility * mobility_weight
 
             # Control of Center
             center_control_score = 0
             if self.is_center(tile, board_size):
-                center_control_score = 2 if stack[-1].color == colors.WHITE else -2
+                center_control_score = center_weight
 
-            # Check for 8-token stack and add 100 points to the owner
+            # Check for 8-token stack and add its weight to the owner
             eight_token_stack_score = 0
             if stack_height == 8:
-                eight_token_stack_score = 100 if stack[-1].color == colors.WHITE else -100                
+                eight_token_stack_score = full_stack_weight
 
-            score += stack_height_score + mobility_score + center_control_score + eight_token_stack_score
+            score += stack_owner * (stack_height_score + mobility_score + center_control_score + eight_token_stack_score)
 
-        score += white_tokens - black_tokens
-        
         return score
 
     def is_center(self, tile, board_size):
@@ -0,0 +1,167 @@
+import hashlib
+import sqlite3
+from typing import Tuple, Union
+
+from board.position import Position
+from board.symmetry import canonicalize, transform_move
+
+
+class AnalysisCache:
+    """
+    Persistent cache of search results, stored in an sqlite file so it survives between sessions.
+
+    Entries are keyed by a hash of the canonical form of the position (see `board.symmetry`) together
+    with the game state that influences the search, so symmetric positions share one entry. The key also
+    includes the fingerprint of the AI settings (see `AI.get_settings_fingerprint`), so results of other
+    heuristic weights or evaluators are never returned. Each entry keeps the search depth, whether all
+    moves were searched, the score from white's point of view and the best move in the canonical frame.
+    A search limited by a beam counts as shallower than a full-width search of the same depth. When the
+    cache grows over `max_entries`, the least recently used entries are evicted.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_entries: int = 100000
+        ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS analysis ('
+            'key BLOB PRIMARY KEY, depth INTEGER, score INTEGER, '
+            'source_row INTEGER, source_column INTEGER, token_level INTEGER, '
+            'destination_row INTEGER, destination_column INTEGER, last_used INTEGER, '
+            'is_full_width INTEGER NOT NULL DEFAULT 0)'
+        )
+        # Files written before the column existed are kept, their entries count as limited by a beam
+        columns = [column[1] for column in self.connection.execute('PRAGMA table_info(analysis)')]
+        if 'is_full_width' not in columns:
+            self.connection.execute('ALTER TABLE analysis ADD COLUMN is_full_width INTEGER NOT NULL DEFAULT 0')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)')
+        self.connection.commit()
+        self.use_counter = self.connection.execute('SELECT COALESCE(MAX(last_used), 0) FROM analysis').fetchone()[0]
+
+    def get_key(
+            self,
+            position: Position,
+            player_color: int,
+            white_points: int,
+            black_points: int,
+            is_one_stack_left: bool,
+            settings: bytes
+        ) -> Tuple[bytes, int, bool]:
+        """
+        Computes the cache key of a position, with the transform and color swap which map it to its canonical form.
+        """
+        canonical_encoding, transform, color_swapped = canonicalize(position, player_color)
+        if color_swapped:
+            white_points, black_points = black_points, white_points
+        game_state = bytes([white_points, black_points, is_one_stack_left])
+        key = hashlib.blake2b(canonical_encoding + game_state + settings, digest_size=16).digest()
+        return key, transform, color_swapped
+
+    def lookup(
+            self,
+            position: Position,
+            player_color: int,
+            white_points: int,
+            black_points: int,
+            is_one_stack_left: bool,
+            settings: bytes,
+            depth: int,
+            is_full_width: bool = True
+        ) -> Union[Tuple[int, Union[Tuple[Tuple[int, int], int, Tuple[int, int]], None]], None]:
+        """
+        Looks up the result of a search of the position to at least the given depth.
+
+        A result of a search limited by a beam is only returned for a request which is not full-width, 
+        or if it is deeper than the given depth.
+
+        Returns:
+            The score from white's point of view and the best move in (source tile, token level, destination tile)
+            form, or None if the position was not searched deep enough yet.
+        """
+        key, transform, color_swapped = self.get_key(position, player_color, white_points, black_points, is_one_stack_left, settings)
+        row = self.connection.execute(
+            'SELECT depth, is_full_width, score, source_row, source_column, token_level, destination_row, destination_column '
+            'FROM analysis WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None or (row[0], row[1]) < (depth, is_full_width):
+            return None
+
+        self.use_counter += 1
+        self.connection.execute('UPDATE analysis SET last_used = ? WHERE key = ?', (self.use_counter, key))
+        self.connection.commit()
+
+        score = -row[2] if color_swapped else row[2]
+        if row[5] is None:
+            return score, None
+        canonical_move = ((row[3], row[4]), row[5], (row[6], row[7]))
+        return score, transform_move(canonical_move, transform, position.board_size)
+
+    def store(
+            self,
+            position: Position,
+            player_color: int,
+            white_points: int,
+            black_points: int,
+            is_one_stack_left: bool,
+            settings: bytes,
+            depth: int,
+            is_full_width: bool,
+            score: int,
+            best_move: Union[Tuple[Tuple[int, int], int, Tuple[int, int]], None]
+        ) -> None:
+        """
+        Stores the result of a search, unless the position is already stored with a deeper search.
+
+        `depth` is the depth the search completed and `is_full_width` tells if it searched all moves, a 
+        result limited by a beam does not replace a full-width result of the same depth.
+        """
+        key, transform, color_swapped = self.get_key(position, player_color, white_points, black_points, is_one_stack_left, settings)
+        if color_swapped:
+            score = -score
+        move_columns = (None, None, None, None, None)
+        if best_move is not None:
+            (source_row, source_column), token_level, (destination_row, destination_column) = transform_move(best_move, transform, position.board_size)
+            move_columns = (source_row, source_column, token_level, destination_row, destination_column)
+
+        self.use_counter += 1
+        self.connection.execute(
+            'INSERT INTO analysis VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, score = excluded.score, '
+            'source_row = excluded.source_row, source_column = excluded.source_column, token_level = excluded.token_level, '
+            'destination_row = excluded.destination_row, destination_column = excluded.destination_column, '
+            'last_used = excluded.last_used, is_full_width = excluded.is_full_width '
+            'WHERE (excluded.depth, excluded.is_full_width) >= (analysis.depth, analysis.is_full_width)',
+            (key, depth, score, *move_columns, self.use_counter, is_full_width)
+        )
+        self.evict()
+        self.connection.commit()
+
+    def evict(
+            self
+        ) -> None:
+        """
+        Deletes the least recently used tenth of the entries once the cache holds more than `max_entries`.
+        """
+        entries_count = len(self)
+        if entries_count <= self.max_entries:
+            return
+        evicted_count = entries_count - self.max_entries + self.max_entries // 10
+        self.connection.execute(
+            'DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY last_used LIMIT ?)',
+            (evicted_count,)
+        )
+
+    def __len__(
+            self
+        ) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+
+    def close(
+            self
+        ) -> None:
+        self.connection.close()
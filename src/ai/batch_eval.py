@@ -0,0 +1,201 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from .weights import DEFAULT_HEURISTIC_WEIGHTS, HEURISTIC_TERMS
+from board.position import STACK_CAPACITY, Position
+
+
+# Bits of the four diagonal directions in which an isolated stack can move
+DIRECTION_BITS = {(-1, -1): 1, (-1, 1): 2, (1, -1): 4, (1, 1): 8}
+POPCOUNT = np.array([bin(bits).count('1') for bits in range(16)], dtype=np.int16)
+NO_STACK_DISTANCE = 127
+
+
+class EvaluationTables:
+    """
+    Precomputed tile-to-tile tables of one board layout, used to vectorize the heuristic.
+
+    `utils.movement.get_potential_moves` looks for the stacks at the smallest Chebyshev distance and
+    collects the diagonal directions towards them. The distance and the direction bits towards every
+    other tile are static, so the mobility of all stacks of a batch can be computed with array operations.
+    """
+
+    def __init__(
+            self,
+            board_size: int,
+            tiles: List[Tuple[int, int]],
+            is_center
+        ) -> None:
+        tiles_count = len(tiles)
+        self.distances = np.full((tiles_count, tiles_count), NO_STACK_DISTANCE, dtype=np.int8)
+        self.direction_bits = np.zeros((tiles_count, tiles_count), dtype=np.int8)
+
+        for index, (row, column) in enumerate(tiles):
+            for other_index, (other_row, other_column) in enumerate(tiles):
+                if index == other_index:
+                    continue
+                direction_row = other_row - row
+                direction_column = other_column - column
+                row_step = (direction_row > 0) - (direction_row < 0)
+                column_step = (direction_column > 0) - (direction_column < 0)
+                if abs(direction_row) > abs(direction_column):
+                    bits = DIRECTION_BITS[(row_step, -1)] | DIRECTION_BITS[(row_step, 1)]
+                elif abs(direction_row) < abs(direction_column):
+                    bits = DIRECTION_BITS[(-1, column_step)] | DIRECTION_BITS[(1, column_step)]
+                else:
+                    bits = DIRECTION_BITS[(row_step, column_step)]
+                self.distances[index, other_index] = max(abs(direction_row), abs(direction_column))
+                self.direction_bits[index, other_index] = bits
+
+        self.center_mask = np.array([is_center(tile, board_size) for tile in tiles], dtype=bool)
+
+        # Indices of the diagonal neighbours of every tile, missing neighbours point to an extra empty tile
+        tile_indices = {tile: index for index, tile in enumerate(tiles)}
+        self.neighbours = np.array([
+            [
+                tile_indices.get(neighbour_tile, tiles_count)
+                for neighbour_tile in ((row - 1, column - 1), (row - 1, column + 1), (row + 1, column + 1), (row + 1, column - 1))
+            ]
+            for row, column in tiles
+        ], dtype=np.intp)
+
+
+class BatchEvaluator:
+    """
+    Evaluates batches of positions with NumPy, giving exactly the same scores as `AI.heuristic`.
+
+    A batch is an array of shape (batch, tiles, levels) with the color codes of the tokens, where the
+    tiles are in the order of `Position.tiles` and the levels go from the bottom of each stack upwards.
+    The token-count, stack-height, mobility, center-control and 8-stack terms are computed for the whole
+    batch at once and weighted with the same weights as the heuristic. Batches are split into chunks of `chunk_size` positions to bound the memory of the
+    intermediate arrays on large boards.
+    """
+
+    def __init__(
+            self,
+            is_center,
+            chunk_size: int = 1024,
+            heuristic_weights: Union[Dict[str, int], None] = None
+        ) -> None:
+        self.is_center = is_center
+        self.chunk_size = chunk_size
+        if heuristic_weights is None:
+            heuristic_weights = DEFAULT_HEURISTIC_WEIGHTS
+        self.weights = np.array([heuristic_weights[term] for term in HEURISTIC_TERMS])
+        self.tables: Dict[Tuple[int, Tuple[Tuple[int, int], ...]], EvaluationTables] = {}
+        self.last_tiles = None
+        self.last_tables = None
+
+    def get_tables(
+            self,
+            position: Position
+        ) -> EvaluationTables:
+        """
+        Returns the evaluation tables for the board layout of the position, computing them once per layout.
+        """
+        if position.tiles is self.last_tiles:
+            return self.last_tables
+        key = (position.board_size, tuple(position.tiles))
+        if key not in self.tables:
+            self.tables[key] = EvaluationTables(position.board_size, position.tiles, self.is_center)
+        self.last_tiles = position.tiles
+        self.last_tables = self.tables[key]
+        return self.last_tables
+
+    def to_array(
+            self,
+            positions: List[Position]
+        ) -> np.ndarray:
+        """
+        Stacks the cell buffers of positions with the same layout into a (batch, tiles, levels) array.
+        """
+        tiles_count = len(positions[0].tiles)
+        return np.array([position.cells for position in positions], dtype=np.int8).reshape(len(positions), tiles_count, STACK_CAPACITY)
+
+    def evaluate(
+            self,
+            cells: np.ndarray,
+            tables: EvaluationTables
+        ) -> np.ndarray:
+        """
+        Evaluates a (batch, tiles, levels) array of color codes and returns one score per position.
+        """
+        return self.extract_features(cells, tables) @ self.weights
+
+    def extract_features(
+            self,
+            cells: np.ndarray,
+            tables: EvaluationTables
+        ) -> np.ndarray:
+        """
+        Computes the unweighted heuristic terms of a (batch, tiles, levels) array of color codes.
+
+        Returns:
+            A (batch, terms) array with the terms in the order of `ai.weights.HEURISTIC_TERMS`, each summed
+            over the stacks from white's point of view.
+        """
+        features = np.empty((len(cells), len(HEURISTIC_TERMS)), dtype=np.int32)
+        for start in range(0, len(cells), self.chunk_size):
+            features[start:start + self.chunk_size] = self.extract_features_chunk(cells[start:start + self.chunk_size], tables)
+        return features
+
+    def extract_features_chunk(
+            self,
+            cells: np.ndarray,
+            tables: EvaluationTables
+        ) -> np.ndarray:
+        heights = np.count_nonzero(cells, axis=2)
+        top_indices = np.maximum(heights - 1, 0)[:, :, None]
+        # Color code of the top token of every stack, 0 for empty tiles
+        owners = np.take_along_axis(cells, top_indices, axis=2)[:, :, 0].astype(np.int32)
+
+        # Mobility, the number of directions towards the closest stacks. The closest stacks of a stack with
+        # diagonal neighbours are exactly these neighbours, one direction each, so the distance search is
+        # only needed for isolated stacks.
+        occupied = heights > 0
+        padded_occupied = np.concatenate((occupied, np.zeros((len(cells), 1), dtype=bool)), axis=1)
+        mobility = padded_occupied[:, tables.neighbours].sum(axis=2)
+
+        isolated_positions, isolated_tiles = np.nonzero(occupied & (mobility == 0))
+        if len(isolated_positions):
+            distances = np.where(occupied[isolated_positions], tables.distances[isolated_tiles], NO_STACK_DISTANCE)
+            closest_distances = distances.min(axis=1, keepdims=True)
+            is_closest = (distances == closest_distances) & (closest_distances < NO_STACK_DISTANCE)
+            directions = np.bitwise_or.reduce(np.where(is_closest, tables.direction_bits[isolated_tiles], 0), axis=1)
+            mobility[isolated_positions, isolated_tiles] = POPCOUNT[directions]
+
+        return np.stack((
+            cells.sum(axis=(1, 2), dtype=np.int32),
+            (owners * np.maximum(heights - 1, 0)).sum(axis=1),
+            (owners * mobility).sum(axis=1),
+            (owners * tables.center_mask[None, :]).sum(axis=1),
+            (owners * (heights == 8)).sum(axis=1),
+        ), axis=1)
+
+    def evaluate_positions(
+            self,
+            positions: List[Position]
+        ) -> np.ndarray:
+        """
+        Evaluates a list of positions with the same board layout.
+        """
+        return self.evaluate(self.to_array(positions), self.get_tables(positions[0]))
+
+    def evaluate_children(
+            self,
+            position: Position,
+            moves: List[Tuple[int, int, int]]
+        ) -> np.ndarray:
+        """
+        Evaluates all positions reached by the given moves in one batch.
+
+        Every move is made and reverted in place and only the cell buffer of the child is copied into the batch.
+        """
+        tables = self.get_tables(position)
+        cells = np.empty((len(moves), len(position.cells)), dtype=np.int8)
+        for move_index, (source, token_level, destination) in enumerate(moves):
+            position.make_move(source, token_level, destination)
+            cells[move_index] = position.cells
+            position.unmake_move()
+        return self.evaluate(cells.reshape(len(moves), len(position.tiles), STACK_CAPACITY), tables)
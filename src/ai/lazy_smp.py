@@ -0,0 +1,234 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Union
+
+from .ai import AI, SearchTimeout
+from .time_manager import TimeManager
+from .transposition import EXACT, LOWER_BOUND, UPPER_BOUND, SharedTranspositionTable, ZobristKeys
+from board.notation import decode_position
+from board.position import WHITE, Position
+
+
+class SharedTableAI(AI):
+    """
+    AI which shares the results of its search with other processes through a `SharedTranspositionTable`.
+
+    The hash of the searched position is updated with every move, and every node of `minimax` above the
+    horizon first looks the position up in the table. An entry of a deep enough search whose score is
+    exact or outside the window ends the node, otherwise its best move is searched first, ahead of the
+    moves which `order_moves` ranks first. The search is
+    stopped with a `SearchTimeout` once the stop flag of the table is set.
+
+    Helpers, with a `helper_index` above 0, search the root moves in a shuffled order, so that the
+    processes of one Lazy SMP search fill the table with different parts of the tree.
+    """
+
+    def __init__(
+            self,
+            max_points,
+            table: SharedTranspositionTable,
+            helper_index: int = 0,
+            **search_settings
+        ) -> None:
+        super().__init__(max_points, **search_settings)
+        self.table = table
+        self.helper_index = helper_index
+        self.helper_rng = random.Random(helper_index)
+        self.zobrist_keys = None
+        self.key = 0
+        # Best move of the table entry of the node being searched, taken by `get_first_move` or at the root by
+        # `ai_get_next_positions`, so that the nodes below do not see it
+        self.hash_move = None
+
+    def search(
+            self,
+            position: Position,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            deadline: Union[float, None] = None,
+            time_manager: Union[TimeManager, None] = None
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        if self.zobrist_keys is None or len(self.zobrist_keys.white_keys) != len(position.cells):
+            self.zobrist_keys = ZobristKeys(len(position.tiles), position.board_size)
+        self.key = self.zobrist_keys.get_position_key(position)
+        return super().search(position, is_maximizing_player, is_one_stack_left, deadline, time_manager)
+
+    def ai_get_next_positions(
+            self,
+            position: Position,
+            player_color: int,
+            is_one_stack_left: bool
+        ) -> List[Tuple[bool, Tuple[int, int, int]]]:
+        next_positions = super().ai_get_next_positions(position, player_color, is_one_stack_left)
+        # The moves of inner nodes are sorted by `order_moves`, which puts the hash move first
+        if len(position.undo_stack) != self.root_ply:
+            return next_positions
+        if self.hash_move is not None:
+            for move_index, (_, next_board_instructions) in enumerate(next_positions):
+                if next_board_instructions == self.hash_move:
+                    next_positions.insert(0, next_positions.pop(move_index))
+                    break
+            self.hash_move = None
+        elif self.helper_index:
+            self.helper_rng.shuffle(next_positions)
+        return next_positions
+
+    def get_first_move(
+            self,
+            ply: int
+        ) -> Union[Tuple[int, int, int], None]:
+        hash_move, self.hash_move = self.hash_move, None
+        if hash_move is not None:
+            return hash_move
+        return super().get_first_move(ply)
+
+    def ai_move_stack(
+            self,
+            position: Position,
+            source: int,
+            source_token_level: int,
+            destination: int
+        ) -> None:
+        self.key ^= self.zobrist_keys.get_move_key(position, source, source_token_level, destination)
+        position.make_move(source, source_token_level, destination)
+
+    def ai_revert_move_stack(
+            self,
+            position: Position
+        ) -> None:
+        source, destination, count = position.undo_stack[-1]
+        position.unmake_move()
+        self.key ^= self.zobrist_keys.get_move_key(position, source, position.heights[source] - count + 1, destination)
+
+    def minimax(
+            self,
+            position: Position,
+            depth: int,
+            is_maximizing_player: bool,
+            is_one_stack_left: bool,
+            alpha=float('-inf'),
+            beta=float('inf'),
+            prev_player_next_positions=1
+        ) -> Tuple[int, Union[Tuple[int, int, int], None]]:
+        if self.table.is_stopped():
+            raise SearchTimeout()
+        self.hash_move = None
+        if depth == 0:
+            return super().minimax(position, depth, is_maximizing_player, is_one_stack_left, alpha, beta, prev_player_next_positions)
+
+        key = self.key if is_maximizing_player else self.key ^ self.zobrist_keys.black_to_move_key
+        entry = self.table.probe(key)
+        if entry is not None:
+            value, entry_depth, bound, move = entry
+            if entry_depth >= depth and (
+                bound == EXACT or (bound == LOWER_BOUND and value >= beta) or (bound == UPPER_BOUND and value <= alpha)
+            ):
+                self.nodes_searched += 1
+                self.pv_table[len(position.undo_stack) - self.root_ply] = [move] if move is not None else []
+                return value, move
+            self.hash_move = move
+
+        value, move = super().minimax(position, depth, is_maximizing_player, is_one_stack_left, alpha, beta, prev_player_next_positions)
+        self.hash_move = None
+
+        # Scores which do not fit the entry, such as the infinite scores of cut off nodes without moves, are not stored
+        if isinstance(value, int) and -2 ** 31 <= value < 2 ** 31 and depth < 256:
+            bound = UPPER_BOUND if value <= alpha else LOWER_BOUND if value >= beta else EXACT
+            self.table.store(key, value, depth, bound, move)
+        return value, move
+
+
+_worker_table: Union[SharedTranspositionTable, None] = None
+
+
+def initialize_worker(
+        table_name: str,
+        entries_count: int
+    ) -> None:
+    global _worker_table
+    _worker_table = SharedTranspositionTable(entries_count, table_name)
+
+
+def search_worker(
+        notation: str,
+        depth: int,
+        helper_index: int,
+        max_points: int,
+        search_settings: Dict
+    ) -> Dict:
+    """
+    Searches a position, given in the notation of `board.notation`, with the shared table of the worker process.
+    """
+    start_time = time.perf_counter()
+    position, player_color, white_points, black_points = decode_position(notation)
+    ai = SharedTableAI(max_points, _worker_table, helper_index, depth=depth, **search_settings)
+    ai.white_points = white_points
+    ai.black_points = black_points
+    is_one_stack_left = max_points - (white_points + black_points) == 1
+    best_value = best_move = None
+    try:
+        best_value, best_move = ai.search(position, player_color == WHITE, is_one_stack_left)
+    except SearchTimeout:
+        # A helper stopped in the middle of a search without iterative deepening
+        pass
+    return {
+        'score': best_value,
+        'best_move': best_move,
+        'depth': ai.completed_depth,
+        'nodes': ai.nodes_searched,
+        'time': time.perf_counter() - start_time,
+    }
+
+
+class LazySMPSearch:
+    """
+    Lazy SMP search, in which several processes search the same position and share a transposition table.
+
+    The processes do not split the tree between them. The main worker searches the position as usual,
+    and the helpers search it at the same depth, or one ply deeper for every other helper, in different
+    root move orders. The results the helpers store in the table cut off parts of the main worker's
+    search. The result of the main worker is returned and the helpers are stopped as soon as it finishes.
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            entries_count: int = 1 << 20,
+            **search_settings
+        ) -> None:
+        self.workers = workers
+        self.search_settings = search_settings
+        self.table = SharedTranspositionTable(entries_count)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=initialize_worker, initargs=(self.table.name, entries_count)
+        )
+
+    def search(
+            self,
+            notation: str,
+            depth: int,
+            max_points: int
+        ) -> Tuple[Dict, List[Dict]]:
+        """
+        Searches a position, given in the notation of `board.notation`, with all workers.
+
+        Returns:
+            The result of the main worker and the results of the helpers. Helpers report the deepest
+            iteration they completed before they were stopped.
+        """
+        self.table.clear()
+        futures = [
+            self.executor.submit(search_worker, notation, depth + helper_index % 2, helper_index, max_points, self.search_settings)
+            for helper_index in range(self.workers)
+        ]
+        main_result = futures[0].result()
+        self.table.stop()
+        helper_results = [future.result() for future in futures[1:]]
+        return main_result, helper_results
+
+    def close(
+            self
+        ) -> None:
+        self.executor.shutdown()
+        self.table.close()
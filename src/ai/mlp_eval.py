@@ -0,0 +1,169 @@
+import hashlib
+from typing import List
+
+import numpy as np
+
+from .batch_eval import BatchEvaluator, EvaluationTables
+from .weights import DEFAULT_HEURISTIC_WEIGHTS, HEURISTIC_TERMS
+from board.position import STACK_CAPACITY, Position
+
+
+# Full stacks are removed as soon as they form in the self-play games the network is trained on, so the
+# network never sees them and they are scored by the fixed heuristic term instead
+FULL_STACK_INDEX = HEURISTIC_TERMS.index('full_stack')
+NETWORK_TERM_INDICES = [index for index in range(len(HEURISTIC_TERMS)) if index != FULL_STACK_INDEX]
+NETWORK_LEVELS = STACK_CAPACITY - 1
+
+
+class MLPEvaluator(BatchEvaluator):
+    """
+    Evaluates positions with a small multilayer perceptron, as an alternative to the hand-written heuristic.
+
+    The inputs are the color codes of the cells of the board below the eighth level followed by the
+    heuristic terms of `BatchEvaluator.extract_features` except `full_stack`, divided by `feature_scales`.
+    The hidden layers use ReLU and the single output is the logit of the probability that white wins.
+    Scores are the logit divided by `scale`, the factor which maps heuristic scores onto win probabilities,
+    and rounded, so they are integers in the same units as `AI.heuristic`.
+
+    The training positions come from `ai.simulator.GameSimulator`, which removes a full stack as soon as
+    it forms, so the eighth level and the `full_stack` term are always zero there and their weights would
+    stay untrained. They are left out of the network and full stacks, which the search does evaluate, are
+    scored by the fixed `full_stack_weight` of the heuristic instead, added to the network score.
+
+    The network is trained offline by `train_mlp.py` and stored in an npz file. Batches are evaluated
+    by the inherited `evaluate_positions` and `evaluate_children`, so an AI can use the evaluator as its
+    batch evaluator at the search frontier.
+    """
+
+    def __init__(
+            self,
+            is_center,
+            board_size: int,
+            layer_weights: List[np.ndarray],
+            layer_biases: List[np.ndarray],
+            feature_scales: np.ndarray,
+            scale: float,
+            full_stack_weight: int = DEFAULT_HEURISTIC_WEIGHTS['full_stack'],
+            chunk_size: int = 1024
+        ) -> None:
+        super().__init__(is_center, chunk_size)
+        self.board_size = board_size
+        self.layer_weights = [weights.astype(np.float32) for weights in layer_weights]
+        self.layer_biases = [biases.astype(np.float32) for biases in layer_biases]
+        self.feature_scales = feature_scales.astype(np.float32)
+        self.scale = scale
+        self.full_stack_weight = full_stack_weight
+
+    @classmethod
+    def load(
+            cls,
+            path: str,
+            is_center
+        ) -> 'MLPEvaluator':
+        """
+        Loads a network saved by `save`.
+        """
+        data = np.load(path)
+        layers_count = int(data['layers_count'])
+        return cls(
+            is_center,
+            int(data['board_size']),
+            [data[f'layer_{layer}_weights'] for layer in range(layers_count)],
+            [data[f'layer_{layer}_biases'] for layer in range(layers_count)],
+            data['feature_scales'],
+            float(data['scale']),
+            int(data['full_stack_weight'])
+        )
+
+    def save(
+            self,
+            path: str
+        ) -> None:
+        """
+        Saves the network to a compressed npz file.
+        """
+        layers = {}
+        for layer, (weights, biases) in enumerate(zip(self.layer_weights, self.layer_biases)):
+            layers[f'layer_{layer}_weights'] = weights
+            layers[f'layer_{layer}_biases'] = biases
+        np.savez_compressed(
+            path,
+            board_size=self.board_size,
+            layers_count=len(self.layer_weights),
+            feature_scales=self.feature_scales,
+            scale=self.scale,
+            full_stack_weight=self.full_stack_weight,
+            **layers
+        )
+
+    def get_fingerprint(
+            self
+        ) -> bytes:
+        """
+        Hashes the parameters of the network, so that results of different networks can be told apart.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for array in (*self.layer_weights, *self.layer_biases, self.feature_scales, np.float64(self.scale), np.int64(self.full_stack_weight)):
+            digest.update(array.tobytes())
+        return digest.digest()
+
+    def get_inputs(
+            self,
+            cells: np.ndarray,
+            tables: EvaluationTables
+        ) -> np.ndarray:
+        """
+        Builds the network inputs of a (batch, tiles, levels) array of color codes.
+        """
+        return self.get_network_inputs(cells, self.extract_features(cells, tables))
+
+    def get_network_inputs(
+            self,
+            cells: np.ndarray,
+            features: np.ndarray
+        ) -> np.ndarray:
+        """
+        Builds the network inputs of color codes and their unscaled heuristic terms, leaving out full stacks.
+        """
+        features = features[:, NETWORK_TERM_INDICES] / self.feature_scales[NETWORK_TERM_INDICES]
+        return np.concatenate((
+            cells[:, :, :NETWORK_LEVELS].reshape(len(cells), -1).astype(np.float32),
+            features.astype(np.float32)
+        ), axis=1)
+
+    def get_logits(
+            self,
+            inputs: np.ndarray
+        ) -> np.ndarray:
+        """
+        Runs the network on a batch of inputs and returns the logits of white winning.
+        """
+        activations = inputs
+        for weights, biases in zip(self.layer_weights[:-1], self.layer_biases[:-1]):
+            activations = np.maximum(activations @ weights + biases, 0)
+        return (activations @ self.layer_weights[-1] + self.layer_biases[-1])[:, 0]
+
+    def evaluate(
+            self,
+            cells: np.ndarray,
+            tables: EvaluationTables
+        ) -> np.ndarray:
+        if cells.shape[1] * NETWORK_LEVELS + len(NETWORK_TERM_INDICES) != len(self.layer_weights[0]):
+            raise ValueError(f'The network was trained for board size {self.board_size}')
+        scores = np.empty(len(cells), dtype=np.int32)
+        for start in range(0, len(cells), self.chunk_size):
+            chunk = cells[start:start + self.chunk_size]
+            features = self.extract_features(chunk, tables)
+            logits = self.get_logits(self.get_network_inputs(chunk, features))
+            scores[start:start + self.chunk_size] = np.round(logits / self.scale) + self.full_stack_weight * features[:, FULL_STACK_INDEX]
+        return scores
+
+    def evaluate_position(
+            self,
+            position: Position
+        ) -> int:
+        """
+        Evaluates a single position, with the same signature as `AI.heuristic`.
+        """
+        cells = np.array(position.cells, dtype=np.int8).reshape(1, len(position.tiles), -1)
+        return int(self.evaluate(cells, self.get_tables(position))[0])
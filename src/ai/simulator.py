@@ -0,0 +1,318 @@
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from .batch_eval import NO_STACK_DISTANCE, BatchEvaluator
+from board.board import Board
+from board.position import BLACK, STACK_CAPACITY, WHITE, Position
+import utils.colors as colors
+
+
+# Order of the diagonal directions in `EvaluationTables.neighbours` and their bits in `DIRECTION_BITS`
+NEIGHBOUR_DIRECTION_BITS = np.array([1, 2, 8, 4], dtype=np.int8)
+DIRECTIONS_COUNT = 4
+ACTIONS_PER_TILE = DIRECTIONS_COUNT * STACK_CAPACITY
+
+# Bits of the token levels which can be moved from a stack of the first height onto a stack of the second
+# height: the level has to be lower or equal to the destination height and the result can not exceed 8 tokens
+LEVEL_BITS = np.array([
+    [
+        sum(
+            1 << (level - 1)
+            for level in range(1, min(source_height, destination_height) + 1)
+            if destination_height + source_height - level + 1 <= STACK_CAPACITY
+        )
+        for destination_height in range(STACK_CAPACITY + 1)
+    ]
+    for source_height in range(STACK_CAPACITY + 1)
+], dtype=np.uint8)
+
+
+class GameSimulator:
+    """
+    Plays many independent games at once, with the state of all games kept in NumPy arrays.
+
+    The rules are the same as in `Board.move_stack` and `utils.movement`: tokens are moved onto higher
+    levels of diagonal neighbours without exceeding 8 tokens, isolated stacks are moved as a whole towards
+    the closest stacks, full stacks are removed and scored, and a player without legal moves is skipped.
+    A game ends when a player reaches the winning points, when neither player can move, or after
+    `max_moves` moves.
+
+    The greedy policy evaluates moves with `BatchEvaluator`, using the given heuristic weights.
+
+    An action is a (source tile, direction, token level) triple flattened into a single integer, so the
+    legal moves of all games form a (games, actions) mask.
+    """
+
+    def __init__(
+            self,
+            board_size: int,
+            games_count: int,
+            seed: int = 0,
+            max_moves: int = 500,
+            heuristic_weights: Union[Dict[str, int], None] = None
+        ) -> None:
+        board = Board(board_size, 1, colors.WHITE)
+        board.initialize_board()
+        start_position = Position.from_board_dict(board.board, board_size)
+
+        self.board_size = board_size
+        self.games_count = games_count
+        self.max_moves = max_moves
+        self.winning_points = board.max_points // 2 + 1
+        self.tiles = start_position.tiles
+        self.tiles_count = len(self.tiles)
+        self.evaluator = BatchEvaluator(board.ai.is_center, heuristic_weights=heuristic_weights)
+        self.tables = self.evaluator.get_tables(start_position)
+        self.rng = np.random.default_rng(seed)
+
+        start_cells = np.array(start_position.cells, dtype=np.int8).reshape(self.tiles_count, STACK_CAPACITY)
+        self.cells = np.repeat(start_cells[None, :, :], games_count, axis=0)
+        self.heights = np.count_nonzero(self.cells, axis=2).astype(np.int8)
+        self.current_player = np.full(games_count, WHITE, dtype=np.int8)
+        self.white_points = np.zeros(games_count, dtype=np.int16)
+        self.black_points = np.zeros(games_count, dtype=np.int16)
+        self.moves_played = np.zeros(games_count, dtype=np.int32)
+        self.finished = np.zeros(games_count, dtype=bool)
+        self.winner = np.zeros(games_count, dtype=np.int8)
+
+    def get_legal_move_bits(
+            self,
+            cells: np.ndarray,
+            heights: np.ndarray,
+            player: np.ndarray
+        ) -> np.ndarray:
+        """
+        Computes the legal moves of the given players as a (games, tiles, directions) array of token level bits.
+        """
+        games_count = len(cells)
+        padded_heights = np.concatenate((heights, np.zeros((games_count, 1), dtype=heights.dtype)), axis=1)
+        destination_heights = padded_heights[:, self.tables.neighbours]
+        has_neighbours = (destination_heights > 0).any(axis=2)
+        owned_tokens = cells == player[:, None, None]
+        owned_bits = np.packbits(owned_tokens, axis=2, bitorder='little')
+
+        # Moves onto a higher level of a neighbouring stack, without exceeding 8 tokens
+        legal_bits = LEVEL_BITS[heights[:, :, None], destination_heights] & owned_bits
+        legal_bits[~has_neighbours] = 0
+
+        # Isolated stacks are moved as a whole towards the closest stacks
+        isolated_games, isolated_tiles = np.nonzero((heights > 0) & ~has_neighbours & owned_tokens[:, :, 0])
+        if len(isolated_games):
+            occupied = heights[isolated_games] > 0
+            distances = np.where(occupied, self.tables.distances[isolated_tiles], NO_STACK_DISTANCE)
+            closest_distances = distances.min(axis=1, keepdims=True)
+            is_closest = (distances == closest_distances) & (closest_distances < NO_STACK_DISTANCE)
+            directions = np.bitwise_or.reduce(np.where(is_closest, self.tables.direction_bits[isolated_tiles], 0), axis=1)
+            is_legal_direction = (
+                (directions[:, None] & NEIGHBOUR_DIRECTION_BITS[None, :]) != 0
+            ) & (self.tables.neighbours[isolated_tiles] < self.tiles_count)
+            legal_bits[isolated_games, isolated_tiles] = is_legal_direction
+
+        return legal_bits
+
+    def get_legal_moves(
+            self,
+            cells: np.ndarray,
+            heights: np.ndarray,
+            player: np.ndarray
+        ) -> np.ndarray:
+        """
+        Computes the (games, tiles, directions, levels) mask of legal moves of the given players.
+        """
+        legal_bits = self.get_legal_move_bits(cells, heights, player)
+        return np.unpackbits(legal_bits[:, :, :, None], axis=3, bitorder='little').astype(bool)
+
+    def apply_moves(
+            self,
+            cells: np.ndarray,
+            heights: np.ndarray,
+            actions: np.ndarray
+        ) -> None:
+        """
+        Applies one action per row of the given arrays in place.
+        """
+        rows = np.arange(len(actions))
+        sources = actions // ACTIONS_PER_TILE
+        directions = actions // STACK_CAPACITY % DIRECTIONS_COUNT
+        token_levels = actions % STACK_CAPACITY + 1
+        destinations = self.tables.neighbours[sources, directions]
+        source_heights = heights[rows, sources].astype(np.intp)
+        destination_heights = heights[rows, destinations].astype(np.intp)
+        counts = source_heights - token_levels + 1
+
+        for offset in range(STACK_CAPACITY):
+            moved = offset < counts
+            moved_rows = rows[moved]
+            source_levels = token_levels[moved] - 1 + offset
+            destination_levels = destination_heights[moved] + offset
+            cells[moved_rows, destinations[moved], destination_levels] = cells[moved_rows, sources[moved], source_levels]
+            cells[moved_rows, sources[moved], source_levels] = 0
+
+        heights[rows, sources] -= counts.astype(heights.dtype)
+        heights[rows, destinations] += counts.astype(heights.dtype)
+
+    def choose_actions(
+            self,
+            games: np.ndarray,
+            legal_moves: np.ndarray,
+            policy: str,
+            epsilon: float
+        ) -> np.ndarray:
+        """
+        Chooses one legal action for each of the given games, which must all have a legal move.
+
+        The random policy picks uniformly among the legal moves. The greedy policy evaluates every legal
+        move with the heuristic and plays the best one for the player to move, except for a random move
+        with probability `epsilon`.
+        """
+        legal_actions = legal_moves.reshape(len(games), -1)
+        # Uniformly random legal move, the first action whose running count of legal moves exceeds a random index
+        legal_counts = np.cumsum(legal_actions, axis=1, dtype=np.int16)
+        random_indices = (self.rng.random(len(games)) * legal_counts[:, -1]).astype(np.int16)
+        actions = (legal_counts > random_indices[:, None]).argmax(axis=1)
+        if policy == 'random':
+            return actions
+
+        move_games, move_actions = np.nonzero(legal_actions)
+        child_cells = self.cells[games[move_games]]
+        child_heights = self.heights[games[move_games]]
+        self.apply_moves(child_cells, child_heights, move_actions)
+        scores = self.evaluator.evaluate(child_cells, self.tables) * self.current_player[games[move_games]]
+
+        # Best move of every game, the moves of a game are consecutive in the nonzero order
+        group_starts = np.flatnonzero(np.r_[True, move_games[1:] != move_games[:-1]])
+        best_scores = np.maximum.reduceat(scores, group_starts)
+        is_best = scores == np.repeat(best_scores, np.diff(np.r_[group_starts, len(scores)]))
+        # Ties are broken randomly, the best move of a game is the first one after sorting by game and key
+        best_keys = np.where(is_best, self.rng.random(len(scores)), -1.0)
+        best_actions = move_actions[np.lexsort((-best_keys, move_games))[group_starts]]
+
+        explores = self.rng.random(len(games)) < epsilon
+        return np.where(explores, actions, best_actions)
+
+    def step(
+            self,
+            policy: str = 'random',
+            epsilon: float = 0.0
+        ) -> None:
+        """
+        Plays one move in every unfinished game.
+        """
+        games = np.flatnonzero(~self.finished)
+        if not len(games):
+            return
+
+        legal_bits = self.get_legal_move_bits(self.cells[games], self.heights[games], self.current_player[games])
+        has_moves = legal_bits.any(axis=(1, 2))
+        # Only reachable when the last stack is isolated, or when neither player could move after a skip
+        self.finish_games(games[~has_moves])
+        games = games[has_moves]
+        if not len(games):
+            return
+
+        legal_moves = np.unpackbits(legal_bits[has_moves, :, :, None], axis=3, bitorder='little').astype(bool)
+        actions = self.choose_actions(games, legal_moves, policy, epsilon)
+        self.play_actions(games, actions)
+
+    def play_actions(
+            self,
+            games: np.ndarray,
+            actions: np.ndarray
+        ) -> None:
+        """
+        Plays one legal action in each of the given unfinished games and finishes their turns.
+
+        Full stacks are removed and scored, games with a winner or with `max_moves` moves are finished,
+        and the turn passes to the other player of the other games.
+        """
+        cells = self.cells[games]
+        heights = self.heights[games]
+        self.apply_moves(cells, heights, actions)
+
+        # Remove full stacks and score them for the owner of the top token
+        destinations = self.tables.neighbours[actions // ACTIONS_PER_TILE, actions // STACK_CAPACITY % DIRECTIONS_COUNT]
+        rows = np.arange(len(games))
+        full_stacks = heights[rows, destinations] == 8
+        stack_owners = cells[rows, destinations, STACK_CAPACITY - 1]
+        self.white_points[games] += full_stacks & (stack_owners == WHITE)
+        self.black_points[games] += full_stacks & (stack_owners == BLACK)
+        cells[rows[full_stacks], destinations[full_stacks]] = 0
+        heights[rows[full_stacks], destinations[full_stacks]] = 0
+
+        self.cells[games] = cells
+        self.heights[games] = heights
+        self.moves_played[games] += 1
+
+        has_winner = (self.white_points[games] == self.winning_points) | (self.black_points[games] == self.winning_points)
+        self.finish_games(games[has_winner | (self.moves_played[games] >= self.max_moves)])
+        self.change_current_players(games[~self.finished[games]])
+
+    def set_games(
+            self,
+            cells: np.ndarray,
+            heights: np.ndarray,
+            current_player: np.ndarray,
+            white_points: np.ndarray,
+            black_points: np.ndarray
+        ) -> None:
+        """
+        Replaces all games by unfinished games in the given states, so that positions from elsewhere can be played on.
+        """
+        self.games_count = len(cells)
+        self.cells = cells
+        self.heights = heights
+        self.current_player = current_player
+        self.white_points = white_points
+        self.black_points = black_points
+        self.moves_played = np.zeros(self.games_count, dtype=np.int32)
+        self.finished = np.zeros(self.games_count, dtype=bool)
+        self.winner = np.zeros(self.games_count, dtype=np.int8)
+
+    def change_current_players(
+            self,
+            games: np.ndarray
+        ) -> None:
+        """
+        Passes the turn to the other player, unless that player has no legal move and has to skip it.
+        """
+        self.current_player[games] = -self.current_player[games]
+        legal_bits = self.get_legal_move_bits(self.cells[games], self.heights[games], self.current_player[games])
+        skipped = ~legal_bits.any(axis=(1, 2))
+        self.current_player[games[skipped]] = -self.current_player[games[skipped]]
+
+    def finish_games(
+            self,
+            games: np.ndarray
+        ) -> None:
+        """
+        Marks games as finished, the player with more points wins and equal points are a draw.
+        """
+        self.finished[games] = True
+        self.winner[games] = np.sign(self.white_points[games] - self.black_points[games])
+
+    def play(
+            self,
+            policy: str = 'random',
+            epsilon: float = 0.0
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Plays all games until they are finished.
+
+        Returns:
+            The winner of every game (1 for white, -1 for black, 0 for a draw) and the points of both players.
+        """
+        while not self.finished.all():
+            self.step(policy, epsilon)
+        return self.winner, self.white_points, self.black_points
+
+    def get_action_move(
+            self,
+            action: int
+        ) -> Tuple[Tuple[int, int], int, Tuple[int, int]]:
+        """
+        Converts an action into a (source tile, token level, destination tile) move.
+        """
+        source = action // ACTIONS_PER_TILE
+        destination = self.tables.neighbours[source, action // STACK_CAPACITY % DIRECTIONS_COUNT]
+        return self.tiles[source], action % STACK_CAPACITY + 1, self.tiles[destination]
@@ -0,0 +1,123 @@
+import time
+from typing import List, Tuple, Union
+
+
+class TimeManager:
+    """
+    Decides how long the AI thinks about a move of a timed game.
+
+    Every move gets a target time, the remaining time spread over `moves_to_go` moves plus most of the
+    increment. The target grows with the number of legal moves, as positions with more moves need more
+    time to search to the same depth, and it grows further in critical positions in which a player is
+    one full stack away from winning. The search is iterative deepening, and before every iteration
+    `should_stop` decides whether to start it:
+
+    - An iteration usually takes longer than all the previous ones together, so a new iteration is only
+      started in the first half of the target time.
+    - Once the best move has not changed for `stable_iterations` iterations, half the target is enough.
+    - If the last iteration changed the best move, the target is extended by half, as the search is unsure.
+    - An iteration which is predicted to end after the hard limit is not started, since its result would
+      be lost when the search is stopped at the deadline.
+
+    The hard limit, after which the search is stopped in the middle of an iteration, is never more than
+    `max_time_share` of the available time, so the AI does not flag. The available time keeps a reserve
+    of `move_overhead` for each of the next `moves_to_go` moves, the cost of generating and playing a
+    move outside the search. Without an increment, a game which outlasts the reserve ends with moves
+    that are played without a search.
+    """
+
+    def __init__(
+            self,
+            moves_to_go: int = 25,
+            increment_share: float = 0.75,
+            max_time_share: float = 0.25,
+            move_overhead: float = 0.02,
+            stable_iterations: int = 2,
+            reference_moves_count: int = 20,
+            min_growth: float = 5.0,
+            max_depth: int = 32
+        ) -> None:
+        self.moves_to_go = moves_to_go
+        self.increment_share = increment_share
+        self.max_time_share = max_time_share
+        # Time of the move generation before the search and of playing the move after it
+        self.move_overhead = move_overhead
+        self.stable_iterations = stable_iterations
+        # Number of legal moves of a position which gets the plain target time
+        self.reference_moves_count = reference_moves_count
+        # Smallest expected growth of an iteration over the previous one. The growth from the second to the
+        # third iteration is often 5-10, much more than from the first to the second one.
+        self.min_growth = min_growth
+        # Deepest iteration of a timed search, deep enough to never be reached in practice
+        self.max_depth = max_depth
+        self.start_time = 0.0
+        self.target_time = 0.0
+        self.hard_limit = 0.0
+        # Expected growth of the second iteration over the first one, see `should_stop`
+        self.branching_factor = 0
+        self.best_moves: List[Union[Tuple[int, int, int], None]] = []
+        self.iteration_end_times: List[float] = []
+
+    @property
+    def deadline(
+            self
+        ) -> float:
+        return self.start_time + self.hard_limit
+
+    def start_move(
+            self,
+            remaining_time: float,
+            increment: float,
+            root_moves_count: int,
+            is_critical: bool
+        ) -> None:
+        """
+        Starts timing a move and sets its target time and hard limit.
+
+        The branching factor is set to the number of moves, the search lowers it if it limits the moves of inner nodes.
+        """
+        self.start_time = time.perf_counter()
+        available_time = max(remaining_time - self.moves_to_go * self.move_overhead, 0.0)
+        target_time = available_time / self.moves_to_go + self.increment_share * increment
+        # More moves make a wider tree, a square root keeps the range of targets moderate
+        target_time *= min(max((root_moves_count / self.reference_moves_count) ** 0.5, 0.5), 2.0)
+        if is_critical:
+            target_time *= 1.5
+        self.hard_limit = min(3 * target_time, self.max_time_share * available_time)
+        self.target_time = min(target_time, self.hard_limit)
+        self.branching_factor = root_moves_count
+        self.best_moves = []
+        self.iteration_end_times = []
+
+    def should_stop(
+            self,
+            best_move: Union[Tuple[int, int, int], None]
+        ) -> bool:
+        """
+        Decides whether to stop after a completed iteration which found `best_move`, instead of starting the next one.
+        """
+        now = time.perf_counter()
+        elapsed_time = now - self.start_time
+        self.best_moves.append(best_move)
+        self.iteration_end_times.append(now)
+
+        target_time = self.target_time
+        recent_moves = self.best_moves[-self.stable_iterations - 1:]
+        if len(recent_moves) > self.stable_iterations and all(move == best_move for move in recent_moves):
+            target_time *= 0.5
+        elif len(self.best_moves) > 1 and self.best_moves[-2] != best_move:
+            target_time *= 1.5
+        if elapsed_time >= min(target_time, self.hard_limit) / 2:
+            return True
+
+        # The growth of the iteration times alternates between odd and even depths, so the next iteration is
+        # expected to grow by the largest factor seen so far, or by the branching factor after the first iteration
+        iteration_times = [
+            end_time - start_time
+            for start_time, end_time in zip([self.start_time] + self.iteration_end_times, self.iteration_end_times)
+        ]
+        growth = max(
+            (iteration_time / previous_time for previous_time, iteration_time in zip(iteration_times, iteration_times[1:]) if previous_time > 0),
+            default=self.branching_factor
+        )
+        return elapsed_time + iteration_times[-1] * max(growth, self.min_growth) > self.hard_limit
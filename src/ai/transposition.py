@@ -0,0 +1,177 @@
+import random
+from multiprocessing import shared_memory
+from typing import List, Tuple, Union
+
+from board.position import STACK_CAPACITY, WHITE, Position
+
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Words of the shared block before the first entry, the first one is the stop flag of the workers
+HEADER_WORDS = 2
+WORD_BITS = 64
+WORD_MASK = (1 << WORD_BITS) - 1
+VALUE_OFFSET = 1 << 31
+
+
+class ZobristKeys:
+    """
+    Random 64 bit keys for every token color on every stack level of a board, and for the player to move.
+
+    The hash of a position is the XOR of the keys of all its tokens, so a move changes it by the keys of
+    the moved tokens at their old and new levels only. The keys are generated from the board size, so
+    every process computes the same hashes.
+    """
+
+    def __init__(
+            self,
+            tiles_count: int,
+            board_size: int
+        ) -> None:
+        rng = random.Random(board_size)
+        cells_count = tiles_count * STACK_CAPACITY
+        self.white_keys: List[int] = [rng.getrandbits(WORD_BITS) for _ in range(cells_count)]
+        self.black_keys: List[int] = [rng.getrandbits(WORD_BITS) for _ in range(cells_count)]
+        self.black_to_move_key = rng.getrandbits(WORD_BITS)
+
+    def get_position_key(
+            self,
+            position: Position
+        ) -> int:
+        key = 0
+        for cell, color in enumerate(position.cells):
+            if color:
+                key ^= self.white_keys[cell] if color == WHITE else self.black_keys[cell]
+        return key
+
+    def get_move_key(
+            self,
+            position: Position,
+            source: int,
+            level: int,
+            destination: int
+        ) -> int:
+        """
+        Computes the change of the hash by moving the tokens from the given level of the source stack onto the destination.
+
+        The change is the same for making and for taking back the move, so it can be computed from the
+        position before the move or after it was taken back.
+        """
+        cells = position.cells
+        count = position.heights[source] - level + 1
+        source_start = source * STACK_CAPACITY + level - 1
+        destination_start = destination * STACK_CAPACITY + position.heights[destination]
+        key = 0
+        for offset in range(count):
+            color_keys = self.white_keys if cells[source_start + offset] == WHITE else self.black_keys
+            key ^= color_keys[source_start + offset] ^ color_keys[destination_start + offset]
+        return key
+
+
+class SharedTranspositionTable:
+    """
+    Fixed size hash table of search results in shared memory, which several processes read and write without locks.
+
+    Every entry is two 64 bit words, the packed data and the position key XOR the data. A process can
+    read an entry while another one writes it and see one old and one new word, such an entry does not
+    pass the key verification and is treated as a miss. The data packs, from the lowest bits, the score
+    (32 bits), the depth (8 bits), the bound type (2 bits) and the best move as source index (9 bits),
+    token level (4 bits, 0 for no move) and destination index (9 bits).
+
+    The process which creates the table owns it and has to `unlink` it, the workers attach to it by name.
+    """
+
+    def __init__(
+            self,
+            entries_count: int,
+            name: Union[str, None] = None
+        ) -> None:
+        if entries_count & (entries_count - 1):
+            raise ValueError(f'The number of entries must be a power of two, got {entries_count}')
+        self.entries_count = entries_count
+        self.index_mask = entries_count - 1
+        self.is_owner = name is None
+        size = (HEADER_WORDS + 2 * entries_count) * WORD_BITS // 8
+        self.shared_memory = shared_memory.SharedMemory(name=name, create=self.is_owner, size=size if self.is_owner else 0)
+        self.words = self.shared_memory.buf.cast('Q')
+
+    @property
+    def name(
+            self
+        ) -> str:
+        return self.shared_memory.name
+
+    def clear(
+            self
+        ) -> None:
+        """
+        Removes all entries and resets the stop flag, while no worker is using the table.
+        """
+        self.shared_memory.buf[:] = bytes(len(self.shared_memory.buf))
+
+    def is_stopped(
+            self
+        ) -> bool:
+        return self.words[0] != 0
+
+    def stop(
+            self
+        ) -> None:
+        self.words[0] = 1
+
+    def probe(
+            self,
+            key: int
+        ) -> Union[Tuple[int, int, int, Union[Tuple[int, int, int], None]], None]:
+        """
+        Looks up a position by its key.
+
+        Returns:
+            The score, depth, bound type and best move of the entry, or None if the position is not stored.
+        """
+        words = self.words
+        word_index = HEADER_WORDS + 2 * (key & self.index_mask)
+        data = words[word_index]
+        if words[word_index + 1] ^ data != key or not data:
+            return None
+
+        value = (data & 0xFFFFFFFF) - VALUE_OFFSET
+        depth = (data >> 32) & 0xFF
+        bound = (data >> 40) & 0x3
+        token_level = (data >> 51) & 0xF
+        move = ((data >> 42) & 0x1FF, token_level, data >> 55) if token_level else None
+        return value, depth, bound, move
+
+    def store(
+            self,
+            key: int,
+            value: int,
+            depth: int,
+            bound: int,
+            move: Union[Tuple[int, int, int], None]
+        ) -> None:
+        """
+        Stores a search result, replacing the entry of another position or a shallower search of the same one.
+        """
+        words = self.words
+        word_index = HEADER_WORDS + 2 * (key & self.index_mask)
+        stored_data = words[word_index]
+        if stored_data and words[word_index + 1] ^ stored_data == key and (stored_data >> 32) & 0xFF > depth:
+            return
+
+        data = (value + VALUE_OFFSET) | depth << 32 | bound << 40
+        if move is not None:
+            source, token_level, destination = move
+            data |= source << 42 | token_level << 51 | destination << 55
+        words[word_index] = data
+        words[word_index + 1] = key ^ data
+
+    def close(
+            self
+        ) -> None:
+        self.words.release()
+        self.shared_memory.close()
+        if self.is_owner:
+            self.shared_memory.unlink()
@@ -0,0 +1,46 @@
+import json
+from typing import Dict
+
+
+# Terms of `AI.heuristic`, in the order of the feature columns of `BatchEvaluator.extract_features`
+HEURISTIC_TERMS = ('token', 'height', 'mobility', 'center', 'full_stack')
+
+DEFAULT_HEURISTIC_WEIGHTS = {
+    'token': 1,
+    'height': 2,
+    'mobility': 2,
+    'center': 2,
+    'full_stack': 100,
+}
+
+
+def load_heuristic_weights(
+        path: str
+    ) -> Dict[str, int]:
+    """
+    Loads heuristic weights from a JSON file, such as one written by `tune_weights.py`.
+
+    Terms missing from the file keep their default weights.
+    """
+    with open(path) as weights_file:
+        loaded_weights = json.load(weights_file)
+
+    unknown_terms = set(loaded_weights) - set(HEURISTIC_TERMS)
+    if unknown_terms:
+        raise ValueError(f'Unknown heuristic terms: {", ".join(sorted(unknown_terms))}')
+
+    weights = dict(DEFAULT_HEURISTIC_WEIGHTS)
+    weights.update(loaded_weights)
+    return weights
+
+
+def save_heuristic_weights(
+        path: str,
+        weights: Dict[str, int]
+    ) -> None:
+    """
+    Saves heuristic weights to a JSON file.
+    """
+    with open(path, 'w') as weights_file:
+        json.dump({term: weights[term] for term in HEURISTIC_TERMS}, weights_file, indent=4)
+        weights_file.write('\n')
@@ -0,0 +1,152 @@
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterator, TextIO, Union
+
+from ai.ai import AI
+from board.board import SUPPORTED_BOARD_SIZES, get_max_points
+from board.notation import decode_position
+from board.position import WHITE
+
+
+def analyze_position(
+        notation: str,
+        depth: int,
+        time_limit: Union[float, None]
+    ) -> Dict:
+    """
+    Searches one position, given in the notation of `board.notation`, and returns the result as a JSON object.
+
+    With a time limit in seconds, the position is searched with iterative deepening up to `depth` and
+    the deepest completed iteration is reported.
+    """
+    start_time = time.perf_counter()
+    position, player_color, white_points, black_points = decode_position(notation)
+    if position.board_size not in SUPPORTED_BOARD_SIZES:
+        raise ValueError(f'Unsupported board size: {position.board_size}')
+    max_points = get_max_points(position.board_size)
+    is_one_stack_left = max_points - (white_points + black_points) == 1
+
+    ai = AI(max_points, depth=depth)
+    ai.white_points = white_points
+    ai.black_points = black_points
+    deadline = start_time + time_limit if time_limit else None
+    best_value, best_move = ai.search(position, player_color == WHITE, is_one_stack_left, deadline)
+
+    best_tile_move = None
+    if best_move is not None:
+        source, token_level, destination = best_move
+        best_tile_move = [list(position.tiles[source]), token_level, list(position.tiles[destination])]
+
+    return {
+        'score': best_value,
+        'best_move': best_tile_move,
+        'depth': ai.completed_depth,
+        'nodes': ai.nodes_searched,
+        'time': round(time.perf_counter() - start_time, 3),
+    }
+
+
+def read_requests(
+        input_file: TextIO
+    ) -> Iterator[Dict]:
+    """
+    Reads analysis requests line by line, either JSON objects with a "position" field or bare notations.
+
+    Other fields of a JSON object, such as an id, are copied into the result. Blank lines are skipped.
+    """
+    for line in input_file:
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('{'):
+            yield {'position': line}
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield {'input': line, 'error': f'Invalid JSON: {error}'}
+            continue
+        if not isinstance(request, dict) or not isinstance(request.get('position'), str):
+            yield {'input': line, 'error': 'Missing "position" field'}
+            continue
+        yield request
+
+
+def write_result(
+        output_file: TextIO,
+        request: Dict,
+        pending: Union[Future, None]
+    ) -> None:
+    result = dict(request)
+    if pending is not None:
+        try:
+            result.update(pending.result())
+        except ValueError as error:
+            result['error'] = str(error)
+        except Exception as error:
+            # Any other failure, such as a crashed worker process, is reported for this position only
+            result['error'] = f'{type(error).__name__}: {error}'
+    output_file.write(json.dumps(result) + '\n')
+    output_file.flush()
+
+
+def run_analysis(
+        input_file: TextIO,
+        output_file: TextIO,
+        depth: int,
+        time_limit: Union[float, None],
+        workers: int,
+        max_pending: int
+    ) -> None:
+    """
+    Analyses a stream of positions in worker processes and writes the results in input order.
+
+    At most `max_pending` positions are submitted but not yet written, so memory stays bounded however
+    long the input is. Results are written as soon as all earlier ones are done.
+    """
+    pending_requests = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for request in read_requests(input_file):
+            pending = None
+            if 'error' not in request:
+                pending = executor.submit(analyze_position, request['position'], depth, time_limit)
+            pending_requests.append((request, pending))
+
+            while pending_requests and (len(pending_requests) >= max_pending or pending_requests[0][1] is None or pending_requests[0][1].done()):
+                write_result(output_file, *pending_requests.popleft())
+
+        while pending_requests:
+            write_result(output_file, *pending_requests.popleft())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Find the best moves of positions read as JSON lines.')
+    parser.add_argument('input', nargs='?', default='-', help='file with one position per line, - for stdin')
+    parser.add_argument('--output', default='-', help='file for the JSON line results, - for stdout')
+    parser.add_argument('--depth', type=int, help='search depth, the maximum depth with a time limit (default 3, 64 with a time limit)')
+    parser.add_argument('--time', type=float, help='time limit per position in seconds')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--max-pending', type=int, help='positions in flight at once (default 4 per worker)')
+    args = parser.parse_args()
+
+    depth = args.depth if args.depth is not None else (64 if args.time else 3)
+    max_pending = args.max_pending or 4 * args.workers
+
+    input_file = sys.stdin if args.input == '-' else open(args.input)
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        run_analysis(input_file, output_file, depth, args.time, args.workers, max_pending)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == '__main__':
+    main()
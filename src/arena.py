@@ -0,0 +1,146 @@
+import argparse
+import random
+from typing import Dict, Tuple, Union
+
+from ai.ai import AI
+from ai.mlp_eval import MLPEvaluator
+from ai.weights import load_heuristic_weights
+from benchmark import SEARCH_CONFIGS
+from board.board import Board
+from board.clock import parse_time_control
+import utils.colors as colors
+from utils.events import NullSink
+from utils.memory import monitor_memory
+from utils.profiling import profile_run
+
+
+def play_game(
+        board_size: int,
+        white_ai: AI,
+        black_ai: AI,
+        opening_seed: int,
+        opening_moves: int = 4,
+        max_moves: int = 300,
+        time_control: Union[Tuple[float, float], None] = None
+    ) -> Tuple[int, int, Union[Tuple[int, int, int], None]]:
+    """
+    Plays one game between two AIs, starting with a few random moves so that games differ from each other.
+
+    With a time control, base and increment seconds, the game is timed and the AIs manage their clocks.
+
+    Returns:
+        The final points of white and black, and the color of the player who lost on time if one did.
+        The game is stopped after `max_moves` moves, or when neither player can move.
+    """
+    rng = random.Random(opening_seed)
+    board = Board(board_size, 800 // board_size, colors.WHITE, NullSink())
+    board.initialize_board()
+    if time_control:
+        board.set_time_control(*time_control)
+
+    for move_number in range(max_moves):
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        if move_number < opening_moves:
+            is_winning_move = board.play_move(*rng.choice(legal_moves))
+        else:
+            board.ai = white_ai if board.current_player == colors.WHITE else black_ai
+            is_winning_move = board.make_ai_move()
+        # A move made after the player's time ran out loses, even if it wins on points
+        if board.clock is not None:
+            flagged_player = next((player for player in (colors.WHITE, colors.BLACK) if board.clock.is_flagged(player)), None)
+            if flagged_player is not None:
+                return board.white_points, board.black_points, flagged_player
+        if is_winning_move:
+            break
+
+    return board.white_points, board.black_points, None
+
+
+def run_arena(
+        board_size: int,
+        first_config: Dict,
+        second_config: Dict,
+        games: int,
+        depth: int,
+        seed: int,
+        first_weights: Union[Dict[str, int], None] = None,
+        second_weights: Union[Dict[str, int], None] = None,
+        first_evaluator: Union[MLPEvaluator, None] = None,
+        second_evaluator: Union[MLPEvaluator, None] = None,
+        time_control: Union[Tuple[float, float], None] = None
+    ) -> Tuple[int, int, int]:
+    """
+    Plays pairs of games between two search configurations, with colors swapped in the second game of a pair.
+
+    Each configuration can use its own heuristic weights or an evaluator which replaces the heuristic,
+    the default heuristic is used otherwise. In timed games, a player who runs out of time loses.
+
+    Returns:
+        Wins of the first configuration, wins of the second configuration and draws.
+    """
+    max_points = Board(board_size, 1, colors.WHITE).max_points
+    first_wins, second_wins, draws = 0, 0, 0
+
+    for game_number in range(games):
+        first_ai = AI(max_points, depth=depth, heuristic_weights=first_weights, evaluator=first_evaluator, **first_config)
+        second_ai = AI(max_points, depth=depth, heuristic_weights=second_weights, evaluator=second_evaluator, **second_config)
+        first_is_white = game_number % 2 == 0
+        white_ai, black_ai = (first_ai, second_ai) if first_is_white else (second_ai, first_ai)
+        white_points, black_points, flagged_player = play_game(board_size, white_ai, black_ai, seed + game_number // 2, time_control=time_control)
+
+        first_points, second_points = (white_points, black_points) if first_is_white else (black_points, white_points)
+        first_flagged = flagged_player is not None and (flagged_player == colors.WHITE) == first_is_white
+        if flagged_player is not None:
+            if first_flagged:
+                second_wins += 1
+            else:
+                first_wins += 1
+        elif first_points > second_points:
+            first_wins += 1
+        elif second_points > first_points:
+            second_wins += 1
+        else:
+            draws += 1
+        flag_note = '' if flagged_player is None else f', {"first" if first_flagged else "second"} lost on time'
+        print(f'game {game_number + 1}: first {first_points} - second {second_points}{flag_note}', flush=True)
+
+    return first_wins, second_wins, draws
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Play games between two AI search configurations.')
+    parser.add_argument('first', choices=list(SEARCH_CONFIGS), help='first search configuration')
+    parser.add_argument('second', choices=list(SEARCH_CONFIGS), help='second search configuration')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--games', type=int, default=10, help='number of games, colors alternate between games')
+    parser.add_argument('--depth', type=int, default=3, help='search depth of both AIs')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random opening moves')
+    parser.add_argument('--time-control', type=parse_time_control, help='play timed games, base minutes and increment seconds per move such as 1+0.5')
+    parser.add_argument('--first-weights', help='JSON file of heuristic weights of the first configuration')
+    parser.add_argument('--second-weights', help='JSON file of heuristic weights of the second configuration')
+    parser.add_argument('--first-mlp', help='npz file of an MLP network which replaces the heuristic of the first configuration')
+    parser.add_argument('--second-mlp', help='npz file of an MLP network which replaces the heuristic of the second configuration')
+    parser.add_argument('--memory', action='store_true', help='trace memory and print the peaks of the AI moves')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in the phases of the AI search')
+    parser.add_argument('--profile-output', help='also record the run with cProfile and write the statistics to this file')
+    args = parser.parse_args()
+
+    is_center = AI(1).is_center
+    first_weights = load_heuristic_weights(args.first_weights) if args.first_weights else None
+    second_weights = load_heuristic_weights(args.second_weights) if args.second_weights else None
+    first_evaluator = MLPEvaluator.load(args.first_mlp, is_center) if args.first_mlp else None
+    second_evaluator = MLPEvaluator.load(args.second_mlp, is_center) if args.second_mlp else None
+    with monitor_memory(args.memory) as memory_monitor, profile_run(args.profile, args.profile_output):
+        first_wins, second_wins, draws = run_arena(
+            args.size, SEARCH_CONFIGS[args.first], SEARCH_CONFIGS[args.second], args.games, args.depth, args.seed,
+            first_weights, second_weights, first_evaluator, second_evaluator, args.time_control
+        )
+        print(f'{args.first}: {first_wins} wins, {args.second}: {second_wins} wins, {draws} draws')
+    if memory_monitor is not None:
+        memory_monitor.report()
+
+
+if __name__ == '__main__':
+    main()
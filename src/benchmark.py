@@ -0,0 +1,285 @@
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple, Union
+
+from ai.ai import AI
+from board.board import Board
+from board.position import Position
+import utils.colors as colors
+from utils.events import NullSink
+from utils.profiling import profile_run
+from utils.tracing import trace_search
+
+
+SEARCH_CONFIGS: Dict[str, Dict] = {
+    'alpha-beta': dict(use_pvs=False, aspiration_window=0),
+    'pvs': dict(use_pvs=True, aspiration_window=0),
+    'pvs-aspiration': dict(use_pvs=True),
+    'lmr': dict(use_late_move_reductions=True),
+    'futility': dict(use_futility_pruning=True),
+    'selective': dict(use_late_move_reductions=True, use_futility_pruning=True),
+    # A NumPy batch evaluator scores all children of a frontier node and the tactical children of quiescence nodes at once
+    'frontier-batch': dict(use_batch_evaluation=True),
+    # Depth and beam width chosen from the branching factor of each position
+    'adaptive': dict(node_budget=20000),
+}
+
+
+def generate_benchmark_positions(
+        board_size: int,
+        count: int,
+        seed: int,
+        moves_between_positions: int = 5
+    ) -> List[Board]:
+    """
+    Plays random legal moves from the initial position and keeps a snapshot of the board every few moves.
+
+    The same seed always produces the same positions, so results of different runs can be compared.
+    """
+    rng = random.Random(seed)
+    board = Board(board_size, 800 // board_size, colors.WHITE, NullSink())
+    board.initialize_board()
+    positions = []
+
+    while len(positions) < count:
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        is_winning_move = board.play_move(*rng.choice(legal_moves))
+        if is_winning_move:
+            break
+        if rng.randrange(moves_between_positions) == 0:
+            positions.append(snapshot_board(board))
+
+    return positions
+
+
+def snapshot_board(
+        board: Board
+    ) -> Board:
+    """
+    Creates an independent copy of the game state of a board, without copying the AI settings.
+    """
+    snapshot = Board(board.board_size, board.tile_size, board.current_player, board.events)
+    snapshot.board = {tile: [*stack] for tile, stack in board.board.items()}
+    snapshot.white_points = board.white_points
+    snapshot.black_points = board.black_points
+    snapshot.initialize_move_tracking()
+    return snapshot
+
+
+def search_board(
+        ai: AI,
+        board: Board
+    ) -> Tuple[int, Tuple[int, int, int], float]:
+    """
+    Searches the position of a board with the given AI, without printing anything.
+
+    Returns:
+        The score, the best move and the search time in seconds.
+    """
+    ai.white_points = board.white_points
+    ai.black_points = board.black_points
+    position = Position.from_board_dict(board.board, board.board_size)
+    is_one_stack_left = board.get_num_of_remaining_stacks() == 1
+    start_time = time.perf_counter()
+    best_value, best_move = ai.search(position, board.current_player == colors.WHITE, is_one_stack_left)
+    return best_value, best_move, time.perf_counter() - start_time
+
+
+def run_search_benchmark(
+        boards: List[Board],
+        config_names: List[str],
+        depth: int
+    ) -> None:
+    """
+    Searches every benchmark position with every configuration and prints nodes, time and speed.
+
+    The best moves of each configuration are compared with the first configuration, so a pruning
+    technique that changes the result of the search is easy to spot.
+    """
+    reference_results = None
+    print(f'{"config":<16}{"nodes":>12}{"time [s]":>12}{"nodes/s":>12}  same moves')
+    for config_name in config_names:
+        total_nodes = 0
+        total_time = 0.0
+        results = []
+        for board in boards:
+            ai = AI(board.max_points, depth=depth, **SEARCH_CONFIGS[config_name])
+            best_value, best_move, search_time = search_board(ai, board)
+            total_nodes += ai.nodes_searched
+            total_time += search_time
+            results.append(best_move)
+        if reference_results is None:
+            reference_results = results
+        same_moves = sum(result == reference for result, reference in zip(results, reference_results))
+        print(f'{config_name:<16}{total_nodes:>12}{total_time:>12.2f}{total_nodes / total_time:>12.0f}  {same_moves}/{len(results)}')
+
+
+def run_evaluation_benchmark(
+        boards: List[Board],
+        batch_size: int,
+        mlp_path: Union[str, None] = None
+    ) -> None:
+    """
+    Compares the throughput of `AI.heuristic` with the NumPy batch evaluation on the benchmark positions.
+
+    Positions of each board size are repeated until the batch is full, and both evaluations must give the same scores.
+    With an MLP network, its throughput is measured both for one position per call and for the whole batch.
+    """
+    from ai.batch_eval import BatchEvaluator
+    from ai.mlp_eval import MLPEvaluator
+
+    mlp_columns = f'{"mlp single/s":>14}{"mlp batch/s":>14}' if mlp_path else ''
+    print(f'{"size":<8}{"heuristic/s":>14}{"batch/s":>14}{"speedup":>10}{mlp_columns}')
+    for board_size in sorted({board.board_size for board in boards}):
+        ai = AI(1)
+        batch_evaluator = BatchEvaluator(ai.is_center)
+        positions = [Position.from_board_dict(board.board, board_size) for board in boards if board.board_size == board_size]
+        positions = (positions * (batch_size // len(positions) + 1))[:batch_size]
+
+        start_time = time.perf_counter()
+        scores = [ai.heuristic(position) for position in positions]
+        heuristic_time = time.perf_counter() - start_time
+
+        cells = batch_evaluator.to_array(positions)
+        tables = batch_evaluator.get_tables(positions[0])
+        start_time = time.perf_counter()
+        batch_scores = batch_evaluator.evaluate(cells, tables)
+        batch_time = time.perf_counter() - start_time
+
+        if list(batch_scores) != scores:
+            raise AssertionError(f'Batch evaluation differs from the heuristic on board size {board_size}')
+        mlp_results = ''
+        if mlp_path:
+            mlp_evaluator = MLPEvaluator.load(mlp_path, ai.is_center)
+            if mlp_evaluator.board_size == board_size:
+                start_time = time.perf_counter()
+                for position in positions:
+                    mlp_evaluator.evaluate_position(position)
+                mlp_single_time = time.perf_counter() - start_time
+                start_time = time.perf_counter()
+                mlp_evaluator.evaluate(cells, tables)
+                mlp_batch_time = time.perf_counter() - start_time
+                mlp_results = f'{batch_size / mlp_single_time:>14.0f}{batch_size / mlp_batch_time:>14.0f}'
+        print(f'{board_size:<8}{batch_size / heuristic_time:>14.0f}{batch_size / batch_time:>14.0f}{heuristic_time / batch_time:>10.1f}{mlp_results}')
+
+
+def run_smp_benchmark(
+        boards: List[Board],
+        config_name: str,
+        depth: int,
+        worker_counts: List[int]
+    ) -> None:
+    """
+    Searches every benchmark position with Lazy SMP for every number of workers and prints the speedup.
+
+    The speedup is the time of the search with one worker, which uses the same shared transposition
+    table, divided by the time with more workers. The best moves are compared with the single worker.
+    """
+    from ai.lazy_smp import LazySMPSearch
+
+    reference_results = None
+    reference_time = None
+    print(f'{"workers":<10}{"main nodes":>12}{"all nodes":>12}{"time [s]":>12}{"speedup":>10}  same moves')
+    for workers in worker_counts:
+        smp_search = LazySMPSearch(workers, **SEARCH_CONFIGS[config_name])
+        try:
+            # Start the worker processes before the clock runs
+            smp_search.search(boards[0].get_notation(), 1, boards[0].max_points)
+            main_nodes = 0
+            all_nodes = 0
+            results = []
+            start_time = time.perf_counter()
+            for board in boards:
+                main_result, helper_results = smp_search.search(board.get_notation(), depth, board.max_points)
+                main_nodes += main_result['nodes']
+                all_nodes += main_result['nodes'] + sum(helper_result['nodes'] for helper_result in helper_results)
+                results.append(main_result['best_move'])
+            total_time = time.perf_counter() - start_time
+        finally:
+            smp_search.close()
+        if reference_results is None:
+            reference_results = results
+            reference_time = total_time
+        same_moves = sum(result == reference for result, reference in zip(results, reference_results))
+        print(f'{workers:<10}{main_nodes:>12}{all_nodes:>12}{total_time:>12.2f}{reference_time / total_time:>10.2f}  {same_moves}/{len(results)}')
+
+
+def run_memory_benchmark(
+        boards: List[Board],
+        config_name: str,
+        depth: int
+    ) -> None:
+    """
+    Measures the peak memory allocated by `AI.ai_make_move` on the benchmark positions, with the memory of the game state and the caches.
+
+    The game state and cache sizes are those of the last position of every board size, the peak
+    allocation is the mean and maximum over all positions of the size.
+    """
+    from utils.memory import get_board_memory, get_cache_sizes, measure_peak
+
+    print(f'{"size":<6}{"board dict":>12}{"tracking":>10}{"position":>10}{"notation":>10}{"tokens":>8}{"token":>7}{"peak mean":>12}{"peak max":>12}')
+    for board_size in sorted({board.board_size for board in boards}):
+        sized_boards = [board for board in boards if board.board_size == board_size]
+        peaks = []
+        for board in sized_boards:
+            ai = AI(board.max_points, depth=depth, events=NullSink(), **SEARCH_CONFIGS[config_name])
+            ai.white_points = board.white_points
+            ai.black_points = board.black_points
+            is_one_stack_left = board.get_num_of_remaining_stacks() == 1
+            _, peak_size = measure_peak(ai.ai_make_move, board.board, board_size, board.current_player, is_one_stack_left)
+            peaks.append(peak_size)
+        board_memory = get_board_memory(sized_boards[-1])
+        print(
+            f'{board_size:<6}{board_memory["board dict"]:>12}{board_memory["move tracking"]:>10}{board_memory["position"]:>10}'
+            f'{board_memory["notation"]:>10}{board_memory["tokens"]:>8}{board_memory["token"]:>7}'
+            f'{sum(peaks) / len(peaks):>12.0f}{max(peaks):>12}'
+        )
+
+    print(f'\n{"cache":<20}{"entries":>10}{"bytes":>12}')
+    for name, (entries_count, size) in get_cache_sizes(ai).items():
+        print(f'{name:<20}{entries_count:>10}{size:>12}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the AI search on a fixed set of positions.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 10], help='board sizes to generate positions for')
+    parser.add_argument('--positions', type=int, default=8, help='number of positions per board size')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random playouts which generate the positions')
+    parser.add_argument('--depth', type=int, default=3, help='search depth')
+    parser.add_argument('--configs', nargs='+', default=list(SEARCH_CONFIGS), choices=list(SEARCH_CONFIGS), help='search configurations to compare')
+    parser.add_argument('--evaluation', action='store_true', help='benchmark the NumPy batch evaluation instead of the search')
+    parser.add_argument('--batch-size', type=int, default=4096, help='number of positions evaluated by the evaluation benchmark')
+    parser.add_argument('--mlp', help='npz file of an MLP network to include in the evaluation benchmark')
+    parser.add_argument('--smp-workers', type=int, nargs='+', help='benchmark Lazy SMP with these numbers of worker processes instead')
+    parser.add_argument('--memory', action='store_true', help='measure the memory of AI moves, game states and caches instead')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in the phases of the AI search')
+    parser.add_argument('--profile-output', help='also record the run with cProfile and write the statistics to this file')
+    parser.add_argument('--trace', help='write the nodes visited by the searches to this JSON lines file, see trace_summary.py')
+    parser.add_argument('--trace-sample-rate', type=float, default=1.0, help='share of the subtrees below the first ply which are traced')
+    args = parser.parse_args()
+
+    boards = [
+        board
+        for board_size in args.sizes
+        for board in generate_benchmark_positions(board_size, args.positions, args.seed)
+    ]
+    with profile_run(args.profile, args.profile_output), trace_search(args.trace, args.trace_sample_rate):
+        if args.evaluation:
+            run_evaluation_benchmark(boards, args.batch_size, args.mlp)
+        elif args.memory:
+            print(f'{len(boards)} positions, depth {args.depth}, sizes in bytes')
+            run_memory_benchmark(boards, args.configs[0], args.depth)
+        elif args.smp_workers:
+            # Lazy SMP uses the first configuration for all of its workers, which are not profiled
+            print(f'{len(boards)} positions, depth {args.depth}')
+            run_smp_benchmark(boards, args.configs[0], args.depth, args.smp_workers)
+        else:
+            print(f'{len(boards)} positions, depth {args.depth}')
+            run_search_benchmark(boards, args.configs, args.depth)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,73 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Set, Tuple, Union
 
+from .clock import GameClock
+from .notation import encode_position
+from .position import COLOR_CODES, STACK_CAPACITY, Position
 from .token import Token
 from utils import colors
 from utils.movement import get_clicked_tile_position, are_neighbours, get_potential_moves, has_neighbours, is_destination_level_higher_than_current_level, is_inside_board
-from utils.utils import lighten_color, print_error, print_green, print_score, print_warning
+from utils.events import ConsoleSink, EventSink
+from utils.utils import lighten_color
 from ai.ai import AI
 
 
+# Even board sizes which can be played, the AI becomes more selective on the larger ones
+SUPPORTED_BOARD_SIZES = tuple(range(8, 26, 2))
+
+
+def get_max_points(
+        board_size: int
+    ) -> int:
+    """
+    Computes the number of full stacks which can be formed on a board, which is the number of points of a game.
+
+    The starting position has a token on every dark tile outside the first and last rows. On boards where
+    the tokens do not make up whole stacks, such as 12x12 with 60 tokens, the remaining tokens are never scored.
+    """
+    tokens_count = board_size // 2 * (board_size - 2)
+    return tokens_count // STACK_CAPACITY
+
+
 class Board:
 
     def __init__(
             self,
             board_size: int,
             tile_size: int,
-            current_player: Tuple[int, int, int]
+            current_player: Tuple[int, int, int],
+            events: Union[EventSink, None] = None
         ) -> None:
         self.board: Dict = {}
         self.white_points: int = 0
         self.black_points: int = 0
         self.tile_size: int = tile_size
         self.board_size: int = board_size
-        self.max_points = (self.board_size ** 2 - 2 * self.board_size) // 16
+        self.max_points = get_max_points(board_size)
         self.selected_tokens: List[Token] = []
         self.board_dark: Tuple[int, int, int] = colors.BROWN
         self.board_light: Tuple[int, int, int] = colors.BEIGE
         self.current_player = current_player
         self.ai = AI(self.max_points)
-
-    def change_selected_tokens_status(
-            self
+        self.tile_legal_moves: Dict[Tuple[int, int], Dict[Tuple[int, int, int], int]] = {}
+        self.legal_moves_count: Dict[Tuple[int, int, int], int] = {colors.WHITE: 0, colors.BLACK: 0}
+        self.full_stack_tiles: Set[Tuple[int, int]] = set()
+        self.clock: Union[GameClock, None] = None
+        # Receives the game events, which are printed to the console unless another sink is given
+        self.events: EventSink = ConsoleSink() if events is None else events
+
+    def set_time_control(
+            self,
+            base_time: float,
+            increment: float = 0.0
         ) -> None:
         """
-        Toggles the selected status of all tokens currently in the selected tokens list.
+        Makes the game timed, with `base_time` seconds per player and `increment` seconds added after every move.
 
-        This function iterates over the tokens in `self.selected_tokens` and calls the `change_selected_status` 
-        method on each token. It is used to either select or deselect a group of tokens, based on their current 
-        status. The function effectively reverses the selected state of each token in the list.
+        The clock of the current player starts right away, and the AI plays its moves with the time
+        manager from then on, see `AI.search_timed`.
         """
-        [selected_token.change_selected_status() for selected_token in self.selected_tokens]
+        self.clock = GameClock(base_time, increment)
+        self.clock.start(self.current_player)
 
     def initialize_board(
             self
@@ -46,23 +76,21 @@ class Board:
         Initializes the game board with tokens at the start of the game.
 
         This function sets up the initial state of the board for a new game. It places tokens on each tile of the board, 
-        except for the first and last rows. The tokens are alternately colored black and white, with their width 
-        and height set relative to the tile size. The tokens are positioned only on tiles where the sum of the row and 
-        column indices is even, creating a checkerboard pattern.
+        except for the first and last rows. The tokens are alternately colored black and white, row by row. The tokens 
+        are positioned only on tiles where the sum of the row and column indices is even, creating a checkerboard pattern.
 
         The board is represented as a dictionary where keys are (row, column) tuples for the tiles, and the values are lists 
         of Token objects representing the stacks of tokens on each tile.
         """
-        token_width = int(self.tile_size * 0.8)
-        token_height = self.tile_size // 8
         self.board = {
             (row, column): [] if row in (0, self.board_size - 1) else [
-                Token(row, column, colors.BLACK if row % 2 else colors.WHITE, token_width, token_height, 1)
+                Token(row, column, colors.BLACK if row % 2 else colors.WHITE, 1)
             ]
             for row in range(self.board_size)
             for column in range(self.board_size)
             if (row % 2 == column % 2)
         }
+        self.initialize_move_tracking()
 
         # self.board = {
         #         (0,0): [],
@@ -77,30 +105,30 @@ class Board:
         #         (2,0): [],
         #         (2,2): [],
         #         (2,4): [
-        #             Token(2,4,colors.WHITE, 80, 15, 1),
-        #             Token(2,4,colors.BLACK, 80, 15, 2),
-        #             Token(2,4,colors.BLACK, 80, 15, 3),
-        #             Token(2,4,colors.WHITE, 80, 15, 4),
-        #             Token(2,4,colors.BLACK, 80, 15, 5),
-        #             Token(2,4,colors.WHITE, 80, 15, 6),
+        #             Token(2,4,colors.WHITE, 1),
+        #             Token(2,4,colors.BLACK, 2),
+        #             Token(2,4,colors.BLACK, 3),
+        #             Token(2,4,colors.WHITE, 4),
+        #             Token(2,4,colors.BLACK, 5),
+        #             Token(2,4,colors.WHITE, 6),
         #         ],
         #         (2,6): [
-        #             Token(2,6,colors.WHITE, 80, 15, 1),
-        #             Token(2,6,colors.BLACK, 80, 15, 2),
-        #             Token(2,6,colors.WHITE, 80, 15, 3),
-        #             Token(2,6,colors.BLACK, 80, 15, 4),
-        #             Token(2,6,colors.BLACK, 80, 15, 5),
+        #             Token(2,6,colors.WHITE, 1),
+        #             Token(2,6,colors.BLACK, 2),
+        #             Token(2,6,colors.WHITE, 3),
+        #             Token(2,6,colors.BLACK, 4),
+        #             Token(2,6,colors.BLACK, 5),
         #         ],
 
         #         (3,1): [],
         #         (3,3): [
-        #             Token(3,3,colors.WHITE, 80, 15, 1),
-        #             Token(3,3,colors.WHITE, 80, 15, 2),
-        #             Token(3,3,colors.BLACK, 80, 15, 3),
-        #             Token(3,3,colors.WHITE, 80, 15, 4),
-        #             Token(3,3,colors.BLACK, 80, 15, 5),
-        #             Token(3,3,colors.WHITE, 80, 15, 6),
-        #             Token(3,3,colors.BLACK, 80, 15, 7),
+        #             Token(3,3,colors.WHITE, 1),
+        #             Token(3,3,colors.WHITE, 2),
+        #             Token(3,3,colors.BLACK, 3),
+        #             Token(3,3,colors.WHITE, 4),
+        #             Token(3,3,colors.BLACK, 5),
+        #             Token(3,3,colors.WHITE, 6),
+        #             Token(3,3,colors.BLACK, 7),
         #         ],
         #         (3,5): [],
         #         (3,7): [],
@@ -108,12 +136,12 @@ class Board:
         #         (4,0): [],
         #         (4,2): [],
         #         (4,4): [
-        #             Token(4,4,colors.BLACK, 80, 15, 1),
-        #             Token(4,4,colors.WHITE, 80, 15, 2),
-        #             Token(4,4,colors.BLACK, 80, 15, 3),
-        #             Token(4,4,colors.WHITE, 80, 15, 4),
-        #             Token(4,4,colors.BLACK, 80, 15, 5),
-        #             Token(4,4,colors.WHITE, 80, 15, 6),
+        #             Token(4,4,colors.BLACK, 1),
+        #             Token(4,4,colors.WHITE, 2),
+        #             Token(4,4,colors.BLACK, 3),
+        #             Token(4,4,colors.WHITE, 4),
+        #             Token(4,4,colors.BLACK, 5),
+        #             Token(4,4,colors.WHITE, 6),
         #         ],
         #         (4,6): [],
 
@@ -135,53 +163,54 @@ class Board:
 
     def change_clicked_stack_status(
             self,
-            x: int,
-            y: int
+            row: int,
+            column: int,
+            level: int
         ) -> None:
         """
-        Changes the selected status of tokens in a stack based on the clicked position.
+        Changes the selection of tokens in a stack based on the clicked token.
 
-        This function determines which stack on the board corresponds to the clicked position (x, y) and:
+        This function takes the tile and the level of the clicked token, as resolved by the GUI, and:
         - If the clicked token belongs to the opposite player, it aborts the selection.
         - If the clicked token is already selected, it deselects it.
         - If the clicked token is not already selected, it deselects any previously selected tokens and 
         selects the new tokens from the clicked stack starting from the clicked token to the top of the stack.
         """
-        row, column = get_clicked_tile_position(x, y, self.tile_size)
-
         if (row, column) not in self.board:
             return
         
         stack = self.board[(row, column)]
-        for i in range(len(stack)):
-            token = stack[i]
-            tile_padding = (self.tile_size - token.width) / 2
-            token_x = token.column * self.tile_size + tile_padding
-            token_y = (token.row + 1) * self.tile_size - token.height * token.level
-
-            token_x_min = token_x
-            token_x_max = token_x + token.width
-            token_y_min = token_y
-            token_y_max = token_y + token.height
-
-            if token_x_min <= x <= token_x_max and token_y_min <= y <= token_y_max:
-                # Abort if opposite player token has been attempted to select
-                if not self.is_token_by_current_player(token):
-                    return
-
-                # If the clicked token is already selected, deselect it
-                if self.selected_tokens and token == self.selected_tokens[0]:
-                    self.change_selected_tokens_status()
-                    self.selected_tokens = []
-                    return
-                
-                # Deselect old tokens
-                self.change_selected_tokens_status()
-                self.selected_tokens = []
-
-                # Select new tokens
-                self.selected_tokens = [stack[j] for j in range(i, len(stack))]
-                self.change_selected_tokens_status()
+        if not 1 <= level <= len(stack):
+            return
+
+        token = stack[level - 1]
+
+        # Abort if opposite player token has been attempted to select
+        if not self.is_token_by_current_player(token):
+            return
+
+        # If the clicked token is already selected, deselect it
+        if self.selected_tokens and token == self.selected_tokens[0]:
+            self.selected_tokens = []
+            return
+
+        # Select new tokens, which deselects the old ones
+        self.selected_tokens = stack[level - 1:]
+
+    def is_token_selected(
+            self,
+            token: Token
+        ) -> bool:
+        """
+        Checks if the given token is part of the current selection.
+
+        Selected tokens are always the top part of a single stack, so a token is selected if it is on the 
+        selected tile at or above the level of the first selected token.
+        """
+        if not self.selected_tokens:
+            return False
+        first_selected_token = self.selected_tokens[0]
+        return (token.row, token.column) == (first_selected_token.row, first_selected_token.column) and token.level >= first_selected_token.level
 
     def move_stack(
             self,
@@ -212,17 +241,17 @@ class Board:
         # Check if any token was selected
         selected_tokens_count = len(self.selected_tokens)
         if selected_tokens_count == 0:
-            print_warning("No token was selected")
+            self.events.on_invalid_move("No token was selected", False)
             return is_winning_move
 
         # Check if row, column are playable tiles
         if (row, column) not in self.board:
-            print_error("Tile is not playable")
+            self.events.on_invalid_move("Tile is not playable", True)
             return is_winning_move
         
         # Check if destination tile is the same as current tile
         if self.is_selected_tile(row, column):
-            print_warning("Source and destination tiles are same")
+            self.events.on_invalid_move("Source and destination tiles are same", False)
             return is_winning_move
         
         current_row = self.selected_tokens[0].row
@@ -230,10 +259,9 @@ class Board:
 
         # Check if tiles are in neighbourhood
         if not are_neighbours((current_row, current_column), (row, column)):
-            print_error("Destination tile is too far away")
+            self.events.on_invalid_move("Destination tile is too far away", True)
             return is_winning_move
 
-        current_tile_tokens_count = len(self.board.get((current_row, current_column), []))
         destination_stack = self.board.get((row, column), [])
         destination_tokens_count = len(destination_stack)
 
@@ -241,41 +269,32 @@ class Board:
         if has_neighbours(self.board, self.board_size, current_row, current_column):
             # Check if token would have higher level if moved to destination stack
             if not is_destination_level_higher_than_current_level(self.selected_tokens[0], destination_stack):
-                print_error("You are attempting to move token to lower or equal level")
+                self.events.on_invalid_move("You are attempting to move token to lower or equal level", True)
                 return is_winning_move
         else:
             # Check if whole stack is selected
             if self.selected_tokens[0].level != 1:
-                print_warning("Whole stack must be selected")
+                self.events.on_invalid_move("Whole stack must be selected", False)
                 return is_winning_move
             # Check if destination tile is in the list of potential moves
             if (row, column) not in get_potential_moves(self.board, self.board_size, current_row, current_column):
-                print_error("Tile is not playable")
+                self.events.on_invalid_move("Tile is not playable", True)
                 return is_winning_move
 
         # Check if resulting stack would have more than 8 tokens
         resulting_stack_size = selected_tokens_count + destination_tokens_count
         if resulting_stack_size > 8:
-            print_error(f"You are attempting to make stack of size {resulting_stack_size}")
+            self.events.on_invalid_move(f"You are attempting to make stack of size {resulting_stack_size}", True)
             return is_winning_move
 
-        # Update old tile in board dictionary
-        self.board[(current_row, current_column)] = self.board[(current_row, current_column)][:current_tile_tokens_count - selected_tokens_count]
-
-        # Update token objects
-        for token in self.selected_tokens:
-            token.move(row, column, destination_tokens_count + 1)
-            destination_tokens_count += 1
-
-        # Update new tile in board dictionary
-        self.board[(row, column)] = [*self.board[(row, column)], *self.selected_tokens]
+        # Move the selected tokens and update the board dictionary
+        self.move_tokens((current_row, current_column), self.selected_tokens[0].level, (row, column))
 
         # Deselect tokens
-        self.change_selected_tokens_status()
         self.selected_tokens = []
 
         # Check if stack of size 8 has been created
-        if len(self.board[(row, column)]) == 8:
+        if (row, column) in self.full_stack_tiles:
             self.handle_full_stack_creation(row, column)
 
         # Check if there is a winner
@@ -287,61 +306,144 @@ class Board:
 
         return is_winning_move
 
+    def move_tokens(
+            self,
+            source_tile: Tuple[int, int],
+            token_level: int,
+            destination_tile: Tuple[int, int]
+        ) -> None:
+        """
+        Moves the tokens from the given level up to the top of the source stack onto the destination stack.
+
+        This function updates the board dictionary and the positions of the moved token objects, and then 
+        updates the legal move tracking around both tiles. It does not validate the move.
+        """
+        source_stack = self.board[source_tile]
+        destination_stack = self.board[destination_tile]
+        moved_tokens = source_stack[token_level - 1:]
+
+        # Update token objects
+        destination_tokens_count = len(destination_stack)
+        for token in moved_tokens:
+            token.move(destination_tile[0], destination_tile[1], destination_tokens_count + 1)
+            destination_tokens_count += 1
+
+        # Update both tiles in board dictionary
+        self.board[source_tile] = source_stack[:token_level - 1]
+        self.board[destination_tile] = [*destination_stack, *moved_tokens]
+
+        # Update legal moves and full stacks around both tiles
+        self.update_move_tracking(source_tile, destination_tile)
+
     def current_player_has_valid_move(
             self
         ) -> bool:
         """
         Determines if the current player has any valid moves available.
 
-        This function iterates over all the tiles on the board. For each tile with a stack, it checks:
-        - If the stack has no neighbours and the bottom token of the stack belongs to the current player, 
-        indicating a valid move.
-        - If the stack has neighbours, it evaluates whether there's a valid move to a higher level in any 
-        neighbouring stack.
+        This function reads the incrementally maintained count of legal moves for the current player, 
+        so it runs in constant time. The counts are kept up to date by `update_move_tracking` after 
+        every change of the board.
         """
-        has_valid_moves = False
+        return self.legal_moves_count[self.current_player] > 0
 
-        for tile, stack in self.board.items():
-            if not stack:
-                continue
+    def initialize_move_tracking(
+            self
+        ) -> None:
+        """
+        Computes the legal move counts and the set of full stacks for the whole board from scratch.
 
-            current_row = tile[0]
-            current_column = tile[1]
-
-            # If stack has no neighbours
-            if not has_neighbours(self.board, self.board_size, current_row, current_column):
-                # If current players token is on the bottom, the player has a valid move
-                if self.is_token_by_current_player(stack[0]):
-                    has_valid_moves = True
-                    break
-
-            neighbour_tiles = [
-                (current_row - 1, current_column - 1),
-                (current_row - 1, current_column + 1),
-                (current_row + 1, current_column + 1),
-                (current_row + 1, current_column - 1),
-            ]
-            has_valid_moves_from_current_position = False
+        This function is called once the board is set up. After that, only the tiles affected by a move 
+        are recounted by `update_move_tracking`.
+        """
+        self.tile_legal_moves = {}
+        self.legal_moves_count = {colors.WHITE: 0, colors.BLACK: 0}
+        self.full_stack_tiles = set()
+        self.update_move_tracking(*self.board.keys())
 
-            for neighbour_tile in neighbour_tiles:
-                # Check if possible destination tile is inside the board
-                if not is_inside_board(neighbour_tile, self.board_size):
-                    continue
-                # Check if possible destination tile has a stack
-                destination_stack = self.board[neighbour_tile]
-                if not destination_stack:
+    def update_move_tracking(
+            self,
+            *changed_tiles: Tuple[int, int]
+        ) -> None:
+        """
+        Updates the legal move counts and the set of full stacks after the given tiles have changed.
+
+        The legal moves of a stack only depend on the stack itself and its diagonal neighbours, so this 
+        function recounts the changed tiles and their neighbourhoods. For each recounted tile, the old 
+        contribution is subtracted from the per-player totals and the new one is added.
+        """
+        affected_tiles = set()
+        for row, column in changed_tiles:
+            affected_tiles.add((row, column))
+            for neighbour_tile in ((row - 1, column - 1), (row - 1, column + 1), (row + 1, column + 1), (row + 1, column - 1)):
+                if neighbour_tile in self.board:
+                    affected_tiles.add(neighbour_tile)
+
+        for tile in affected_tiles:
+            old_tile_moves = self.tile_legal_moves.get(tile)
+            if old_tile_moves:
+                for color, count in old_tile_moves.items():
+                    self.legal_moves_count[color] -= count
+
+            new_tile_moves = self.count_tile_legal_moves(tile)
+            self.tile_legal_moves[tile] = new_tile_moves
+            for color, count in new_tile_moves.items():
+                self.legal_moves_count[color] += count
+
+            if len(self.board[tile]) == 8:
+                self.full_stack_tiles.add(tile)
+            else:
+                self.full_stack_tiles.discard(tile)
+
+    def count_tile_legal_moves(
+            self,
+            tile: Tuple[int, int]
+        ) -> Dict[Tuple[int, int, int], int]:
+        """
+        Counts the legal moves starting from the stack on the given tile, for both players.
+
+        If the stack has no neighbours, the owner of the bottom token can move the whole stack towards 
+        the closest stacks, which is counted as a single move. Otherwise, each token is counted once for 
+        every neighbouring stack it can be moved onto at a higher level without exceeding 8 tokens.
+        """
+        tile_moves = {colors.WHITE: 0, colors.BLACK: 0}
+        stack = self.board[tile]
+        if not stack:
+            return tile_moves
+
+        current_row = tile[0]
+        current_column = tile[1]
+
+        # If stack has no neighbours, the owner of the bottom token has a valid move
+        if not has_neighbours(self.board, self.board_size, current_row, current_column):
+            tile_moves[stack[0].color] += 1
+            return tile_moves
+
+        neighbour_tiles = [
+            (current_row - 1, current_column - 1),
+            (current_row - 1, current_column + 1),
+            (current_row + 1, current_column + 1),
+            (current_row + 1, current_column - 1),
+        ]
+
+        for neighbour_tile in neighbour_tiles:
+            # Check if possible destination tile is inside the board
+            if not is_inside_board(neighbour_tile, self.board_size):
+                continue
+            # Check if possible destination tile has a stack
+            destination_stack = self.board[neighbour_tile]
+            if not destination_stack:
+                continue
+            for token in stack:
+                # Check if token would have higher level if moved to destination stack
+                if not is_destination_level_higher_than_current_level(token, destination_stack):
                     continue
-                # Check if current stack has a token that can be moved to higher level in destination stack
-                if not self.has_valid_move_from_current_stack_to_destination_stack(stack, destination_stack):
+                # Check if resulting stack would have more than 8 tokens
+                if len(stack) + len(destination_stack) - (token.level - 1) > 8:
                     continue
-                has_valid_moves_from_current_position = True
-                break
-
-            if has_valid_moves_from_current_position:
-                has_valid_moves = True
-                break
+                tile_moves[token.color] += 1
 
-        return has_valid_moves
+        return tile_moves
 
     def has_valid_move_from_current_stack_to_destination_stack(
             self,
@@ -501,15 +603,16 @@ class Board:
 
         This function first checks if the next player has any valid moves. If valid moves are available, it alternates 
         the `current_player` attribute between the two player colors. If the current player is white, it changes to black, 
-        and vice versa. If the next player does not have any valid moves, it prints a message indicating that the player's 
+        and vice versa. If the next player does not have any valid moves, it reports an event indicating that the player's 
         move is skipped. This function is used to update the game state to reflect which player's turn it is after a move 
         has been made, considering the availability of valid moves for the next player.
         """
         self.current_player = colors.BLACK if self.current_player == colors.WHITE else colors.WHITE
         if not self.current_player_has_valid_move():
             self.current_player = colors.BLACK if self.current_player == colors.WHITE else colors.WHITE
-            skipped_player_color_name = 'White' if self.current_player == colors.BLACK else 'Black'
-            print(f"{skipped_player_color_name} move skipped because there are no valid moves")
+            self.events.on_turn_skipped(colors.WHITE if self.current_player == colors.BLACK else colors.BLACK)
+        if self.clock is not None:
+            self.clock.press(self.current_player)
     
     def make_ai_move(
             self
@@ -523,22 +626,79 @@ class Board:
         next player to make their move.
         """
         # Deselect any selected tokens
-        self.change_selected_tokens_status()
         self.selected_tokens = []
 
         # Make a move
         is_one_stack_left = True if self.get_num_of_remaining_stacks() == 1 else False
         self.ai.white_points = self.white_points
         self.ai.black_points = self.black_points
-        new_board = self.ai.ai_make_move(self.board, self.board_size, self.current_player, is_one_stack_left)
+        self.ai.events = self.events
+        if self.clock is not None:
+            remaining_time = self.clock.get_remaining_time(self.current_player)
+            new_board = self.ai.ai_make_move(self.board, self.board_size, self.current_player, is_one_stack_left, remaining_time, self.clock.increment)
+        else:
+            new_board = self.ai.ai_make_move(self.board, self.board_size, self.current_player, is_one_stack_left)
 
         # If new_board is None, then AI should skip a move
         if new_board:
             source_tile = new_board[0]
             token_level = new_board[1]
             destination_tile = new_board[2]
-            self.ai.ai_move_stack(self.board, source_tile, token_level, destination_tile)
+            self.move_tokens(source_tile, token_level, destination_tile)
+
+        return self.finish_turn()
+
+    def get_notation(
+            self
+        ) -> str:
+        """
+        Encodes the current game state in the notation of `board.notation`, for example to log positions for analysis.
+        """
+        position = Position.from_board_dict(self.board, self.board_size)
+        return encode_position(position, COLOR_CODES[self.current_player], self.white_points, self.black_points)
+
+    def get_legal_moves(
+            self
+        ) -> List[Tuple[Tuple[int, int], int, Tuple[int, int]]]:
+        """
+        Lists all legal moves of the current player as (source tile, token level, destination tile) tuples.
 
+        The moves are generated by the AI move generation, in the same order in which the AI searches them.
+        """
+        position = Position.from_board_dict(self.board, self.board_size)
+        next_positions = self.ai.ai_get_next_positions(position, COLOR_CODES[self.current_player], False)
+        return [
+            (position.tiles[source], token_level, position.tiles[destination])
+            for _, (source, token_level, destination) in next_positions
+        ]
+
+    def play_move(
+            self,
+            source_tile: Tuple[int, int],
+            token_level: int,
+            destination_tile: Tuple[int, int]
+        ) -> bool:
+        """
+        Plays an already validated move, such as one produced by the AI move generation, and finishes the turn.
+
+        Returns:
+            bool: True if the move results in a winning condition, False otherwise.
+        """
+        self.move_tokens(source_tile, token_level, destination_tile)
+        return self.finish_turn()
+
+    def finish_turn(
+            self
+        ) -> bool:
+        """
+        Finishes the turn after a move has been made.
+
+        This function removes a completed stack of size 8 and updates the points, checks for a winner 
+        and, if the game is not over, passes the turn to the next player.
+
+        Returns:
+            bool: True if there is a winner, False otherwise.
+        """
         # Check if stack of size 8 has been created
         full_stack_tile = self.get_full_stack_tile()
         if full_stack_tile:
@@ -553,23 +713,26 @@ class Board:
 
         return is_winning_move
     
+    def has_current_player_flagged(
+            self
+        ) -> bool:
+        """
+        Checks if the time of the current player has run out in a timed game, which loses the game.
+        """
+        return self.clock is not None and self.clock.is_flagged(self.current_player)
+
     def get_num_of_remaining_stacks(self):
         return self.max_points - (self.white_points + self.black_points)
     
     def get_full_stack_tile(self) -> Tuple[int, int]:
-        for tile, stack in self.board.items():
-            if not stack:
-                continue
-            if len(stack) == 8:
-                return tile
-        return None
+        return next(iter(self.full_stack_tiles), None)
     
     def handle_full_stack_creation(self, row, column):
         """
         Handles the scenario when a full stack of size 8 is created on the board.
 
         When a stack reaches the maximum size of 8, this function is called to perform several actions:
-        1. Prints a message indicating that a full stack was created.
+        1. Reports an event indicating that a full stack was created.
         2. Updates the points for the player who completed the stack, based on the color of the top token.
         3. Removes all tokens from the completed stack.
         4. Checks for a winner after the stack is completed.
@@ -577,16 +740,18 @@ class Board:
         Returns:
             bool: True if the completion of the stack results in a winner, False otherwise.
         """
-        print_green("Stack with size 8 was created")
+        player = self.board[(row, column)][-1].color
+        self.events.on_stack_completed(row, column, player)
         # Update the points
-        if self.board[(row, column)][-1].color == colors.WHITE:
+        if player == colors.WHITE:
             self.white_points += 1
         else:
             self.black_points += 1
-        # Print the score
-        print_score(self.white_points, self.black_points)
+        # Report the score
+        self.events.on_score(self.white_points, self.black_points)
         # Delete the tokens
         self.board[(row, column)] = []
+        self.update_move_tracking((row, column))
         # Return True if there is a winner, otherwise False
         return self.check_for_winner()
     
@@ -0,0 +1,112 @@
+import time
+from typing import Dict, Tuple, Union
+
+from utils import colors
+
+
+def parse_time_control(
+        text: str
+    ) -> Tuple[float, float]:
+    """
+    Parses a time control such as '5+3', base minutes and increment seconds per move, into seconds.
+
+    Raises:
+        ValueError: If the text is not a time control.
+    """
+    base_minutes, _, increment = text.partition('+')
+    base_time, increment = float(base_minutes) * 60, float(increment or 0)
+    if base_time <= 0 or increment < 0:
+        raise ValueError(f'Invalid time control: {text}')
+    return base_time, increment
+
+
+def format_clock_time(
+        seconds: float
+    ) -> str:
+    """
+    Formats a remaining time as minutes and seconds, with tenths of a second under ten seconds.
+    """
+    seconds = max(seconds, 0.0)
+    if seconds < 10:
+        return f'{seconds:.1f}'
+    minutes, seconds = divmod(int(seconds), 60)
+    return f'{minutes}:{seconds:02d}'
+
+
+class GameClock:
+    """
+    Chess clock of a timed game, with a base time per player and an increment added after every move.
+
+    The clock of the player to move runs from `start` until `press`, which adds the increment and starts
+    the clock of the next player. A player who is skipped because they have no moves does not get an
+    increment, as the same clock keeps running. A player whose time has run out has flagged and loses.
+    """
+
+    def __init__(
+            self,
+            base_time: float,
+            increment: float = 0.0
+        ) -> None:
+        self.base_time = base_time
+        self.increment = increment
+        self.remaining_times: Dict[Tuple[int, int, int], float] = {colors.WHITE: base_time, colors.BLACK: base_time}
+        self.running_player: Union[Tuple[int, int, int], None] = None
+        self.turn_start_time = None
+
+    def start(
+            self,
+            player: Tuple[int, int, int]
+        ) -> None:
+        self.running_player = player
+        self.turn_start_time = time.perf_counter()
+
+    def stop(
+            self
+        ) -> float:
+        """
+        Stops the running clock and charges the time of the turn to its player.
+
+        Returns:
+            float: The time of the turn in seconds, 0 if no clock was running.
+        """
+        if self.running_player is None:
+            return 0.0
+        elapsed_time = time.perf_counter() - self.turn_start_time
+        self.remaining_times[self.running_player] -= elapsed_time
+        self.running_player = None
+        return elapsed_time
+
+    def press(
+            self,
+            next_player: Tuple[int, int, int]
+        ) -> None:
+        """
+        Ends the turn of the running player, adds the increment unless they have flagged and starts the clock of `next_player`.
+        """
+        player = self.running_player
+        if player is not None and player != next_player:
+            self.stop()
+            if self.remaining_times[player] > 0:
+                self.remaining_times[player] += self.increment
+        if self.running_player is None:
+            self.start(next_player)
+
+    def get_remaining_time(
+            self,
+            player: Tuple[int, int, int]
+        ) -> float:
+        remaining_time = self.remaining_times[player]
+        if player == self.running_player:
+            remaining_time -= time.perf_counter() - self.turn_start_time
+        return remaining_time
+
+    def is_flagged(
+            self,
+            player: Tuple[int, int, int]
+        ) -> bool:
+        return self.get_remaining_time(player) <= 0
+
+    def get_caption(
+            self
+        ) -> str:
+        return f'White {format_clock_time(self.get_remaining_time(colors.WHITE))} - Black {format_clock_time(self.get_remaining_time(colors.BLACK))}'
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+
+from .position import BLACK, STACK_CAPACITY, WHITE, Position
+
+
+TOKEN_LETTERS = {WHITE: 'w', BLACK: 'b'}
+LETTER_COLORS = {letter: color for color, letter in TOKEN_LETTERS.items()}
+EMPTY_TILE = '-'
+
+
+def get_dark_tiles(
+        board_size: int
+    ) -> List[Tuple[int, int]]:
+    """
+    Lists the playable tiles of a board in the order of `Board.board`, row by row.
+    """
+    return [
+        (row, column)
+        for row in range(board_size)
+        for column in range(board_size)
+        if row % 2 == column % 2
+    ]
+
+
+def encode_position(
+        position: Position,
+        player_color: int,
+        white_points: int,
+        black_points: int
+    ) -> str:
+    """
+    Encodes a game state into a single line of text, which can be stored in logs and sent between processes.
+
+    The notation is the board size, the color to move, the points of white and black and the stacks,
+    separated by spaces. The stacks are listed row by row with rows separated by '/' and the dark tiles
+    of a row separated by ',', every stack as its tokens from the bottom up ('w' or 'b') and an empty
+    tile as '-'. The starting position of an 8x8 board is
+
+        8 w 0 0 -,-,-,-/b,b,b,b/w,w,w,w/b,b,b,b/w,w,w,w/b,b,b,b/w,w,w,w/-,-,-,-
+    """
+    board_size = position.board_size
+    tile_indices = {tile: index for index, tile in enumerate(position.tiles)}
+    rows = []
+    for row in range(board_size):
+        stacks = []
+        for column in range(row % 2, board_size, 2):
+            stack = position.get_stack(tile_indices[(row, column)])
+            stacks.append(''.join(TOKEN_LETTERS[color] for color in stack) or EMPTY_TILE)
+        rows.append(','.join(stacks))
+    return f'{board_size} {TOKEN_LETTERS[player_color]} {white_points} {black_points} {"/".join(rows)}'
+
+
+def decode_position(
+        notation: str
+    ) -> Tuple[Position, int, int, int]:
+    """
+    Decodes a game state encoded by `encode_position`.
+
+    Returns:
+        The position, with tiles in the order of `Board.board`, the color code of the player to move and
+        the points of white and black.
+    """
+    fields = notation.split()
+    if len(fields) != 5:
+        raise ValueError(f'Expected 5 fields in the notation, got {len(fields)}')
+    board_size_field, player_field, white_points_field, black_points_field, stacks_field = fields
+
+    if not board_size_field.isdigit() or int(board_size_field) % 2:
+        raise ValueError(f'Invalid board size: {board_size_field}')
+    if player_field not in LETTER_COLORS:
+        raise ValueError(f'Invalid color to move: {player_field}')
+    if not white_points_field.isdigit() or not black_points_field.isdigit():
+        raise ValueError(f'Invalid points: {white_points_field} {black_points_field}')
+    board_size = int(board_size_field)
+
+    rows = stacks_field.split('/')
+    if len(rows) != board_size:
+        raise ValueError(f'Expected {board_size} rows, got {len(rows)}')
+
+    position = Position(board_size, get_dark_tiles(board_size))
+    index = 0
+    for row, row_field in enumerate(rows):
+        stacks = row_field.split(',')
+        if len(stacks) != board_size // 2:
+            raise ValueError(f'Expected {board_size // 2} tiles in row {row}, got {len(stacks)}')
+        for stack in stacks:
+            if stack != EMPTY_TILE:
+                if len(stack) > STACK_CAPACITY or any(letter not in LETTER_COLORS for letter in stack):
+                    raise ValueError(f'Invalid stack in row {row}: {stack}')
+                position.set_stack(index, [LETTER_COLORS[letter] for letter in stack])
+            index += 1
+
+    return position, LETTER_COLORS[player_field], int(white_points_field), int(black_points_field)
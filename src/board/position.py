@@ -0,0 +1,139 @@
+from typing import Dict, List, Tuple
+
+from utils import colors
+
+
+EMPTY = 0
+WHITE = 1
+BLACK = -1
+STACK_CAPACITY = 8
+
+COLOR_CODES = {colors.WHITE: WHITE, colors.BLACK: BLACK}
+
+
+class Position:
+    """
+    Compact, mutable board representation used by the search.
+
+    Every playable tile gets an index and a preallocated buffer of `STACK_CAPACITY` integer color codes
+    inside the flat `cells` list, with the stack height of each tile kept in `heights`. Moves are applied
+    and reverted in place by `make_move` and `unmake_move`, which push and pop (source, destination, count)
+    undo records, so a move only copies a few integers instead of building new lists and tokens.
+    """
+
+    def __init__(
+            self,
+            board_size: int,
+            tiles: List[Tuple[int, int]]
+        ) -> None:
+        self.board_size = board_size
+        self.tiles = list(tiles)
+        self.tile_indices: Dict[Tuple[int, int], int] = {tile: index for index, tile in enumerate(self.tiles)}
+        self.cells: List[int] = [EMPTY] * (len(self.tiles) * STACK_CAPACITY)
+        self.heights: List[int] = [0] * len(self.tiles)
+        self.undo_stack: List[Tuple[int, int, int]] = []
+        self.neighbours: List[List[int]] = [
+            [
+                self.tile_indices[neighbour_tile]
+                for neighbour_tile in ((row - 1, column - 1), (row - 1, column + 1), (row + 1, column + 1), (row + 1, column - 1))
+                if neighbour_tile in self.tile_indices
+            ]
+            for row, column in self.tiles
+        ]
+
+    @classmethod
+    def from_board_dict(
+            cls,
+            board_dict: Dict,
+            board_size: int
+        ) -> 'Position':
+        """
+        Creates a position from a board dictionary of token stacks, keeping the tile order of the dictionary.
+        """
+        position = cls(board_size, board_dict.keys())
+        for index, stack in enumerate(board_dict.values()):
+            position.set_stack(index, [COLOR_CODES[token.color] for token in stack])
+        return position
+
+    def set_stack(
+            self,
+            index: int,
+            stack: List[int]
+        ) -> None:
+        """
+        Replaces the stack on the tile with the given index by a list of color codes, from bottom to top.
+        """
+        base = index * STACK_CAPACITY
+        self.cells[base:base + STACK_CAPACITY] = [*stack, *([EMPTY] * (STACK_CAPACITY - len(stack)))]
+        self.heights[index] = len(stack)
+
+    def get_stack(
+            self,
+            index: int
+        ) -> List[int]:
+        """
+        Returns the color codes of the stack on the tile with the given index, from bottom to top.
+        """
+        base = index * STACK_CAPACITY
+        return self.cells[base:base + self.heights[index]]
+
+    def make_move(
+            self,
+            source: int,
+            level: int,
+            destination: int
+        ) -> None:
+        """
+        Moves the tokens from the given level up to the top of the source stack onto the destination stack.
+
+        The move is done in place and an undo record is pushed, so it can be reverted with `unmake_move`.
+        """
+        cells = self.cells
+        heights = self.heights
+        count = heights[source] - level + 1
+        source_start = source * STACK_CAPACITY + level - 1
+        destination_start = destination * STACK_CAPACITY + heights[destination]
+
+        for offset in range(count):
+            cells[destination_start + offset] = cells[source_start + offset]
+            cells[source_start + offset] = EMPTY
+
+        heights[source] -= count
+        heights[destination] += count
+        self.undo_stack.append((source, destination, count))
+
+    def unmake_move(
+            self
+        ) -> None:
+        """
+        Reverts the last move made with `make_move`.
+        """
+        source, destination, count = self.undo_stack.pop()
+        cells = self.cells
+        heights = self.heights
+        heights[destination] -= count
+        source_start = source * STACK_CAPACITY + heights[source]
+        destination_start = destination * STACK_CAPACITY + heights[destination]
+
+        for offset in range(count):
+            cells[source_start + offset] = cells[destination_start + offset]
+            cells[destination_start + offset] = EMPTY
+
+        heights[source] += count
+
+    def __getitem__(
+            self,
+            tile: Tuple[int, int]
+        ) -> int:
+        """
+        Returns the stack height on a tile, so the position can be passed to the functions in `utils.movement`.
+        """
+        return self.heights[self.tile_indices[tile]]
+
+    def get(
+            self,
+            tile: Tuple[int, int],
+            default: int = 0
+        ) -> int:
+        index = self.tile_indices.get(tile)
+        return default if index is None else self.heights[index]
@@ -0,0 +1,161 @@
+from typing import Dict, List, Tuple
+
+from .position import Position
+
+
+IDENTITY = 0
+ROTATION_180 = 1
+TRANSPOSE = 2
+ANTI_TRANSPOSE = 3
+
+# Board symmetries which keep the dark tiles dark on boards of even size. A left/right reflection
+# moves every dark tile onto a light one, since the row stays the same and the column parity changes.
+# Each of these transforms is its own inverse.
+TRANSFORMS = (IDENTITY, ROTATION_180, TRANSPOSE, ANTI_TRANSPOSE)
+
+_symmetry_tables: Dict[Tuple[int, Tuple[Tuple[int, int], ...]], 'SymmetryTables'] = {}
+
+
+def transform_tile(
+        tile: Tuple[int, int],
+        transform: int,
+        board_size: int
+    ) -> Tuple[int, int]:
+    """
+    Maps a tile onto its image under one of the board symmetries.
+    """
+    row, column = tile
+    last = board_size - 1
+    if transform == ROTATION_180:
+        return last - row, last - column
+    if transform == TRANSPOSE:
+        return column, row
+    if transform == ANTI_TRANSPOSE:
+        return last - column, last - row
+    return row, column
+
+
+def transform_move(
+        move: Tuple[Tuple[int, int], int, Tuple[int, int]],
+        transform: int,
+        board_size: int
+    ) -> Tuple[Tuple[int, int], int, Tuple[int, int]]:
+    """
+    Maps a (source tile, token level, destination tile) move onto its image under one of the board symmetries.
+
+    Every transform is its own inverse, so the same call maps a move stored for the canonical position
+    back to the original position.
+    """
+    source_tile, token_level, destination_tile = move
+    return transform_tile(source_tile, transform, board_size), token_level, transform_tile(destination_tile, transform, board_size)
+
+
+class SymmetryTables:
+    """
+    Precomputed tile index maps of all board symmetries for one tile order of a position.
+    """
+
+    def __init__(
+            self,
+            board_size: int,
+            tiles: List[Tuple[int, int]]
+        ) -> None:
+        tile_indices = {tile: index for index, tile in enumerate(tiles)}
+        # tile_maps[transform][index] is the index of the image of the tile with the given index
+        self.tile_maps: List[List[int]] = [
+            [tile_indices[transform_tile(tile, transform, board_size)] for tile in tiles]
+            for transform in TRANSFORMS
+        ]
+
+    def transform_move(
+            self,
+            move: Tuple[int, int, int],
+            transform: int
+        ) -> Tuple[int, int, int]:
+        """
+        Maps a (source index, token level, destination index) move onto its image under a board symmetry.
+        """
+        tile_map = self.tile_maps[transform]
+        return tile_map[move[0]], move[1], tile_map[move[2]]
+
+
+def get_symmetry_tables(
+        position: Position
+    ) -> SymmetryTables:
+    """
+    Returns the symmetry tables for the tile order of the position, computing them once per board layout.
+    """
+    key = (position.board_size, tuple(position.tiles))
+    tables = _symmetry_tables.get(key)
+    if tables is None:
+        tables = SymmetryTables(position.board_size, position.tiles)
+        _symmetry_tables[key] = tables
+    return tables
+
+
+def encode_transformed(
+        position: Position,
+        player_color: int,
+        transform: int,
+        color_swapped: bool
+    ) -> bytes:
+    """
+    Encodes the image of a position and the color to move under a board symmetry, optionally with colors swapped.
+
+    The first byte is the color to move and then every tile contributes its stack buffer, with empty cells
+    encoded as 1 and tokens as 0 or 2, so encodings of the same tile order can be compared directly.
+    """
+    tile_map = get_symmetry_tables(position).tile_maps[transform]
+    color_sign = -1 if color_swapped else 1
+    tiles_count = len(position.tiles)
+    stack_capacity = len(position.cells) // tiles_count
+    encoded = bytearray(1 + len(position.cells))
+    encoded[0] = color_sign * player_color + 1
+
+    for index in range(tiles_count):
+        source_base = index * stack_capacity
+        target_base = 1 + tile_map[index] * stack_capacity
+        for offset in range(stack_capacity):
+            encoded[target_base + offset] = color_sign * position.cells[source_base + offset] + 1
+
+    return bytes(encoded)
+
+
+def canonicalize(
+        position: Position,
+        player_color: int
+    ) -> Tuple[bytes, int, bool]:
+    """
+    Maps a position and the color to move onto the canonical representative of its symmetry class.
+
+    All board symmetries are tried with and without swapping the colors of the tokens together with the
+    color to move, and the smallest encoding is the canonical form. Scores of color swapped forms are
+    from the opposite point of view, so they have to be negated, and moves stored for the canonical form
+    are mapped back with the returned transform.
+
+    Returns:
+        The canonical encoding, the transform which maps the position onto it and whether the colors were swapped.
+    """
+    best = None
+    for color_swapped in (False, True):
+        for transform in TRANSFORMS:
+            encoded = encode_transformed(position, player_color, transform, color_swapped)
+            if best is None or encoded < best[0]:
+                best = (encoded, transform, color_swapped)
+    return best
+
+
+def apply_symmetry(
+        position: Position,
+        transform: int,
+        color_swapped: bool
+    ) -> Position:
+    """
+    Creates a new position which is the image of the given one under a board symmetry.
+    """
+    tile_map = get_symmetry_tables(position).tile_maps[transform]
+    color_sign = -1 if color_swapped else 1
+    transformed_position = Position(position.board_size, position.tiles)
+    for index in range(len(position.tiles)):
+        transformed_position.set_stack(tile_map[index], [color_sign * color for color in position.get_stack(index)])
+    return transformed_position
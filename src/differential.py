@@ -0,0 +1,678 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+import numpy as np
+
+from ai.ai import AI
+from ai.simulator import ACTIONS_PER_TILE, GameSimulator
+from board.board import Board
+from board.notation import decode_position, encode_position, get_dark_tiles
+from board.position import COLOR_CODES, STACK_CAPACITY, WHITE, Position
+from board.token import Token
+import utils.colors as colors
+from utils.events import NullSink
+
+
+# A move as (source tile, token level, destination tile), as listed by `Board.get_legal_moves`
+Move = Tuple[Tuple[int, int], int, Tuple[int, int]]
+
+# The state after a move as the color code of the player to move, the points of white and black and the
+# color codes of the stacks which changed with the move, from the bottom up
+Changes = Tuple[int, int, int, Dict[Tuple[int, int], List[int]]]
+
+# Operations of an engine which are timed, in the order of the speedup report
+TIMED_OPERATIONS = ('moves', 'results', 'evaluation')
+
+
+def create_board(
+        notation: str
+    ) -> Board:
+    """
+    Creates a board with the game state of a notation, which reports no events.
+    """
+    position, player_color, white_points, black_points = decode_position(notation)
+    board = Board(position.board_size, 1, colors.WHITE if player_color == WHITE else colors.BLACK, NullSink())
+    board.board = {
+        (row, column): [
+            Token(row, column, colors.WHITE if color == WHITE else colors.BLACK, level)
+            for level, color in enumerate(position.get_stack(index), 1)
+        ]
+        for index, (row, column) in enumerate(position.tiles)
+    }
+    board.white_points = white_points
+    board.black_points = black_points
+    board.initialize_move_tracking()
+    return board
+
+
+def copy_board(
+        board: Board,
+        source_tile: Tuple[int, int]
+    ) -> Board:
+    """
+    Copies the game state of a board together with its legal move tracking, which is not recomputed, to play a move from the source tile on it.
+
+    `Board.move_tokens` replaces the stacks of the board dictionary instead of changing them, and only
+    changes the moved tokens, so the copy shares all stacks and tokens except those of the source tile.
+    """
+    board_copy = Board(board.board_size, board.tile_size, board.current_player, board.events)
+    board_copy.board = dict(board.board)
+    board_copy.board[source_tile] = [Token(token.row, token.column, token.color, token.level) for token in board.board[source_tile]]
+    board_copy.white_points = board.white_points
+    board_copy.black_points = board.black_points
+    board_copy.tile_legal_moves = dict(board.tile_legal_moves)
+    board_copy.legal_moves_count = dict(board.legal_moves_count)
+    board_copy.full_stack_tiles = set(board.full_stack_tiles)
+    return board_copy
+
+
+def encode_stacks(
+        board_size: int,
+        stacks: Dict[Tuple[int, int], List[int]],
+        player_color: int,
+        white_points: int,
+        black_points: int
+    ) -> str:
+    """
+    Encodes a game state given by the color codes of the stacks on some of the tiles, the other tiles are empty.
+    """
+    position = Position(board_size, get_dark_tiles(board_size))
+    for tile, stack in stacks.items():
+        position.set_stack(position.tile_indices[tile], stack)
+    return encode_position(position, player_color, white_points, black_points)
+
+
+def apply_changes(
+        notation: str,
+        changes: Changes
+    ) -> str:
+    """
+    Encodes the game state after a move, given the state before the move and the changes of the move.
+    """
+    position, _, _, _ = decode_position(notation)
+    player_color, white_points, black_points, changed_stacks = changes
+    for tile, stack in changed_stacks.items():
+        position.set_stack(position.tile_indices[tile], stack)
+    return encode_position(position, player_color, white_points, black_points)
+
+
+class RulesEngine:
+    """
+    An implementation of the rules of the game which is checked by the differential harness.
+
+    Game states are exchanged in the notation of `board.notation`. An engine loads a batch of notations
+    of the same board size into its own representation with `load`, and then works on whole batches, so
+    that vectorized engines are timed at the batch sizes they are built for:
+
+    - `get_legal_moves` lists the set of legal moves of the player to move of every state.
+    - `play_moves` plays each of the given moves on its state and finishes the turn as `Board.move_stack`
+      does: a full stack is removed and scored, and the turn passes to the other player unless the game
+      is won or that player has no legal move.
+    - `evaluate` scores every state as `AI.heuristic` does.
+
+    Only these three operations are timed. Loading the states and converting the results of
+    `play_moves` into `Changes` with `get_result_changes`, None for a move the engine can not play, is
+    the cost of comparing engines and not part of the speedup. A move only changes a few stacks, so
+    comparing the changes instead of whole states keeps the comparison cheap on large boards.
+
+    Faster engines are added to `ENGINES`.
+    """
+
+    def load(
+            self,
+            notations: List[str]
+        ):
+        raise NotImplementedError
+
+    def get_legal_moves(
+            self,
+            states
+        ) -> List[Set[Move]]:
+        raise NotImplementedError
+
+    def play_moves(
+            self,
+            states,
+            moves: List[List[Move]]
+        ):
+        raise NotImplementedError
+
+    def get_result_changes(
+            self,
+            states,
+            results
+        ) -> List[List[Union[Changes, None]]]:
+        raise NotImplementedError
+
+    def evaluate(
+            self,
+            states
+        ) -> List[int]:
+        raise NotImplementedError
+
+
+class ReferenceRules(RulesEngine):
+    """
+    The rules as the game plays them today, which every other engine has to agree with.
+
+    The legal moves are generated by `AI.ai_get_next_positions` and the moves are played by selecting
+    the tokens on a copy of the board of the state and calling `Board.move_stack`, which validates them
+    again and decides whether the turn is skipped with `Board.current_player_has_valid_move`. A generated
+    move which `Board.move_stack` rejects has no result, and `has_valid_moves` reports the counted legal
+    moves of the boards, so the harness also checks that the three agree with each other.
+    """
+
+    def __init__(
+            self
+        ) -> None:
+        self.ai = AI(1)
+
+    def load(
+            self,
+            notations: List[str]
+        ) -> List[Tuple[Board, Position, int]]:
+        states = []
+        for notation in notations:
+            position, player_color, _, _ = decode_position(notation)
+            states.append((create_board(notation), position, player_color))
+        return states
+
+    def get_legal_moves(
+            self,
+            states: List[Tuple[Board, Position, int]]
+        ) -> List[Set[Move]]:
+        return [
+            {
+                (position.tiles[source], token_level, position.tiles[destination])
+                for _, (source, token_level, destination) in self.ai.ai_get_next_positions(position, player_color, False)
+            }
+            for _, position, player_color in states
+        ]
+
+    def play_moves(
+            self,
+            states: List[Tuple[Board, Position, int]],
+            moves: List[List[Move]]
+        ) -> List[List[Union[Board, None]]]:
+        results = []
+        for (board, _, _), state_moves in zip(states, moves):
+            state_results = []
+            for source_tile, token_level, destination_tile in state_moves:
+                board_copy = copy_board(board, source_tile)
+                board_copy.change_clicked_stack_status(*source_tile, token_level)
+                # A token of the other player is not selected, and a rejected move keeps its tokens selected
+                if not board_copy.selected_tokens:
+                    state_results.append(None)
+                    continue
+                board_copy.move_stack(*destination_tile)
+                state_results.append(None if board_copy.selected_tokens else board_copy)
+            results.append(state_results)
+        return results
+
+    def get_result_changes(
+            self,
+            states: List[Tuple[Board, Position, int]],
+            results: List[List[Union[Board, None]]]
+        ) -> List[List[Union[Changes, None]]]:
+        changes = []
+        for (board, _, _), state_results in zip(states, results):
+            state_changes = []
+            for result_board in state_results:
+                if result_board is None:
+                    state_changes.append(None)
+                    continue
+                # Stacks which were not replaced by the move are still shared with the board before it
+                changed_stacks = {}
+                for tile, stack in result_board.board.items():
+                    if stack is not board.board[tile]:
+                        color_codes = [COLOR_CODES[token.color] for token in stack]
+                        if color_codes != [COLOR_CODES[token.color] for token in board.board[tile]]:
+                            changed_stacks[tile] = color_codes
+                state_changes.append((COLOR_CODES[result_board.current_player], result_board.white_points, result_board.black_points, changed_stacks))
+            changes.append(state_changes)
+        return changes
+
+    def evaluate(
+            self,
+            states: List[Tuple[Board, Position, int]]
+        ) -> List[int]:
+        return [self.ai.heuristic(position) for _, position, _ in states]
+
+    def has_valid_moves(
+            self,
+            states: List[Tuple[Board, Position, int]]
+        ) -> List[bool]:
+        return [board.current_player_has_valid_move() for board, _, _ in states]
+
+
+class SimulatorRules(RulesEngine):
+    """
+    The vectorized rules of `ai.simulator.GameSimulator`, with the evaluation of `ai.batch_eval.BatchEvaluator`.
+    """
+
+    def __init__(
+            self
+        ) -> None:
+        self.simulators = {}
+
+    def get_simulator(
+            self,
+            board_size: int
+        ):
+        if board_size not in self.simulators:
+            self.simulators[board_size] = GameSimulator(board_size, 1)
+        return self.simulators[board_size]
+
+    def load(
+            self,
+            notations: List[str]
+        ) -> Tuple:
+        decoded_states = [decode_position(notation) for notation in notations]
+        board_size = decoded_states[0][0].board_size
+        tiles_count = len(decoded_states[0][0].tiles)
+        cells = np.array([position.cells for position, _, _, _ in decoded_states], dtype=np.int8).reshape(len(notations), tiles_count, STACK_CAPACITY)
+        heights = np.array([position.heights for position, _, _, _ in decoded_states], dtype=np.int8)
+        current_player = np.array([player_color for _, player_color, _, _ in decoded_states], dtype=np.int8)
+        white_points = np.array([white_points for _, _, white_points, _ in decoded_states], dtype=np.int16)
+        black_points = np.array([black_points for _, _, _, black_points in decoded_states], dtype=np.int16)
+        return board_size, cells, heights, current_player, white_points, black_points
+
+    def get_legal_moves(
+            self,
+            states: Tuple
+        ) -> List[Set[Move]]:
+        board_size, cells, heights, current_player, _, _ = states
+        simulator = self.get_simulator(board_size)
+        legal_moves = simulator.get_legal_moves(cells, heights, current_player)
+        games, sources, directions, levels = np.nonzero(legal_moves)
+        destinations = simulator.tables.neighbours[sources, directions]
+        move_sets = [set() for _ in range(len(cells))]
+        for game, source, token_level, destination in zip(games.tolist(), sources.tolist(), (levels + 1).tolist(), destinations.tolist()):
+            move_sets[game].add((simulator.tiles[source], token_level, simulator.tiles[destination]))
+        return move_sets
+
+    def play_moves(
+            self,
+            states: Tuple,
+            moves: List[List[Move]]
+        ) -> Tuple:
+        board_size, cells, heights, current_player, white_points, black_points = states
+        simulator = self.get_simulator(board_size)
+        tile_indices = {tile: index for index, tile in enumerate(simulator.tiles)}
+
+        # Actions of the moves which are one step in a diagonal direction, the others can not be played
+        rows = []
+        actions = []
+        for row, state_moves in enumerate(moves):
+            for source_tile, token_level, destination_tile in state_moves:
+                source = tile_indices.get(source_tile)
+                destination = tile_indices.get(destination_tile)
+                neighbours = simulator.tables.neighbours[source].tolist() if source is not None else []
+                if destination not in neighbours or not 1 <= token_level <= STACK_CAPACITY:
+                    actions.append(None)
+                    continue
+                rows.append(row)
+                actions.append(source * ACTIONS_PER_TILE + neighbours.index(destination) * STACK_CAPACITY + token_level - 1)
+
+        played_actions = np.array([action for action in actions if action is not None], dtype=np.intp)
+        rows = np.array(rows, dtype=np.intp)
+        if len(played_actions):
+            simulator.set_games(cells[rows], heights[rows], current_player[rows], white_points[rows], black_points[rows])
+            simulator.play_actions(np.arange(len(played_actions)), played_actions)
+        # The arrays of the games are replaced, not changed, when the simulator plays the next moves
+        return moves, actions, rows, (simulator.cells, simulator.heights, simulator.current_player, simulator.white_points, simulator.black_points)
+
+    def get_result_changes(
+            self,
+            states: Tuple,
+            results: Tuple
+        ) -> List[List[Union[Changes, None]]]:
+        board_size, cells, heights, _, _, _ = states
+        moves, actions, rows, (result_cells, result_heights, current_player, white_points, black_points) = results
+        tiles = self.get_simulator(board_size).tiles
+        played_changes = [
+            (int(current_player[game]), int(white_points[game]), int(black_points[game]), {})
+            for game in range(len(rows))
+        ]
+        if len(rows):
+            is_changed = (result_cells != cells[rows]).any(axis=2) | (result_heights != heights[rows])
+            for game, tile in zip(*np.nonzero(is_changed)):
+                played_changes[game][3][tiles[tile]] = result_cells[game, tile, :result_heights[game, tile]].tolist()
+
+        played_changes.reverse()
+        changes = []
+        action_index = 0
+        for state_moves in moves:
+            state_changes = []
+            for _ in state_moves:
+                state_changes.append(None if actions[action_index] is None else played_changes.pop())
+                action_index += 1
+            changes.append(state_changes)
+        return changes
+
+    def evaluate(
+            self,
+            states: Tuple
+        ) -> List[int]:
+        board_size, cells, _, _, _, _ = states
+        simulator = self.get_simulator(board_size)
+        return simulator.evaluator.evaluate(cells, simulator.tables).tolist()
+
+
+ENGINES: Dict[str, type] = {
+    'simulator': SimulatorRules,
+}
+
+
+def check_batch(
+        reference: ReferenceRules,
+        engines: Dict[str, RulesEngine],
+        notations: List[str],
+        timings: Union[Dict[str, Dict[str, float]], None] = None
+    ) -> Tuple[List[Dict], List[List[Move]], List[List[Union[Changes, None]]]]:
+    """
+    Compares the legal moves, the results of all legal moves and the evaluation of a batch of game states between the reference and the engines.
+
+    The moves of the reference are played by every engine, so a missing or extra move is reported once
+    as a move set failure. Failures of the reference itself, such as a generated move which
+    `Board.move_stack` rejects, are reported for the engine 'reference'. An engine which raises an error
+    fails on every state of the batch. With timings, the time of every operation is added per engine.
+
+    Returns:
+        The failures as dictionaries with the engine, kind, notation and details, and the legal moves and
+        results of the reference, with the moves of every state in sorted order.
+    """
+    operation_results = {}
+    for name, engine in [('reference', reference), *engines.items()]:
+        try:
+            states = engine.load(notations)
+            start_time = time.perf_counter()
+            legal_moves = engine.get_legal_moves(states)
+            moves_time = time.perf_counter()
+            if name == 'reference':
+                reference_moves = [sorted(state_moves) for state_moves in legal_moves]
+            results = engine.play_moves(states, reference_moves)
+            results_time = time.perf_counter()
+            values = engine.evaluate(states)
+            end_time = time.perf_counter()
+            results = engine.get_result_changes(states, results)
+        except Exception as error:
+            if name == 'reference':
+                raise
+            operation_results[name] = error
+            continue
+        operation_results[name] = (legal_moves, results, values)
+        if timings is not None:
+            engine_timings = timings.setdefault(name, dict.fromkeys(TIMED_OPERATIONS, 0.0))
+            engine_timings['moves'] += moves_time - start_time
+            engine_timings['results'] += results_time - moves_time
+            engine_timings['evaluation'] += end_time - results_time
+        if name == 'reference':
+            has_valid_moves = reference.has_valid_moves(states)
+
+    failures = []
+    reference_moves_sets, reference_results, reference_values = operation_results['reference']
+    for index, notation in enumerate(notations):
+        if has_valid_moves[index] != bool(reference_moves_sets[index]):
+            failures.append(dict(
+                engine='reference', kind='has move', notation=notation,
+                details=f'current_player_has_valid_move is {has_valid_moves[index]}, but {len(reference_moves_sets[index])} moves were generated'
+            ))
+        for move, result in zip(reference_moves[index], reference_results[index]):
+            if result is None:
+                failures.append(dict(engine='reference', kind='rejected move', notation=notation, details=f'Board.move_stack rejects {move}'))
+                break
+
+    for name in engines:
+        engine_results = operation_results[name]
+        if isinstance(engine_results, Exception):
+            failures.extend(
+                dict(engine=name, kind='error', notation=notation, details=repr(engine_results))
+                for notation in notations
+            )
+            continue
+        legal_moves, results, values = engine_results
+        for index, notation in enumerate(notations):
+            if legal_moves[index] != reference_moves_sets[index]:
+                missing_moves = sorted(reference_moves_sets[index] - legal_moves[index])
+                extra_moves = sorted(legal_moves[index] - reference_moves_sets[index])
+                failures.append(dict(engine=name, kind='moves', notation=notation, details=f'missing {missing_moves}, extra {extra_moves}'))
+            for move, reference_result, result in zip(reference_moves[index], reference_results[index], results[index]):
+                if reference_result is not None and result != reference_result:
+                    result_notation = result and apply_changes(notation, result)
+                    expected_notation = apply_changes(notation, reference_result)
+                    details = f'{move} gives {result_notation}, expected {expected_notation}'
+                    failures.append(dict(engine=name, kind='result', notation=notation, details=details, expected_notation=expected_notation))
+                    break
+            if values[index] != reference_values[index]:
+                failures.append(dict(engine=name, kind='evaluation', notation=notation, details=f'{values[index]}, expected {reference_values[index]}'))
+
+    return failures, reference_moves, reference_results
+
+
+def get_smaller_notations(
+        notation: str
+    ) -> Iterator[str]:
+    """
+    Generates game states which are a step simpler than the given one, for shrinking a failing state.
+
+    The steps are, from the largest to the smallest: a board two rows and columns smaller, if the cut
+    tiles are empty, no points for a player, an empty tile instead of a stack, and a stack without one of its tokens.
+    """
+    position, player_color, white_points, black_points = decode_position(notation)
+    board_size = position.board_size
+    stacks = {tile: position.get_stack(index) for index, tile in enumerate(position.tiles)}
+
+    # Cutting two rows and columns from the same side keeps the dark tiles dark
+    if board_size > 4:
+        for offset in (0, 2):
+            kept_range = range(offset, board_size - 2 + offset)
+            if all(row in kept_range and column in kept_range for (row, column), stack in stacks.items() if stack):
+                cut_stacks = {(row - offset, column - offset): stack for (row, column), stack in stacks.items() if stack}
+                yield encode_stacks(board_size - 2, cut_stacks, player_color, white_points, black_points)
+
+    if white_points:
+        yield encode_stacks(board_size, stacks, player_color, 0, black_points)
+    if black_points:
+        yield encode_stacks(board_size, stacks, player_color, white_points, 0)
+
+    for tile, stack in stacks.items():
+        if stack:
+            yield encode_stacks(board_size, {**stacks, tile: []}, player_color, white_points, black_points)
+
+    for tile, stack in stacks.items():
+        if len(stack) > 1:
+            for level in range(len(stack)):
+                yield encode_stacks(board_size, {**stacks, tile: stack[:level] + stack[level + 1:]}, player_color, white_points, black_points)
+
+
+def shrink_failure(
+        reference: ReferenceRules,
+        engines: Dict[str, RulesEngine],
+        failure: Dict
+    ) -> Dict:
+    """
+    Shrinks a failure to a minimal game state on which the same engine still fails in the same way.
+
+    The first simpler state of `get_smaller_notations` which still fails replaces the failing state,
+    until none of the simpler states fails. Simpler states are often not reachable in a game, so states
+    on which the reference raises an error are skipped, and so are states on which the reference fails
+    itself while an engine failure is shrunk, as the engine can not be expected to agree with it there.
+    The same goes for the expected state after the move of a result failure.
+    """
+    checked_engines = {} if failure['engine'] == 'reference' else {failure['engine']: engines[failure['engine']]}
+    is_shrunk = True
+    while is_shrunk:
+        is_shrunk = False
+        for smaller_notation in get_smaller_notations(failure['notation']):
+            try:
+                smaller_failures, _, _ = check_batch(reference, checked_engines, [smaller_notation])
+            except Exception:
+                continue
+            if failure['engine'] != 'reference' and any(smaller_failure['engine'] == 'reference' for smaller_failure in smaller_failures):
+                continue
+            smaller_failure = next((
+                smaller_failure for smaller_failure in smaller_failures
+                if (smaller_failure['engine'], smaller_failure['kind']) == (failure['engine'], failure['kind'])
+            ), None)
+            if smaller_failure is not None and 'expected_notation' in smaller_failure:
+                expected_failures, _, _ = check_batch(reference, {}, [smaller_failure['expected_notation']])
+                if expected_failures:
+                    continue
+            if smaller_failure is not None:
+                failure = smaller_failure
+                is_shrunk = True
+                break
+    return failure
+
+
+def check_random_games(
+        board_size: int,
+        positions_count: int,
+        batch_size: int,
+        seed: int,
+        engine_names: List[str],
+        max_failures: int,
+        max_moves: int = 300
+    ) -> Tuple[List[Tuple[Dict, Dict]], Dict[str, Dict[str, float]], int]:
+    """
+    Checks the engines against the reference on the positions of random games, played in batches of parallel games.
+
+    Every game starts from the initial position and plays random legal moves of the reference, and a
+    finished game, or one longer than `max_moves` moves, starts over. Once a kind of failure of an
+    engine is found, it is shrunk and not reported again, and the check stops after `max_failures` failures.
+
+    Returns:
+        The original and the shrunk version of every failure, the timings of the operations per engine
+        and the number of checked positions.
+    """
+    rng = random.Random(seed)
+    reference = ReferenceRules()
+    engines = {name: ENGINES[name]() for name in engine_names}
+    timings = {}
+    failures = []
+    found_failures = set()
+
+    start_board = Board(board_size, 1, colors.WHITE, NullSink())
+    start_board.initialize_board()
+    start_notation = start_board.get_notation()
+    winning_points = start_board.max_points // 2 + 1
+    # The current position and number of moves of every game
+    games = [[start_notation, 0] for _ in range(batch_size)]
+    checked_count = 0
+
+    while checked_count < positions_count and len(failures) < max_failures:
+        notations = [notation for notation, _ in games]
+        batch_failures, legal_moves, results = check_batch(reference, engines, notations, timings)
+        checked_count += len(notations)
+
+        for failure in batch_failures:
+            failure_key = (failure['engine'], failure['kind'])
+            if failure_key not in found_failures and len(failures) < max_failures:
+                found_failures.add(failure_key)
+                failures.append((failure, shrink_failure(reference, engines, failure)))
+
+        for game, state_moves, state_results in zip(games, legal_moves, results):
+            result = state_results[rng.randrange(len(state_moves))] if state_moves else None
+            if result is None or game[1] >= max_moves or winning_points in result[1:3]:
+                game[:] = [start_notation, 0]
+            else:
+                game[:] = [apply_changes(game[0], result), game[1] + 1]
+
+    return failures, timings, checked_count
+
+
+def run_harness(
+        board_sizes: List[int],
+        positions_count: int,
+        batch_size: int,
+        seed: int,
+        engine_names: List[str],
+        max_failures: int,
+        workers: int
+    ) -> Tuple[List[Tuple[Dict, Dict]], Dict[str, Dict[str, float]], int]:
+    """
+    Splits the positions evenly between the board sizes and the worker processes, every task playing its random games with its own seed.
+
+    The failures of the tasks are merged with only the first failure of every kind of an engine kept,
+    and the timings are added up.
+    """
+    tasks_positions_count = max(positions_count // (len(board_sizes) * workers), 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(check_random_games, board_size, tasks_positions_count, batch_size, seed + task, engine_names, max_failures)
+            for board_size in board_sizes
+            for task in range(workers)
+        ]
+        failures = []
+        found_failures = set()
+        timings = {}
+        checked_count = 0
+        for future in futures:
+            task_failures, task_timings, task_checked_count = future.result()
+            for failure, shrunk_failure in task_failures:
+                failure_key = (failure['engine'], failure['kind'])
+                if failure_key not in found_failures and len(failures) < max_failures:
+                    found_failures.add(failure_key)
+                    failures.append((failure, shrunk_failure))
+            for name, task_engine_timings in task_timings.items():
+                engine_timings = timings.setdefault(name, dict.fromkeys(TIMED_OPERATIONS, 0.0))
+                for operation, operation_time in task_engine_timings.items():
+                    engine_timings[operation] += operation_time
+            checked_count += task_checked_count
+    return failures, timings, checked_count
+
+
+def print_report(
+        failures: List[Tuple[Dict, Dict]],
+        timings: Dict[str, Dict[str, float]],
+        checked_count: int,
+        elapsed_time: float
+    ) -> None:
+    """
+    Prints the shrunk failures and the time of every operation of the engines, with their speedup over the reference.
+
+    The times are summed over the worker processes.
+    """
+    print(f'{checked_count} positions checked in {elapsed_time:.1f}s, {checked_count / elapsed_time:.0f} positions/s, {len(failures)} failures')
+    for failure, shrunk_failure in failures:
+        print(f'\n{shrunk_failure["engine"]}: {shrunk_failure["kind"]}')
+        print(f'  found on  {failure["notation"]}')
+        print(f'  shrunk to {shrunk_failure["notation"]}')
+        print(f'  {shrunk_failure["details"]}')
+
+    print(f'\n{"engine":<12}{"operation":<12}{"time [s]":>10}{"speedup":>10}')
+    reference_timings = timings.get('reference', {})
+    for name, engine_timings in timings.items():
+        for operation in (*TIMED_OPERATIONS, 'total'):
+            operation_time = sum(engine_timings.values()) if operation == 'total' else engine_timings[operation]
+            reference_time = sum(reference_timings.values()) if operation == 'total' else reference_timings[operation]
+            speedup = reference_time / operation_time if operation_time else float('inf')
+            print(f'{name:<12}{operation:<12}{operation_time:>10.2f}{speedup:>10.1f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check faster implementations of the rules against the reference rules on random positions.')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES), help='engines to check')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 10], help='board sizes to play random games on')
+    parser.add_argument('--positions', type=int, default=10000, help='number of positions to check, split between the board sizes')
+    parser.add_argument('--batch-size', type=int, default=256, help='number of random games played in parallel, checked as one batch')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random games')
+    parser.add_argument('--max-failures', type=int, default=3, help='stop after this many different failures')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    failures, timings, checked_count = run_harness(args.sizes, args.positions, args.batch_size, args.seed, args.engines, args.max_failures, args.workers)
+    print_report(failures, timings, checked_count, time.perf_counter() - start_time)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import collections
+import csv
+import sys
+import time
+from typing import Callable, Dict, List, TextIO, Tuple, Union
+
+import pygame
+
+from board.board import Board
+from utils import colors
+from .gui import GUI
+
+
+# Timed sections of a frame as (section, owner, function name)
+FRAME_SECTIONS: List[Tuple[str, object, str]] = [
+    ('draw_board', GUI, 'draw_board'),
+    ('tile_color', Board, 'determine_tile_color'),
+    ('display_update', pygame.display, 'update'),
+]
+LOG_COLUMNS = ['frame', 'frame_ms', 'draw_board_ms', 'tile_color_ms', 'tile_color_calls', 'display_update_ms', 'click_latency_ms']
+
+
+def get_percentile(
+        sorted_values: List[float],
+        percentile: float
+    ) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * percentile / 100), len(sorted_values) - 1)]
+
+
+class FrameStats:
+    """
+    Measures the frame times of the game loop and the latency from a click to the frame which shows its result.
+
+    A frame is one call of `process_events`, from reading the events to `pygame.display.update`. The
+    drawing of the board, the tile colors and the display update are timed by wrappers which are only
+    installed while the stats are enabled, so the game runs unchanged otherwise. The click latency runs
+    from handling a mouse click, including the move and a possible AI move, to the end of the display
+    update. The game loop has no frame limit, so a click waits at most one frame in the event queue
+    before that, which the latency does not include.
+
+    The percentiles of the last `window` frames can be drawn as an overlay in the corner of the screen,
+    and every frame can be written to a CSV log.
+    """
+
+    def __init__(
+            self,
+            show_overlay: bool = True,
+            log_path: Union[str, None] = None,
+            window: int = 300
+        ) -> None:
+        self.show_overlay = show_overlay
+        self.log_path = log_path
+        self.frame_times = collections.deque(maxlen=window)
+        self.click_latencies = collections.deque(maxlen=window)
+        self.section_totals: Dict[str, List] = {section: [0, 0.0] for section, _, _ in FRAME_SECTIONS}
+        # Calls and time of every section in the current frame
+        self.frame_sections: Dict[str, List] = {section: [0, 0.0] for section, _, _ in FRAME_SECTIONS}
+        self.originals: List[Tuple[object, str, Callable]] = []
+        self.frames_count = 0
+        self.frame_start_time = None
+        self.click_time = None
+        self.font = None
+        self.log_file = None
+        self.log_writer = None
+
+    def __enter__(
+            self
+        ) -> 'FrameStats':
+        self.enable()
+        return self
+
+    def __exit__(
+            self,
+            *exception_info
+        ) -> None:
+        self.disable()
+
+    def enable(
+            self
+        ) -> None:
+        for section, owner, function_name in FRAME_SECTIONS:
+            function = getattr(owner, function_name)
+            self.originals.append((owner, function_name, function))
+            setattr(owner, function_name, self.wrap(function, self.frame_sections[section]))
+        if self.log_path:
+            self.log_file = open(self.log_path, 'w', newline='')
+            self.log_writer = csv.writer(self.log_file)
+            self.log_writer.writerow(LOG_COLUMNS)
+
+    def disable(
+            self
+        ) -> None:
+        for owner, function_name, function in reversed(self.originals):
+            setattr(owner, function_name, function)
+        self.originals = []
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def wrap(
+            self,
+            function: Callable,
+            stats: List
+        ) -> Callable:
+        perf_counter = time.perf_counter
+
+        def timed_function(*args, **kwargs):
+            start_time = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats[0] += 1
+                stats[1] += perf_counter() - start_time
+
+        return timed_function
+
+    def start_frame(
+            self
+        ) -> None:
+        self.frame_start_time = time.perf_counter()
+        for stats in self.frame_sections.values():
+            stats[0] = 0
+            stats[1] = 0.0
+
+    def record_click(
+            self
+        ) -> None:
+        if self.click_time is None:
+            self.click_time = time.perf_counter()
+
+    def end_frame(
+            self
+        ) -> None:
+        """
+        Records the frame which was just shown, called right after `pygame.display.update`.
+        """
+        end_time = time.perf_counter()
+        frame_time = end_time - self.frame_start_time
+        self.frame_times.append(frame_time)
+        self.frames_count += 1
+        for section, (calls, section_time) in self.frame_sections.items():
+            self.section_totals[section][0] += calls
+            self.section_totals[section][1] += section_time
+
+        click_latency = None
+        if self.click_time is not None:
+            click_latency = end_time - self.click_time
+            self.click_latencies.append(click_latency)
+            self.click_time = None
+
+        if self.log_writer is not None:
+            self.log_writer.writerow([
+                self.frames_count,
+                f'{frame_time * 1000:.3f}',
+                f'{self.frame_sections["draw_board"][1] * 1000:.3f}',
+                f'{self.frame_sections["tile_color"][1] * 1000:.3f}',
+                self.frame_sections['tile_color'][0],
+                f'{self.frame_sections["display_update"][1] * 1000:.3f}',
+                '' if click_latency is None else f'{click_latency * 1000:.3f}',
+            ])
+
+    def get_summary_lines(
+            self
+        ) -> List[str]:
+        frame_times = sorted(self.frame_times)
+        click_latencies = sorted(self.click_latencies)
+        frames_count = max(self.frames_count, 1)
+        lines = [
+            f'frame p50 {get_percentile(frame_times, 50) * 1000:.1f} p95 {get_percentile(frame_times, 95) * 1000:.1f} '
+            f'p99 {get_percentile(frame_times, 99) * 1000:.1f} ms',
+        ]
+        for section, (calls, section_time) in self.section_totals.items():
+            lines.append(f'{section} {section_time / frames_count * 1000:.2f} ms/frame, {calls / frames_count:.0f} calls/frame')
+        if click_latencies:
+            lines.append(
+                f'click p50 {get_percentile(click_latencies, 50) * 1000:.1f} p95 {get_percentile(click_latencies, 95) * 1000:.1f} '
+                f'max {click_latencies[-1] * 1000:.1f} ms'
+            )
+        return lines
+
+    def draw_overlay(
+            self,
+            screen: pygame.Surface
+        ) -> None:
+        """
+        Draws the frame statistics in the top left corner, called after the board is drawn and before the display update.
+        """
+        if not self.show_overlay:
+            return
+        if self.font is None:
+            self.font = pygame.font.SysFont(None, 20)
+        y = 4
+        for line in self.get_summary_lines():
+            text = self.font.render(line, True, colors.GREEN, colors.BLACK)
+            screen.blit(text, (4, y))
+            y += text.get_height()
+
+    def report(
+            self,
+            output_file: TextIO = sys.stdout
+        ) -> None:
+        """
+        Prints the statistics of the last frames, with the averages of the sections over all frames.
+        """
+        print(f'{self.frames_count} frames', file=output_file)
+        for line in self.get_summary_lines():
+            print(line, file=output_file)
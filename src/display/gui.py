@@ -1,18 +1,22 @@
 import pygame
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 from utils import colors
+from utils.movement import get_clicked_tile_position
 from board.board import Board
 from board.token import Token
+from .token_view import TokenView
 
 
 class GUI:
 
     def __init__(
             self, 
-            screen: pygame.Surface
+            screen: pygame.Surface,
+            tile_size: int
         ) -> None:
         self.screen = screen
+        self.token_view = TokenView(tile_size)
 
     def draw_board(
             self, 
@@ -35,42 +39,39 @@ class GUI:
 
                 if (row, column) in board.board:
                     stack = board.board[(row, column)]
-                    self.draw_stack(stack, board.tile_size)
+                    self.draw_stack(stack, board)
 
     def draw_stack(
             self, 
             stack: List[Token], 
-            tile_size: int
+            board: Board
         ) -> None:
         """
         Draws a stack of tokens on a tile.
 
         This function iterates through each token in the provided stack and calls the `draw_token` 
         method to render each token on the screen. The tokens are drawn based on their position in 
-        the stack and the size of the tile they are on.
+        the stack and whether they are part of the board's current selection.
         """
         for token in stack:
-            self.draw_token(token, tile_size)
+            self.draw_token(token, board.is_token_selected(token))
 
     def draw_token(
             self, 
             token: Token, 
-            tile_size: int
+            is_selected: bool
         ) -> None:
         """
         Draws an individual token on the board.
 
-        This function calculates the position and size of the token based on its attributes and the tile size.
-        It then draws the token on the board using Pygame, including a border around the token which 
-        varies in thickness based on whether the token is currently selected.
+        This function takes the position and size of the token from the token view, which holds the pixel 
+        geometry derived from the tile size. It then draws the token on the board using Pygame, including 
+        a border around the token which varies in thickness based on whether the token is currently selected.
         """
-        tile_padding = (tile_size - token.width) / 2
         token_color = token.color
-        token_size = (token.width, token.height)
-        token_thickness = 3 if token.selected else token.border_thickness
-        token_position_x = token.column*tile_size + tile_padding
-        token_position_y = (token.row+1)*tile_size - token.height*(token.level)
-        token_position = (token_position_x, token_position_y)
+        token_size = (self.token_view.width, self.token_view.height)
+        token_thickness = self.token_view.get_border_thickness(is_selected)
+        token_position = self.token_view.get_token_position(token)
 
         border_rect = [
             token_position[0] - token_thickness,
@@ -78,14 +79,15 @@ class GUI:
             token_size[0] + token_thickness * 2,
             token_size[1] + token_thickness * 2
         ]
-        border_color = self.get_border_color(token)
+        border_color = self.get_border_color(token, is_selected)
 
         pygame.draw.rect(self.screen, border_color, border_rect)    
         pygame.draw.rect(self.screen, token_color, (token_position, token_size))
 
     def get_border_color(
             self, 
-            token: Token
+            token: Token,
+            is_selected: bool
         ) -> Tuple[int, int, int]:
         """
         Determines the border color for a given token.
@@ -94,25 +96,53 @@ class GUI:
         returns green. If the token is white, it returns black; otherwise, it returns white. This 
         helps visually differentiate tokens based on their state and color.
         """
-        if token.selected:
+        if is_selected:
             return colors.GREEN
         elif token.color == colors.WHITE:
             return colors.BLACK
         else:
             return colors.WHITE
 
+    def get_clicked_token(
+            self,
+            board: Board,
+            x: int,
+            y: int
+        ) -> Union[Tuple[int, int, int], None]:
+        """
+        Resolves a click on the screen to the token that was clicked.
+
+        This function finds the tile under the clicked position and asks the token view which token of 
+        the stack on that tile contains the position.
+
+        Returns:
+            A (row, column, level) tuple of the clicked token, or None if no token was clicked.
+        """
+        row, column = get_clicked_tile_position(x, y, board.tile_size)
+        stack = board.board.get((row, column))
+        if not stack:
+            return None
+        level = self.token_view.get_clicked_token_level(stack, x, y)
+        if level is None:
+            return None
+        return row, column, level
+
     def update_caption(
             self, 
-            current_player_color: Tuple[int, int, int]
+            current_player_color: Tuple[int, int, int],
+            clock_caption: Union[str, None] = None
         ) -> None:
         """
         Updates the window caption to indicate the current player's turn.
 
         This function sets the caption of the Pygame window to reflect whose turn it is based on the 
         color of the current player. The caption will display 'Byte - WHITE TURN' or 'Byte - BLACK TURN' 
-        accordingly.
+        accordingly, followed by the remaining times of the players in a timed game.
         """
         if current_player_color == colors.WHITE:
-            pygame.display.set_caption('Byte - WHITE TURN')
+            caption = 'Byte - WHITE TURN'
         else:
-            pygame.display.set_caption('Byte - BLACK TURN')
\ No newline at end of file
+            caption = 'Byte - BLACK TURN'
+        if clock_caption:
+            caption = f'{caption} - {clock_caption}'
+        pygame.display.set_caption(caption)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from typing import List, Tuple, Union
+
+from board.token import Token
+
+
+class TokenView:
+
+    def __init__(
+            self,
+            tile_size: int
+        ) -> None:
+        self.tile_size = tile_size
+        self.width = int(tile_size * 0.8)
+        self.height = tile_size // 8
+        self.border_thickness = 1
+        self.selected_border_thickness = 3
+
+    def get_token_position(
+            self,
+            token: Token
+        ) -> Tuple[float, int]:
+        """
+        Calculates the screen position of the top left corner of a token.
+
+        Tokens are horizontally centered on their tile and stacked upwards from the bottom edge of the
+        tile, so the vertical position depends on the level of the token in its stack.
+        """
+        tile_padding = (self.tile_size - self.width) / 2
+        token_x = token.column * self.tile_size + tile_padding
+        token_y = (token.row + 1) * self.tile_size - self.height * token.level
+        return token_x, token_y
+
+    def get_border_thickness(
+            self,
+            is_selected: bool
+        ) -> int:
+        """
+        Returns the border thickness of a token, which is larger for selected tokens.
+        """
+        return self.selected_border_thickness if is_selected else self.border_thickness
+
+    def get_clicked_token_level(
+            self,
+            stack: List[Token],
+            x: int,
+            y: int
+        ) -> Union[int, None]:
+        """
+        Finds the level of the token in the stack that contains the clicked screen position.
+
+        Returns:
+            The level of the clicked token, or None if the position does not hit any token of the stack.
+        """
+        clicked_level = None
+        for token in stack:
+            token_x, token_y = self.get_token_position(token)
+            if token_x <= x <= token_x + self.width and token_y <= y <= token_y + self.height:
+                clicked_level = token.level
+        return clicked_level
@@ -0,0 +1,166 @@
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+from ai.simulator import GameSimulator
+from board.notation import encode_position
+from board.position import Position
+from board.symmetry import canonicalize
+
+
+PHASES = ('opening', 'midgame', 'endgame')
+
+
+def get_game_phases(
+        simulator: GameSimulator,
+        games: np.ndarray,
+        opening_moves: int
+    ) -> np.ndarray:
+    """
+    Classifies the current positions of games into the indices of `PHASES`.
+
+    The first `opening_moves` moves are the opening, and the endgame starts once at most half of the
+    tokens of the starting position are left on the board, the others having been removed in full stacks.
+    """
+    start_tokens_count = simulator.tiles_count - 2 * (simulator.board_size // 2)
+    tokens_count = simulator.heights[games].sum(axis=1, dtype=np.int32)
+    return np.where(
+        simulator.moves_played[games] < opening_moves, 0,
+        np.where(2 * tokens_count <= start_tokens_count, 2, 1)
+    )
+
+
+def get_position_key(
+        position: Position,
+        player_color: int,
+        white_points: int,
+        black_points: int
+    ) -> bytes:
+    """
+    Hashes a game state so that states which are the same up to a board symmetry or swapped colors get the same key.
+    """
+    canonical_encoding, _, color_swapped = canonicalize(position, player_color)
+    if color_swapped:
+        white_points, black_points = black_points, white_points
+    return hashlib.blake2b(canonical_encoding + bytes([white_points, black_points]), digest_size=16).digest()
+
+
+def generate_task(
+        board_size: int,
+        games_count: int,
+        seed: int,
+        phase: str,
+        policy: str,
+        epsilon: float,
+        sample_rate: float,
+        opening_moves: int
+    ) -> List[Tuple[bytes, str]]:
+    """
+    Plays a batch of games with the vectorized simulator and samples positions of the requested phase from them.
+
+    Only positions in which the player to move has a legal move are sampled, each one with probability
+    `sample_rate`, and positions which are equal up to symmetry are kept once.
+
+    Returns:
+        The key and the notation of every sampled position, see `get_position_key` and `board.notation`.
+    """
+    simulator = GameSimulator(board_size, games_count, seed)
+    rng = np.random.default_rng(seed)
+    position = Position(board_size, simulator.tiles)
+    phase_index = PHASES.index(phase) if phase != 'any' else None
+    samples = {}
+
+    while not simulator.finished.all():
+        simulator.step(policy, epsilon)
+        games = np.flatnonzero(~simulator.finished)
+        games = games[rng.random(len(games)) < sample_rate]
+        if phase_index is not None:
+            games = games[get_game_phases(simulator, games, opening_moves) == phase_index]
+        if not len(games):
+            continue
+        legal_bits = simulator.get_legal_move_bits(simulator.cells[games], simulator.heights[games], simulator.current_player[games])
+        games = games[legal_bits.any(axis=(1, 2))]
+
+        for game in games:
+            position.cells = simulator.cells[game].ravel().tolist()
+            position.heights = simulator.heights[game].tolist()
+            player_color = int(simulator.current_player[game])
+            white_points = int(simulator.white_points[game])
+            black_points = int(simulator.black_points[game])
+            key = get_position_key(position, player_color, white_points, black_points)
+            if key not in samples:
+                samples[key] = encode_position(position, player_color, white_points, black_points)
+
+    return list(samples.items())
+
+
+def generate_positions(
+        board_size: int,
+        count: int,
+        phase: str,
+        policy: str,
+        epsilon: float,
+        sample_rate: float,
+        opening_moves: int,
+        workers: int,
+        games_per_task: int,
+        seed: int
+    ) -> List[str]:
+    """
+    Generates `count` distinct positions in worker processes, every task playing its games with its own seed.
+
+    Tasks are submitted in rounds of one task per worker until enough distinct positions are found,
+    so the result only depends on the seed and not on the number of workers finishing first.
+    """
+    positions = {}
+    task_seed = seed
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while len(positions) < count:
+            futures = [
+                executor.submit(generate_task, board_size, games_per_task, task_seed + task, phase, policy, epsilon, sample_rate, opening_moves)
+                for task in range(workers)
+            ]
+            task_seed += workers
+            found_count = len(positions)
+            for future in futures:
+                for key, notation in future.result():
+                    if len(positions) < count:
+                        positions.setdefault(key, notation)
+            if len(positions) == found_count:
+                raise RuntimeError(f'No new {phase} positions were found, the sample rate or the phase may be too restrictive')
+    return list(positions.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate distinct reachable positions from random or epsilon-greedy playouts.')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--count', type=int, default=10000, help='number of distinct positions')
+    parser.add_argument('--phase', choices=[*PHASES, 'any'], default='any', help='game phase of the positions')
+    parser.add_argument('--policy', choices=['random', 'greedy'], default='random', help='move selection policy of the playouts')
+    parser.add_argument('--epsilon', type=float, default=0.1, help='probability of a random move with the greedy policy')
+    parser.add_argument('--sample-rate', type=float, default=0.1, help='probability of sampling a position of a playout')
+    parser.add_argument('--opening-moves', type=int, default=10, help='moves of a game which count as the opening')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--games-per-task', type=int, default=512, help='games played at once by one task')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the playouts')
+    parser.add_argument('--output', default='positions.txt', help='file for the positions, one notation per line')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    positions = generate_positions(
+        args.size, args.count, args.phase, args.policy, args.epsilon, args.sample_rate,
+        args.opening_moves, args.workers, args.games_per_task, args.seed
+    )
+    elapsed_time = time.perf_counter() - start_time
+    with open(args.output, 'w') as output_file:
+        output_file.writelines(f'{notation}\n' for notation in positions)
+    print(f'{len(positions)} {args.phase} positions in {elapsed_time:.1f}s, {len(positions) / elapsed_time:.0f} positions/s, written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
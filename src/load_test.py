@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from server import GameServer
+
+
+async def send_request(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        request: Dict,
+        latencies: List[float]
+    ) -> Dict:
+    start_time = time.perf_counter()
+    writer.write((json.dumps(request) + '\n').encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - start_time)
+    return response
+
+
+async def play_client_game(
+        port: int,
+        board_size: int,
+        depth: int,
+        seed: int,
+        max_moves: int,
+        latencies: List[float],
+        counters: Dict[str, int]
+    ) -> None:
+    """
+    Plays one game as a client making random moves against the AI, retrying AI turns while the server is busy.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        state = await send_request(reader, writer, {'command': 'new_game', 'size': board_size, 'ai': 'b', 'depth': depth}, latencies)
+        game_id = state['game']
+        retries = 0
+        for _ in range(max_moves):
+            if state.get('finished') or not state.get('legal_moves'):
+                break
+            if 'error' in state:
+                counters['errors'] += 1
+                # The AI reply was rejected or timed out, back off exponentially with jitter and ask for it again
+                await asyncio.sleep(min(0.05 * 2 ** retries, 1.0) * rng.random())
+                retries += 1
+                state = await send_request(reader, writer, {'command': 'ai_move', 'game': game_id}, latencies)
+                continue
+            retries = 0
+            move = rng.choice(state['legal_moves'])
+            state = await send_request(reader, writer, {'command': 'move', 'game': game_id, 'move': move}, latencies)
+            counters['moves'] += 1
+        counters['games'] += 1
+        await send_request(reader, writer, {'command': 'close', 'game': game_id}, latencies)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load_test(
+        games: int,
+        concurrency: int,
+        board_size: int,
+        depth: int,
+        max_moves: int,
+        game_server: GameServer
+    ) -> None:
+    server = await game_server.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    latencies: List[float] = []
+    counters = {'games': 0, 'moves': 0, 'errors': 0}
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def limited_game(seed: int) -> None:
+        async with limiter:
+            await play_client_game(port, board_size, depth, seed, max_moves, latencies, counters)
+
+    start_time = time.perf_counter()
+    try:
+        await asyncio.gather(*(limited_game(seed) for seed in range(games)))
+    finally:
+        server.close()
+        await server.wait_closed()
+        await game_server.close()
+    elapsed_time = time.perf_counter() - start_time
+
+    latencies.sort()
+    print(f'{counters["games"]} games, {counters["moves"]} client moves, {len(latencies)} requests in {elapsed_time:.1f}s')
+    print(f'{len(latencies) / elapsed_time:.1f} requests/s, {counters["moves"] / elapsed_time:.1f} moves/s, {counters["errors"]} busy or timed out replies')
+    print(
+        f'latency median {statistics.median(latencies) * 1000:.0f} ms, '
+        f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test the game server with concurrent clients on localhost.')
+    parser.add_argument('--games', type=int, default=100, help='number of games played')
+    parser.add_argument('--concurrency', type=int, default=50, help='games played at the same time')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--depth', type=int, default=2, help='maximum search depth of the AI')
+    parser.add_argument('--max-moves', type=int, default=200, help='client moves after which a game is abandoned')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of AI worker processes')
+    parser.add_argument('--max-pending', type=int, help='AI moves queued or running at once (default 4 per worker)')
+    parser.add_argument('--move-time', type=float, default=0.2, help='maximum thinking time of one AI move in seconds')
+    parser.add_argument('--time-budget', type=float, default=10.0, help='AI thinking time of a whole game in seconds')
+    args = parser.parse_args()
+
+    max_pending = args.max_pending or 4 * args.workers
+    move_timeout = args.move_time * (max_pending // args.workers + 1) + 5
+    game_server = GameServer(args.workers, max_pending, args.move_time, move_timeout, args.time_budget, 600)
+    asyncio.run(run_load_test(args.games, args.concurrency, args.size, args.depth, args.max_moves, game_server))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,17 @@
+import argparse
 import pygame
-from typing import Tuple
+from typing import Tuple, Union
 
+from ai.analysis_cache import AnalysisCache
+from ai.weights import load_heuristic_weights
+from board.clock import parse_time_control
+from display.frame_stats import FrameStats
 from display.gui import GUI
-from board.board import Board
+from board.board import SUPPORTED_BOARD_SIZES, Board
 from utils.movement import get_clicked_tile_position
+from utils.memory import monitor_memory
+from utils.profiling import profile_run
+from utils.tracing import trace_search
 import utils.colors as colors
 
 
@@ -14,6 +22,13 @@ def print_end_game(
     print(f'{winner} won!')
 
 
+def print_loss_on_time(
+        board: Board
+    ) -> None:
+    loser = 'White' if board.current_player == colors.WHITE else 'Black'
+    print(f'{loser} lost on time!')
+
+
 def process_move(
         board: Board, 
         x: int, 
@@ -41,13 +56,16 @@ def process_ai_move(
 def handle_mouse_button(
         event: pygame.event.Event, 
         board: Board, 
+        gui: GUI, 
         tile_size: int, 
         running: bool
     ) -> bool:
     x, y = event.pos
 
     if event.button == 1:
-        board.change_clicked_stack_status(x, y)
+        clicked_token = gui.get_clicked_token(board, x, y)
+        if clicked_token:
+            board.change_clicked_stack_status(*clicked_token)
 
     elif event.button == 2:
         return process_ai_move(board)
@@ -62,54 +80,98 @@ def process_events(
         board: Board, 
         gui: GUI, 
         running: bool, 
-        tile_size: int
+        tile_size: int,
+        frame_stats: Union[FrameStats, None] = None
     ) -> bool:
+    if frame_stats is not None:
+        frame_stats.start_frame()
     is_still_running = running
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             return False
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            is_still_running = handle_mouse_button(event, board, tile_size, running)
+            if frame_stats is not None:
+                frame_stats.record_click()
+            is_still_running = handle_mouse_button(event, board, gui, tile_size, running)
     gui.draw_board(board)
-    gui.update_caption(board.get_current_player_color())
+    gui.update_caption(board.get_current_player_color(), board.clock.get_caption() if board.clock is not None else None)
+    if frame_stats is not None:
+        frame_stats.draw_overlay(gui.screen)
     pygame.display.update()
+    if frame_stats is not None:
+        frame_stats.end_frame()
+    if is_still_running and board.has_current_player_flagged():
+        print_loss_on_time(board)
+        return False
     return is_still_running
 
 
 def setup_game(
         screen: pygame.Surface, 
         board_size: int, 
-        current_player: Tuple[int, int, int]
+        current_player: Tuple[int, int, int],
+        analysis_cache_path: Union[str, None] = None,
+        weights_path: Union[str, None] = None,
+        node_budget: Union[int, None] = None,
+        time_control: Union[Tuple[float, float], None] = None
     ) -> Tuple[GUI, Board]:
-    gui = GUI(screen)
     tile_size = screen.get_height() // board_size
+    gui = GUI(screen, tile_size)
     board = Board(board_size, tile_size, current_player)
     board.initialize_board()
+    if analysis_cache_path:
+        board.ai.analysis_cache = AnalysisCache(analysis_cache_path)
+    if weights_path:
+        board.ai.heuristic_weights = load_heuristic_weights(weights_path)
+    board.ai.node_budget = node_budget
+    if time_control:
+        board.set_time_control(*time_control)
     return gui, board
 
 
 def start_game(
         board_size: int, 
-        current_player: Tuple[int, int, int]
-    ) -> None:
+        current_player: Tuple[int, int, int],
+        analysis_cache_path: Union[str, None] = None,
+        weights_path: Union[str, None] = None,
+        node_budget: Union[int, None] = None,
+        frame_stats: Union[FrameStats, None] = None,
+        time_control: Union[Tuple[float, float], None] = None
+    ) -> Board:
     pygame.init()
     screen = pygame.display.set_mode((800, 800))
     running = True
-    gui, board = setup_game(screen, board_size, current_player)
+    gui, board = setup_game(screen, board_size, current_player, analysis_cache_path, weights_path, node_budget, time_control)
     tile_size = screen.get_height() // board_size
     while running:
-        running = process_events(board, gui, running, tile_size)
+        running = process_events(board, gui, running, tile_size, frame_stats)
     pygame.quit()
+    return board
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play Byte against another player or the AI.')
+    parser.add_argument('--cache', help='sqlite file of the persistent analysis cache, which is created if missing')
+    parser.add_argument('--weights', help='JSON file of heuristic weights, such as one written by tune_weights.py')
+    parser.add_argument('--size', type=int, default=8, help=f'board size, one of {", ".join(map(str, SUPPORTED_BOARD_SIZES))}')
+    parser.add_argument('--node-budget', type=int, default=20000, help='estimated search tree size per AI move which bounds depth and beam width, 0 for a fixed depth')
+    parser.add_argument('--time-control', type=parse_time_control, help='play a timed game, base minutes and increment seconds per move such as 5+3')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in the phases of the AI search when the game ends')
+    parser.add_argument('--profile-output', help='also record the game with cProfile and write the statistics to this file')
+    parser.add_argument('--memory', action='store_true', help='trace memory and print the peaks of the AI moves when the game ends')
+    parser.add_argument('--trace', help='write the nodes visited by the AI searches to this JSON lines file, see trace_summary.py')
+    parser.add_argument('--trace-sample-rate', type=float, default=1.0, help='share of the subtrees below the first ply which are traced')
+    parser.add_argument('--frame-stats', action='store_true', help='show frame times and click latency in an overlay and print them when the game ends')
+    parser.add_argument('--frame-log', help='write the timings of every frame to this CSV file')
+    args = parser.parse_args()
+
     players = {}
 
-    # board_size = int(input('Input board size [8,10,16]: '))
-    board_size = 8
-    while board_size not in [8, 10, 16]:
+    # board_size = int(input('Input board size [8-24]: '))
+    board_size = args.size
+    while board_size not in SUPPORTED_BOARD_SIZES:
         print('Wrong input. Try again!')
-        board_size = int(input('Input board size: '))
+        board_size = int(input(f'Input board size [{SUPPORTED_BOARD_SIZES[0]}-{SUPPORTED_BOARD_SIZES[-1]}, even]: '))
 
     # first_color = input('What color is to make the first move [w/b]: ')
     first_color = 'w'
@@ -127,6 +189,16 @@ if __name__ == '__main__':
     first_player_color = color_mapping[first_color.lower()]
     current_player = first_player_color
 
-    start_game(board_size, current_player)
+    node_budget = args.node_budget or None
+    frame_stats = FrameStats(args.frame_stats, args.frame_log) if args.frame_stats or args.frame_log else None
+    with monitor_memory(args.memory) as memory_monitor, profile_run(args.profile, args.profile_output), trace_search(args.trace, args.trace_sample_rate):
+        if frame_stats is not None:
+            with frame_stats:
+                board = start_game(board_size, current_player, args.cache, args.weights, node_budget, frame_stats, args.time_control)
+            frame_stats.report()
+        else:
+            board = start_game(board_size, current_player, args.cache, args.weights, node_budget, time_control=args.time_control)
+    if memory_monitor is not None:
+        memory_monitor.report(board)
 
 
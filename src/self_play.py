@@ -0,0 +1,30 @@
+import argparse
+import time
+
+import numpy as np
+
+from ai.simulator import GameSimulator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Play many games at once with the vectorized simulator.')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--games', type=int, default=4096, help='number of games played at once')
+    parser.add_argument('--policy', choices=['random', 'greedy'], default='random', help='move selection policy of both players')
+    parser.add_argument('--epsilon', type=float, default=0.0, help='probability of a random move with the greedy policy')
+    parser.add_argument('--max-moves', type=int, default=500, help='moves after which a game is stopped')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random choices')
+    args = parser.parse_args()
+
+    simulator = GameSimulator(args.size, args.games, args.seed, args.max_moves)
+    start_time = time.perf_counter()
+    winner, white_points, black_points = simulator.play(args.policy, args.epsilon)
+    elapsed_time = time.perf_counter() - start_time
+
+    print(f'white wins {np.count_nonzero(winner == 1)}, black wins {np.count_nonzero(winner == -1)}, draws {np.count_nonzero(winner == 0)}')
+    print(f'average points {white_points.mean():.2f} - {black_points.mean():.2f}, average moves {simulator.moves_played.mean():.1f}')
+    print(f'{args.games} games in {elapsed_time:.2f}s, {args.games / elapsed_time:.0f} games/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+
+from analyze import analyze_position
+from board.board import SUPPORTED_BOARD_SIZES, Board
+import utils.colors as colors
+from utils.events import NullSink
+
+
+COLOR_LETTERS = {colors.WHITE: 'w', colors.BLACK: 'b'}
+LETTER_COLORS = {letter: color for color, letter in COLOR_LETTERS.items()}
+
+
+class RequestError(Exception):
+    """
+    Raised while handling a request which can not be served, the message is sent back to the client.
+    """
+
+
+class GameSession:
+    """
+    One game held by the server, with the colors played by the AI and its remaining thinking time.
+    """
+
+    def __init__(
+            self,
+            game_id: int,
+            board: Board,
+            ai_colors: Tuple,
+            depth: int,
+            time_budget: float
+        ) -> None:
+        self.game_id = game_id
+        self.board = board
+        self.ai_colors = ai_colors
+        self.depth = depth
+        self.time_left = time_budget
+        self.is_finished = False
+        self.last_active = time.monotonic()
+        # Commands of one game are handled one at a time, commands of different games concurrently
+        self.lock = asyncio.Lock()
+
+    def get_state(
+            self
+        ) -> Dict:
+        board = self.board
+        winner = None
+        if self.is_finished:
+            winner = 'draw'
+            if board.white_points != board.black_points:
+                winner = 'w' if board.white_points > board.black_points else 'b'
+        return {
+            'game': self.game_id,
+            'position': board.get_notation(),
+            'player': COLOR_LETTERS[board.current_player],
+            'white_points': board.white_points,
+            'black_points': board.black_points,
+            'finished': self.is_finished,
+            'winner': winner,
+            'time_left': round(self.time_left, 3),
+            'legal_moves': [] if self.is_finished else [
+                [list(source_tile), token_level, list(destination_tile)]
+                for source_tile, token_level, destination_tile in board.get_legal_moves()
+            ],
+        }
+
+
+class GameServer:
+    """
+    Asyncio server which holds many games in memory and plays the AI turns in a pool of worker processes.
+
+    Clients connect to a local socket and send one JSON object per line with a "command" field and an
+    optional "id", which is copied into the response. The commands are
+
+        new_game   {"size": 8, "ai": "b", "depth": 3, "time_budget": 60}, "ai" is the AI color "w", "b" or ""
+        move       {"game": 1, "move": [[2, 2], 1, [3, 3]]}, the AI replies if it is its turn
+        ai_move    {"game": 1}, the AI plays one move for the player to move, also in games without an AI color
+        state      {"game": 1}
+        close      {"game": 1}
+
+    Every response is one JSON line with the game state, or with an "error" field. The server protects
+    itself in three ways: AI turns beyond `max_pending` queued jobs are rejected with a "server busy"
+    error instead of queueing without bound, each AI move is limited by the game's time budget and by a
+    timeout, and games without commands for `idle_timeout` seconds are closed.
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            max_pending: int,
+            move_time: float,
+            move_timeout: float,
+            default_time_budget: float,
+            idle_timeout: float
+        ) -> None:
+        # Forked workers would inherit the event loop and the open client sockets, which then never see EOF
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self.max_pending = max_pending
+        self.move_time = move_time
+        self.move_timeout = move_timeout
+        self.default_time_budget = default_time_budget
+        self.idle_timeout = idle_timeout
+        self.games: Dict[int, GameSession] = {}
+        self.game_ids = itertools.count(1)
+        self.pending_ai_moves = 0
+        self.connections = set()
+
+    async def start(
+            self,
+            host: str,
+            port: int
+        ) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.reaper = asyncio.create_task(self.close_idle_games())
+        return server
+
+    async def close(
+            self
+        ) -> None:
+        """
+        Stops the server after giving the open connections a second to finish their current requests.
+        """
+        self.reaper.cancel()
+        if self.connections:
+            _, unfinished = await asyncio.wait(self.connections, timeout=1)
+            for connection in unfinished:
+                connection.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle_client(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+        ) -> None:
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the stream limit, the connection can not be resynchronized
+                    break
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write((json.dumps(response) + '\n').encode())
+                # Stop reading from clients which do not read their responses
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def handle_line(
+            self,
+            line: bytes
+        ) -> Dict:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            return {'error': f'Invalid JSON: {error}'}
+        if not isinstance(request, dict):
+            return {'error': 'Requests must be JSON objects'}
+
+        response = {'id': request.get('id')}
+        try:
+            response.update(await self.handle_request(request))
+        except RequestError as error:
+            response['error'] = str(error)
+        except Exception as error:
+            # A request which slips past the checks must not take the connection down with it
+            response['error'] = f'{type(error).__name__}: {error}'
+        return response
+
+    async def handle_request(
+            self,
+            request: Dict
+        ) -> Dict:
+        command = request.get('command')
+        if command == 'new_game':
+            return await self.create_game(request)
+
+        game_id = request.get('game')
+        if not isinstance(game_id, (str, int)) or isinstance(game_id, bool):
+            raise RequestError(f'Invalid game: {game_id}')
+        session = self.games.get(game_id)
+        if session is None:
+            raise RequestError(f'Unknown game: {request.get("game")}')
+        session.last_active = time.monotonic()
+
+        async with session.lock:
+            if command == 'state':
+                return session.get_state()
+            if command == 'close':
+                self.games.pop(session.game_id, None)
+                return {'game': session.game_id, 'closed': True}
+            if command in ('move', 'ai_move'):
+                try:
+                    if command == 'move':
+                        self.play_client_move(session, request.get('move'))
+                        await self.play_ai_turns(session)
+                    elif not session.is_finished:
+                        await self.play_ai_move(session)
+                except RequestError as error:
+                    # The game goes on from its current state, a rejected AI move can be requested again with ai_move
+                    return {**session.get_state(), 'error': str(error)}
+                return session.get_state()
+        raise RequestError(f'Unknown command: {command}')
+
+    async def create_game(
+            self,
+            request: Dict
+        ) -> Dict:
+        board_size = request.get('size', 8)
+        ai_letter = request.get('ai', 'b')
+        depth = request.get('depth', 3)
+        time_budget = request.get('time_budget', self.default_time_budget)
+        if board_size not in SUPPORTED_BOARD_SIZES:
+            raise RequestError(f'Unsupported board size: {board_size}')
+        if ai_letter not in ('w', 'b', ''):
+            raise RequestError(f'Invalid AI color: {ai_letter}')
+        if not isinstance(depth, int) or not 1 <= depth <= 64:
+            raise RequestError(f'Invalid depth: {depth}')
+        if not isinstance(time_budget, (int, float)) or time_budget < 0:
+            raise RequestError(f'Invalid time budget: {time_budget}')
+
+        board = Board(board_size, 1, colors.WHITE, NullSink())
+        board.initialize_board()
+        ai_colors = (LETTER_COLORS[ai_letter],) if ai_letter else ()
+        session = GameSession(next(self.game_ids), board, ai_colors, depth, time_budget)
+        self.games[session.game_id] = session
+        async with session.lock:
+            await self.play_ai_turns(session)
+            return session.get_state()
+
+    def play_client_move(
+            self,
+            session: GameSession,
+            move
+        ) -> None:
+        if session.is_finished:
+            raise RequestError('The game is finished')
+        if session.board.current_player in session.ai_colors:
+            raise RequestError('It is the turn of the AI')
+        try:
+            (source_row, source_column), token_level, (destination_row, destination_column) = move
+            tile_move = (source_row, source_column), token_level, (destination_row, destination_column)
+        except (TypeError, ValueError):
+            raise RequestError(f'Invalid move: {move}')
+        # Floats and booleans compare equal to the legal integers but can not index the board
+        numbers = (source_row, source_column, token_level, destination_row, destination_column)
+        if not all(isinstance(number, int) and not isinstance(number, bool) for number in numbers):
+            raise RequestError(f'Invalid move: {move}')
+        if tile_move not in session.board.get_legal_moves():
+            raise RequestError(f'Illegal move: {move}')
+        self.apply_move(session, tile_move)
+
+    def apply_move(
+            self,
+            session: GameSession,
+            tile_move: Tuple[Tuple[int, int], int, Tuple[int, int]]
+        ) -> None:
+        is_winning_move = session.board.play_move(*tile_move)
+        if is_winning_move or not session.board.get_legal_moves():
+            session.is_finished = True
+
+    async def play_ai_turns(
+            self,
+            session: GameSession
+        ) -> None:
+        while not session.is_finished and session.board.current_player in session.ai_colors:
+            await self.play_ai_move(session)
+
+    async def play_ai_move(
+            self,
+            session: GameSession
+        ) -> None:
+        """
+        Lets a worker process search the position with the remaining time of the game and plays its move.
+
+        Once the budget of a game is used up, the AI still plays, but only completes the first iteration.
+        """
+        if self.pending_ai_moves >= self.max_pending:
+            raise RequestError('Server busy, try again later')
+
+        time_limit = max(min(self.move_time, session.time_left), 0.001)
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(analyze_position, session.board.get_notation(), session.depth, time_limit)
+        self.pending_ai_moves += 1
+
+        def on_search_done(_):
+            # A search which outlives its timeout still occupies a worker, so the move stays pending until it is done
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self.release_ai_move)
+
+        future.add_done_callback(on_search_done)
+        try:
+            # The search stops itself at the deadline, the timeout also covers waiting for a free worker
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.move_timeout)
+        except asyncio.TimeoutError:
+            # Only a search which has not started yet can be cancelled
+            future.cancel()
+            raise RequestError('AI move timed out')
+
+        session.time_left = max(session.time_left - result['time'], 0)
+        session.last_active = time.monotonic()
+        if result['best_move'] is None:
+            session.is_finished = True
+            return
+        (source_row, source_column), token_level, (destination_row, destination_column) = result['best_move']
+        self.apply_move(session, ((source_row, source_column), token_level, (destination_row, destination_column)))
+
+    def release_ai_move(
+            self
+        ) -> None:
+        """
+        Frees the slot of an AI move once its worker process is done with it.
+        """
+        self.pending_ai_moves -= 1
+
+    async def close_idle_games(
+            self
+        ) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 10))
+            now = time.monotonic()
+            for game_id, session in list(self.games.items()):
+                if now - session.last_active > self.idle_timeout and not session.lock.locked():
+                    del self.games[game_id]
+
+
+async def serve(
+        host: str,
+        port: int,
+        game_server: GameServer
+    ) -> None:
+    server = await game_server.start(host, port)
+    print(f'listening on {", ".join(str(socket.getsockname()) for socket in server.sockets)}', flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await game_server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve many Byte games over a local JSON lines socket.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of AI worker processes')
+    parser.add_argument('--max-pending', type=int, help='AI moves queued or running at once (default 4 per worker)')
+    parser.add_argument('--move-time', type=float, default=1.0, help='maximum thinking time of one AI move in seconds')
+    parser.add_argument('--move-timeout', type=float, help='seconds an AI move may take including the wait for a worker')
+    parser.add_argument('--time-budget', type=float, default=60.0, help='default AI thinking time of a whole game in seconds')
+    parser.add_argument('--idle-timeout', type=float, default=600.0, help='seconds after which games without commands are closed')
+    args = parser.parse_args()
+
+    max_pending = args.max_pending or 4 * args.workers
+    # By default long enough for the queued moves ahead of a move to finish first
+    move_timeout = args.move_timeout or args.move_time * (max_pending // args.workers + 1) + 5
+    game_server = GameServer(args.workers, max_pending, args.move_time, move_timeout, args.time_budget, args.idle_timeout)
+    try:
+        asyncio.run(serve(args.host, args.port, game_server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
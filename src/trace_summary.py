@@ -0,0 +1,91 @@
+import argparse
+import collections
+import json
+from typing import Dict, Iterator, TextIO, Tuple, Union
+
+
+def read_trace(
+        trace_file: TextIO,
+        search_index: Union[int, None] = None
+    ) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Reads the nodes of a trace written by `utils.tracing.SearchTracer`, with the header of the search of every node.
+
+    With a search index, only the nodes of that search are read.
+    """
+    headers = {}
+    for line in trace_file:
+        record = json.loads(line)
+        if 'notation' in record:
+            headers[record['search']] = record
+        elif search_index is None or record['search'] == search_index:
+            yield headers[record['search']], record
+
+
+def summarize_trace(
+        nodes: Iterator[Tuple[Dict, Dict]]
+    ) -> Tuple[Dict[Tuple[int, str], Dict[str, float]], int]:
+    """
+    Aggregates the nodes of a trace by ply and kind of node.
+
+    Nodes below the fully traced plies are sampled, so their counts are also scaled by the inverse of
+    the sample rate into an estimate of the nodes which were searched. The averages are over the
+    traced nodes, which are complete subtrees and therefore unbiased.
+
+    Returns:
+        For every (ply, kind) the traced and estimated nodes, the total generated moves and searched
+        children, the number of cutoffs and the number of cutoffs by the first child or without a child,
+        and the number of searches.
+    """
+    stats = collections.defaultdict(collections.Counter)
+    search_indices = set()
+    for header, node in nodes:
+        search_indices.add(node['search'])
+        ply_stats = stats[node['ply'], node['kind']]
+        ply_stats['nodes'] += 1
+        ply_stats['estimated nodes'] += 1 / header['sample_rate'] if node['ply'] > header['full_plies'] else 1
+        ply_stats['moves'] += node['moves']
+        ply_stats['children'] += node['children']
+        if node['cutoff']:
+            ply_stats['cutoffs'] += 1
+            if node['children'] <= 1:
+                ply_stats['first cutoffs'] += 1
+    return dict(sorted(stats.items())), len(search_indices)
+
+
+def print_summary(
+        stats: Dict[Tuple[int, str], Dict[str, float]],
+        searches_count: int
+    ) -> None:
+    """
+    Prints the branching and cutoff behaviour of every ply.
+
+    Children per node is the effective branching factor. The cutoff rate is the share of nodes whose
+    value is outside their window, and the first move rate the share of those cutoffs which needed at
+    most one child, which shows how well the moves are ordered.
+    """
+    print(f'{searches_count} searches')
+    print(f'{"ply":>4} {"kind":<12}{"nodes":>10}{"estimated":>12}{"moves":>8}{"children":>10}{"cutoff %":>10}{"first %":>9}')
+    for (ply, kind), ply_stats in stats.items():
+        nodes = ply_stats['nodes']
+        cutoffs = ply_stats['cutoffs']
+        print(
+            f'{ply:>4} {kind:<12}{nodes:>10}{ply_stats["estimated nodes"]:>12.0f}{ply_stats["moves"] / nodes:>8.1f}'
+            f'{ply_stats["children"] / nodes:>10.2f}{100 * cutoffs / nodes:>10.1f}'
+            f'{100 * ply_stats["first cutoffs"] / cutoffs if cutoffs else 0:>9.1f}'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Summarize the branching and cutoffs per ply of a search trace.')
+    parser.add_argument('trace', help='JSON lines trace written with the --trace option of main.py or benchmark.py')
+    parser.add_argument('--search', type=int, help='only summarize the search with this index, counted from 0')
+    args = parser.parse_args()
+
+    with open(args.trace) as trace_file:
+        stats, searches_count = summarize_trace(read_trace(trace_file, args.search))
+    print_summary(stats, searches_count)
+
+
+if __name__ == '__main__':
+    main()
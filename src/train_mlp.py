@@ -0,0 +1,175 @@
+import argparse
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from ai.ai import AI
+from ai.mlp_eval import FULL_STACK_INDEX, NETWORK_LEVELS, NETWORK_TERM_INDICES, MLPEvaluator
+from ai.weights import DEFAULT_HEURISTIC_WEIGHTS, HEURISTIC_TERMS
+from board.board import Board
+from board.position import Position
+from board.symmetry import get_symmetry_tables
+from tune_weights import fit_scale, generate_training_data, sigmoid
+import utils.colors as colors
+
+
+def get_cross_entropy(
+        logits: np.ndarray,
+        results: np.ndarray
+    ) -> float:
+    """
+    Computes the binary cross entropy between the game results and the win probabilities of the logits.
+    """
+    probabilities = np.clip(sigmoid(logits), 1e-7, 1 - 1e-7)
+    return float(-np.mean(results * np.log(probabilities) + (1 - results) * np.log(1 - probabilities)))
+
+
+def initialize_layers(
+        layer_sizes: List[int],
+        rng: np.random.Generator
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Creates He initialized weights and zero biases for layers of the given sizes.
+    """
+    layer_weights = [
+        (rng.standard_normal((inputs_count, outputs_count)) * np.sqrt(2 / inputs_count)).astype(np.float32)
+        for inputs_count, outputs_count in zip(layer_sizes[:-1], layer_sizes[1:])
+    ]
+    layer_biases = [np.zeros(outputs_count, dtype=np.float32) for outputs_count in layer_sizes[1:]]
+    return layer_weights, layer_biases
+
+
+def train(
+        evaluator: MLPEvaluator,
+        cells: np.ndarray,
+        features: np.ndarray,
+        results: np.ndarray,
+        tile_maps: List[np.ndarray],
+        epochs: int,
+        batch_size: int,
+        learning_rate: float,
+        rng: np.random.Generator
+    ) -> None:
+    """
+    Trains the network of the evaluator in place with Adam on the binary cross entropy of the game results.
+
+    Every minibatch is mapped by a random board symmetry and has its colors swapped with probability 1/2.
+    The heuristic terms do not change under board symmetries and change sign when colors are swapped,
+    so they are transformed without being recomputed. Full stacks never occur in the training positions
+    and are not inputs of the network, see `MLPEvaluator`.
+    """
+    parameters = [*evaluator.layer_weights, *evaluator.layer_biases]
+    layers_count = len(evaluator.layer_weights)
+    first_moments = [np.zeros_like(parameter) for parameter in parameters]
+    second_moments = [np.zeros_like(parameter) for parameter in parameters]
+    step = 0
+
+    for _ in range(epochs):
+        order = rng.permutation(len(cells))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            color_sign = rng.choice((-1, 1))
+            batch_cells = color_sign * cells[batch][:, tile_maps[rng.integers(len(tile_maps))]]
+            batch_results = results[batch] if color_sign == 1 else 1 - results[batch]
+            inputs = evaluator.get_network_inputs(batch_cells, color_sign * features[batch])
+
+            # Forward pass, keeping the activations of every layer
+            activations = [inputs]
+            for weights, biases in zip(evaluator.layer_weights[:-1], evaluator.layer_biases[:-1]):
+                activations.append(np.maximum(activations[-1] @ weights + biases, 0))
+            logits = (activations[-1] @ evaluator.layer_weights[-1] + evaluator.layer_biases[-1])[:, 0]
+
+            # Backward pass, the gradient of the cross entropy with respect to the logits is the prediction error
+            gradients = [None] * len(parameters)
+            output_gradient = ((sigmoid(logits) - batch_results) / len(batch)).astype(np.float32)[:, None]
+            for layer in range(layers_count - 1, -1, -1):
+                gradients[layer] = activations[layer].T @ output_gradient
+                gradients[layers_count + layer] = output_gradient.sum(axis=0)
+                if layer:
+                    output_gradient = (output_gradient @ evaluator.layer_weights[layer].T) * (activations[layer] > 0)
+
+            step += 1
+            for index, (parameter, gradient) in enumerate(zip(parameters, gradients)):
+                first_moments[index] = 0.9 * first_moments[index] + 0.1 * gradient
+                second_moments[index] = 0.999 * second_moments[index] + 0.001 * gradient ** 2
+                corrected_first_moment = first_moments[index] / (1 - 0.9 ** step)
+                corrected_second_moment = second_moments[index] / (1 - 0.999 ** step)
+                parameter -= learning_rate * corrected_first_moment / (np.sqrt(corrected_second_moment) + 1e-8)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Train the MLP evaluator on self-play games.')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--games', type=int, default=20000, help='number of self-play games')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of data generation processes')
+    parser.add_argument('--games-per-task', type=int, default=1000, help='games played at once by one task')
+    parser.add_argument('--epsilon', type=float, default=0.2, help='probability of a random move in self-play')
+    parser.add_argument('--skipped-moves', type=int, default=4, help='opening moves which are not sampled')
+    parser.add_argument('--sample-rate', type=float, default=1.0, help='probability of sampling a position')
+    parser.add_argument('--data', help='npz file of training positions, loaded if it exists and saved otherwise')
+    parser.add_argument('--hidden', type=int, nargs='+', default=[64, 32], help='sizes of the hidden layers')
+    parser.add_argument('--epochs', type=int, default=10, help='passes over the training positions')
+    parser.add_argument('--batch-size', type=int, default=512, help='positions per training step')
+    parser.add_argument('--learning-rate', type=float, default=0.001, help='learning rate of Adam')
+    parser.add_argument('--validation-fraction', type=float, default=0.1, help='fraction of games held out for validation')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the self-play games and the training')
+    parser.add_argument('--output', default='mlp.npz', help='npz file for the trained network')
+    args = parser.parse_args()
+
+    if args.data and os.path.exists(args.data):
+        data = np.load(args.data)
+        cells, results = data['cells'], data['results']
+        print(f'loaded {len(cells)} positions from {args.data}')
+    else:
+        start_time = time.perf_counter()
+        cells, results = generate_training_data(
+            args.size, args.games, args.workers, args.games_per_task, args.seed,
+            args.epsilon, args.skipped_moves, args.sample_rate, return_cells=True
+        )
+        elapsed_time = time.perf_counter() - start_time
+        print(f'{args.games} games, {len(cells)} positions in {elapsed_time:.1f}s')
+        if args.data:
+            np.savez_compressed(args.data, cells=cells, results=results)
+
+    board = Board(args.size, 1, colors.WHITE)
+    board.initialize_board()
+    start_position = Position.from_board_dict(board.board, args.size)
+    is_center = AI(1).is_center
+    tile_maps = [np.array(tile_map) for tile_map in get_symmetry_tables(start_position).tile_maps]
+
+    rng = np.random.default_rng(args.seed)
+    layer_weights, layer_biases = initialize_layers([cells.shape[1] * NETWORK_LEVELS + len(NETWORK_TERM_INDICES), *args.hidden, 1], rng)
+    evaluator = MLPEvaluator(is_center, args.size, layer_weights, layer_biases, np.ones(len(HEURISTIC_TERMS)), 1.0)
+    tables = evaluator.get_tables(start_position)
+    features = evaluator.extract_features(cells, tables)
+
+    # The scale of the default heuristic keeps the network scores in the units of the heuristic
+    default_weights = np.array([DEFAULT_HEURISTIC_WEIGHTS[term] for term in HEURISTIC_TERMS], dtype=np.float64)
+    evaluator.scale = fit_scale(features, results, default_weights)
+    evaluator.feature_scales = np.maximum(features.std(axis=0), 1).astype(np.float32)
+
+    # Positions are sampled consecutively from the games of a task, so a split by index mostly keeps games apart
+    validation_count = int(len(cells) * args.validation_fraction)
+    training_indices = np.arange(validation_count, len(cells))
+    validation_indices = np.arange(validation_count)
+
+    start_time = time.perf_counter()
+    train(
+        evaluator, cells[training_indices], features[training_indices], results[training_indices],
+        tile_maps, args.epochs, args.batch_size, args.learning_rate, rng
+    )
+    print(f'trained in {time.perf_counter() - start_time:.1f}s')
+
+    validation_results = results[validation_indices]
+    heuristic_logits = evaluator.scale * (features[validation_indices] @ default_weights)
+    network_logits = evaluator.get_logits(evaluator.get_inputs(cells[validation_indices], tables))
+    network_logits += evaluator.scale * evaluator.full_stack_weight * features[validation_indices, FULL_STACK_INDEX]
+    print(f'validation cross entropy of the heuristic {get_cross_entropy(heuristic_logits, validation_results):.5f}')
+    print(f'validation cross entropy of the network {get_cross_entropy(network_logits, validation_results):.5f}')
+    evaluator.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from ai.simulator import GameSimulator
+from ai.weights import DEFAULT_HEURISTIC_WEIGHTS, HEURISTIC_TERMS, load_heuristic_weights, save_heuristic_weights
+
+
+def generate_games(
+        board_size: int,
+        games_count: int,
+        seed: int,
+        epsilon: float,
+        skipped_moves: int,
+        sample_rate: float,
+        heuristic_weights: Union[Dict[str, int], None] = None,
+        return_cells: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Plays a batch of self-play games with the greedy policy and samples positions from them.
+
+    The first `skipped_moves` moves of every game are not sampled, since the opening positions are
+    nearly the same in all games. Each later position is sampled with probability `sample_rate`.
+
+    Returns:
+        The heuristic features of the sampled positions, or their (positions, tiles, levels) cells if
+        `return_cells` is set, and the result of the game each of them comes from, 1 for a white win,
+        0 for a black win and 0.5 for a draw.
+    """
+    simulator = GameSimulator(board_size, games_count, seed, heuristic_weights=heuristic_weights)
+    rng = np.random.default_rng(seed)
+    samples = []
+    sampled_games = []
+
+    while not simulator.finished.all():
+        games = np.flatnonzero(~simulator.finished & (simulator.moves_played >= skipped_moves))
+        games = games[rng.random(len(games)) < sample_rate]
+        if len(games):
+            if return_cells:
+                samples.append(simulator.cells[games])
+            else:
+                samples.append(simulator.evaluator.extract_features(simulator.cells[games], simulator.tables))
+            sampled_games.append(games)
+        simulator.step('greedy', epsilon)
+
+    if not samples:
+        empty_shape = simulator.cells.shape[1:] if return_cells else (len(HEURISTIC_TERMS),)
+        samples.append(np.empty((0, *empty_shape), dtype=np.int8 if return_cells else np.int32))
+        sampled_games.append(np.empty(0, dtype=np.intp))
+    games = np.concatenate(sampled_games)
+    results = (simulator.winner[games] + 1) / 2
+    return np.concatenate(samples), results.astype(np.float32)
+
+
+def generate_training_data(
+        board_size: int,
+        games: int,
+        workers: int,
+        games_per_task: int,
+        seed: int,
+        epsilon: float,
+        skipped_moves: int,
+        sample_rate: float,
+        heuristic_weights: Union[Dict[str, int], None] = None,
+        return_cells: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generates self-play positions in parallel, with every task playing `games_per_task` games with its own seed.
+    """
+    tasks_count = (games + games_per_task - 1) // games_per_task
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                generate_games, board_size, min(games_per_task, games - task * games_per_task), seed + task,
+                epsilon, skipped_moves, sample_rate, heuristic_weights, return_cells
+            )
+            for task in range(tasks_count)
+        ]
+        batches = [future.result() for future in futures]
+
+    samples = np.concatenate([batch_samples for batch_samples, _ in batches])
+    results = np.concatenate([batch_results for _, batch_results in batches])
+    return samples, results
+
+
+def sigmoid(
+        values: np.ndarray
+    ) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(values, -500, 500)))
+
+
+def get_loss(
+        features: np.ndarray,
+        results: np.ndarray,
+        weights: np.ndarray,
+        scale: float
+    ) -> float:
+    """
+    Computes the mean squared error between the game results and the win probabilities predicted from the scores.
+    """
+    return float(np.mean((sigmoid(scale * (features @ weights)) - results) ** 2))
+
+
+def fit_scale(
+        features: np.ndarray,
+        results: np.ndarray,
+        weights: np.ndarray
+    ) -> float:
+    """
+    Finds the scale which maps scores of the given weights onto win probabilities with the smallest error.
+
+    The loss is unimodal in the logarithm of the scale, so a golden section search is used.
+    """
+    low, high = np.log(1e-5), np.log(1.0)
+    ratio = (np.sqrt(5) - 1) / 2
+    for _ in range(60):
+        first = high - ratio * (high - low)
+        second = low + ratio * (high - low)
+        if get_loss(features, results, weights, np.exp(first)) < get_loss(features, results, weights, np.exp(second)):
+            high = second
+        else:
+            low = first
+    return float(np.exp((low + high) / 2))
+
+
+def fit_weights(
+        features: np.ndarray,
+        results: np.ndarray,
+        initial_weights: np.ndarray,
+        scale: float,
+        iterations: int,
+        learning_rate: float
+    ) -> np.ndarray:
+    """
+    Fits the weights by Texel-style logistic regression of the game results on the heuristic features.
+
+    The scale stays fixed at the one fitted for the initial weights, so the tuned scores stay in the same
+    units as before and the aspiration window and futility margin of the search keep their meaning.
+    The mean squared error is minimized with Adam, which copes with features of very different magnitudes.
+    """
+    weights = initial_weights.astype(np.float64)
+    first_moment = np.zeros_like(weights)
+    second_moment = np.zeros_like(weights)
+    features = features.astype(np.float64)
+
+    for iteration in range(1, iterations + 1):
+        predictions = sigmoid(scale * (features @ weights))
+        errors = 2 * (predictions - results) * predictions * (1 - predictions) * scale
+        gradient = errors @ features / len(features)
+
+        first_moment = 0.9 * first_moment + 0.1 * gradient
+        second_moment = 0.999 * second_moment + 0.001 * gradient ** 2
+        corrected_first_moment = first_moment / (1 - 0.9 ** iteration)
+        corrected_second_moment = second_moment / (1 - 0.999 ** iteration)
+        weights -= learning_rate * corrected_first_moment / (np.sqrt(corrected_second_moment) + 1e-12)
+
+    return weights
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Tune the heuristic weights on self-play games.')
+    parser.add_argument('--size', type=int, default=8, help='board size')
+    parser.add_argument('--games', type=int, default=20000, help='number of self-play games')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of data generation processes')
+    parser.add_argument('--games-per-task', type=int, default=1000, help='games played at once by one task')
+    parser.add_argument('--epsilon', type=float, default=0.2, help='probability of a random move in self-play')
+    parser.add_argument('--skipped-moves', type=int, default=4, help='opening moves which are not sampled')
+    parser.add_argument('--sample-rate', type=float, default=1.0, help='probability of sampling a position')
+    parser.add_argument('--iterations', type=int, default=2000, help='iterations of the weight fit')
+    parser.add_argument('--learning-rate', type=float, default=0.05, help='learning rate of the weight fit')
+    parser.add_argument('--initial-weights', help='JSON file with the weights used for self-play and as the starting point')
+    parser.add_argument('--data', help='npz file of training positions, loaded if it exists and saved otherwise')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the self-play games')
+    parser.add_argument('--output', default='weights.json', help='JSON file for the tuned weights')
+    args = parser.parse_args()
+
+    initial_weights = DEFAULT_HEURISTIC_WEIGHTS
+    if args.initial_weights:
+        initial_weights = load_heuristic_weights(args.initial_weights)
+
+    if args.data and os.path.exists(args.data):
+        data = np.load(args.data)
+        features, results = data['features'], data['results']
+        print(f'loaded {len(features)} positions from {args.data}')
+    else:
+        start_time = time.perf_counter()
+        features, results = generate_training_data(
+            args.size, args.games, args.workers, args.games_per_task, args.seed,
+            args.epsilon, args.skipped_moves, args.sample_rate, initial_weights
+        )
+        elapsed_time = time.perf_counter() - start_time
+        print(f'{args.games} games, {len(features)} positions in {elapsed_time:.1f}s, {args.games / elapsed_time:.0f} games/s')
+        if args.data:
+            np.savez_compressed(args.data, features=features, results=results)
+
+    initial_vector = np.array([initial_weights[term] for term in HEURISTIC_TERMS], dtype=np.float64)
+    scale = fit_scale(features, results, initial_vector)
+    fitted_vector = fit_weights(features, results, initial_vector, scale, args.iterations, args.learning_rate)
+    tuned_vector = np.round(fitted_vector)
+    tuned_weights = {term: int(weight) for term, weight in zip(HEURISTIC_TERMS, tuned_vector)}
+
+    print(f'scale {scale:.5f}')
+    print(f'loss of the initial weights {get_loss(features, results, initial_vector, scale):.5f}')
+    print(f'loss of the tuned weights {get_loss(features, results, tuned_vector, scale):.5f}')
+    print('weights ' + ', '.join(f'{term} {weight}' for term, weight in tuned_weights.items()))
+    save_heuristic_weights(args.output, tuned_weights)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+from typing import Tuple, Union
+
+from . import colors
+from .utils import print_error, print_green, print_score, print_warning
+
+
+class EventSink:
+    """
+    Receives the events of a game, reported by `Board` and by the AI while it makes a move.
+
+    Events carry the data of what happened rather than a formatted message, so formatting only happens
+    in sinks which show the events. Every method does nothing here, a sink overrides the events it
+    handles. `NullSink` ignores all events, which is what headless tools such as the arena, the
+    benchmark and the server use, and `ConsoleSink` prints them as the game always did.
+    """
+
+    def on_invalid_move(
+            self,
+            message: str,
+            is_error: bool
+        ) -> None:
+        """
+        Reports a move of a human player which was rejected, with an error for moves against the rules and a warning for incomplete input.
+        """
+
+    def on_stack_completed(
+            self,
+            row: int,
+            column: int,
+            player: Tuple[int, int, int]
+        ) -> None:
+        """
+        Reports a full stack which was scored for `player` and removed from the board.
+        """
+
+    def on_score(
+            self,
+            white_points: int,
+            black_points: int
+        ) -> None:
+        """
+        Reports the points of both players after a full stack was scored.
+        """
+
+    def on_turn_skipped(
+            self,
+            player: Tuple[int, int, int]
+        ) -> None:
+        """
+        Reports that `player` has no valid moves, so the other player moves again.
+        """
+
+    def on_ai_thinking(
+            self
+        ) -> None:
+        """
+        Reports that the AI started looking for its move.
+        """
+
+    def on_ai_move(
+            self,
+            value: int,
+            depth: Union[int, None],
+            is_cached: bool
+        ) -> None:
+        """
+        Reports the score of the move found by the AI, with the completed depth of a timed search.
+        """
+
+
+class NullSink(EventSink):
+    """
+    Ignores all events.
+    """
+
+
+class ConsoleSink(EventSink):
+    """
+    Prints the events to stdout in color, which is the output of an interactive game.
+    """
+
+    def on_invalid_move(
+            self,
+            message: str,
+            is_error: bool
+        ) -> None:
+        if is_error:
+            print_error(message)
+        else:
+            print_warning(message)
+
+    def on_stack_completed(
+            self,
+            row: int,
+            column: int,
+            player: Tuple[int, int, int]
+        ) -> None:
+        print_green("Stack with size 8 was created")
+
+    def on_score(
+            self,
+            white_points: int,
+            black_points: int
+        ) -> None:
+        print_score(white_points, black_points)
+
+    def on_turn_skipped(
+            self,
+            player: Tuple[int, int, int]
+        ) -> None:
+        skipped_player_color_name = 'White' if player == colors.WHITE else 'Black'
+        print(f"{skipped_player_color_name} move skipped because there are no valid moves")
+
+    def on_ai_thinking(
+            self
+        ) -> None:
+        print('AI is thinking...', end=' ', flush=True)
+
+    def on_ai_move(
+            self,
+            value: int,
+            depth: Union[int, None],
+            is_cached: bool
+        ) -> None:
+        if is_cached:
+            print(f'H = {value} (cached)')
+        elif depth is not None:
+            print(f'H = {value} (depth {depth})')
+        else:
+            print(f'H = {value}')
@@ -0,0 +1,236 @@
+import collections
+import contextlib
+import gc
+import importlib
+import os
+import sys
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple, Union
+
+import numpy as np
+
+
+def get_deep_size(
+        obj,
+        seen: Union[set, None] = None
+    ) -> int:
+    """
+    Computes the size in bytes of an object together with everything it references.
+
+    Objects referenced more than once, such as the color tuples shared by all tokens, are counted once
+    per call. NumPy arrays are counted with their data unless they are views of another array.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return size if obj.base is None else size + get_deep_size(obj.base, seen)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(get_deep_size(key, seen) + get_deep_size(value, seen) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        return size + sum(get_deep_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += get_deep_size(vars(obj), seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += get_deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def measure_peak(
+        function: Callable,
+        *args,
+        **kwargs
+    ) -> Tuple[object, int]:
+    """
+    Calls a function and measures the peak of the memory allocated by Python during the call.
+
+    Returns:
+        The result of the function and the peak in bytes above the memory allocated before the call.
+        Tracing is started for the call if it is not running already.
+    """
+    is_tracing = tracemalloc.is_tracing()
+    if not is_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_size, _ = tracemalloc.get_traced_memory()
+    try:
+        result = function(*args, **kwargs)
+        _, peak_size = tracemalloc.get_traced_memory()
+    finally:
+        if not is_tracing:
+            tracemalloc.stop()
+    return result, peak_size - start_size
+
+
+def get_board_memory(
+        board
+    ) -> Dict[str, int]:
+    """
+    Measures the bytes of the representations of the game state of a board.
+
+    The board dictionary holds a list of `Token` objects per tile, the move tracking is kept next to it
+    by the board, the position is the flat representation searched by the AI and the notation is the
+    text form of `board.notation`.
+    """
+    from board.position import Position
+
+    tokens = [token for stack in board.board.values() for token in stack]
+    move_tracking = (board.tile_legal_moves, board.legal_moves_count, board.full_stack_tiles)
+    return {
+        'board dict': get_deep_size(board.board),
+        'move tracking': get_deep_size(move_tracking),
+        'position': get_deep_size(Position.from_board_dict(board.board, board.board_size)),
+        'notation': sys.getsizeof(board.get_notation()),
+        'tokens': len(tokens),
+        'token': sys.getsizeof(tokens[0]) if tokens else 0,
+    }
+
+
+def get_cache_sizes(
+        ai
+    ) -> Dict[str, Tuple[int, int]]:
+    """
+    Measures the caches of an AI and the module level caches used by the search.
+
+    Returns:
+        The number of entries and the bytes of every cache. The analysis cache is an sqlite file, its
+        size is the size of the file on disk.
+    """
+    from board.symmetry import _symmetry_tables
+
+    cache_sizes = {
+        'pv table': (len(ai.pv_table), get_deep_size(ai.pv_table)),
+        'symmetry tables': (len(_symmetry_tables), get_deep_size(_symmetry_tables)),
+    }
+    if ai.batch_evaluator is not None:
+        cache_sizes['evaluation tables'] = (len(ai.batch_evaluator.tables), get_deep_size(ai.batch_evaluator.tables))
+    if ai.analysis_cache is not None:
+        cache_sizes['analysis cache'] = (len(ai.analysis_cache), os.path.getsize(ai.analysis_cache.path))
+    return cache_sizes
+
+
+def get_object_counts(
+        limit: int = 10
+    ) -> List[Tuple[str, int, int]]:
+    """
+    Counts the objects tracked by the garbage collector by type, with their shallow sizes.
+
+    Returns:
+        (type name, count, bytes) of the types with the most bytes.
+    """
+    counts = collections.Counter()
+    sizes = collections.Counter()
+    for obj in gc.get_objects():
+        type_name = type(obj).__name__
+        counts[type_name] += 1
+        sizes[type_name] += sys.getsizeof(obj)
+    return [(type_name, counts[type_name], size) for type_name, size in sizes.most_common(limit)]
+
+
+class MemoryMonitor:
+    """
+    Traces the memory allocated while it is enabled and measures the peak of every AI move.
+
+    `AI.ai_make_move` is replaced by a measuring wrapper while the monitor is enabled, so the code runs
+    unchanged otherwise. Tracing with tracemalloc slows the program down several times, so the
+    monitor is meant for opt-in runs which size the memory of a game, not for timing.
+    """
+
+    def __init__(
+            self,
+            traceback_frames: int = 1
+        ) -> None:
+        self.traceback_frames = traceback_frames
+        self.move_peaks: List[int] = []
+        self.original_make_move = None
+        self.ai_class = None
+        self.last_ai = None
+        self.last_board_memory = None
+        self.snapshot = None
+
+    def __enter__(
+            self
+        ) -> 'MemoryMonitor':
+        self.enable()
+        return self
+
+    def __exit__(
+            self,
+            *exception_info
+        ) -> None:
+        self.disable()
+
+    def enable(
+            self
+        ) -> None:
+        self.ai_class = importlib.import_module('ai.ai').AI
+        self.original_make_move = self.ai_class.ai_make_move
+        original_make_move = self.original_make_move
+        monitor = self
+
+        def measured_make_move(ai, *args, **kwargs):
+            result, peak_size = measure_peak(original_make_move, ai, *args, **kwargs)
+            monitor.move_peaks.append(peak_size)
+            monitor.last_ai = ai
+            return result
+
+        self.ai_class.ai_make_move = measured_make_move
+        tracemalloc.start(self.traceback_frames)
+
+    def disable(
+            self
+        ) -> None:
+        self.snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.ai_class.ai_make_move = self.original_make_move
+
+    def report(
+            self,
+            board=None,
+            output_file: TextIO = sys.stdout,
+            lines_count: int = 10
+        ) -> None:
+        """
+        Prints the peaks of the AI moves, the memory of the board and the caches, the objects by type and the top allocation sites.
+        """
+        if self.move_peaks:
+            print(
+                f'AI moves: {len(self.move_peaks)}, peak allocation mean {np.mean(self.move_peaks) / 1024:.1f} KiB, '
+                f'max {max(self.move_peaks) / 1024:.1f} KiB', file=output_file
+            )
+        if board is not None:
+            for name, size in get_board_memory(board).items():
+                print(f'{name:<20}{size:>12}', file=output_file)
+        if self.last_ai is not None:
+            for name, (entries_count, size) in get_cache_sizes(self.last_ai).items():
+                print(f'{name:<20}{entries_count:>12} entries{size:>12} bytes', file=output_file)
+
+        print(f'\n{"type":<24}{"objects":>12}{"bytes":>14}', file=output_file)
+        for type_name, count, size in get_object_counts(lines_count):
+            print(f'{type_name:<24}{count:>12}{size:>14}', file=output_file)
+
+        if self.snapshot is not None:
+            print('\ntop allocation sites still allocated', file=output_file)
+            for statistic in self.snapshot.statistics('lineno')[:lines_count]:
+                print(statistic, file=output_file)
+
+
+@contextlib.contextmanager
+def monitor_memory(
+        is_enabled: bool
+    ) -> Iterator[Union[MemoryMonitor, None]]:
+    """
+    Monitors the memory of the code in the with block if enabled, the caller prints the report.
+    """
+    if not is_enabled:
+        yield None
+        return
+    with MemoryMonitor() as monitor:
+        yield monitor
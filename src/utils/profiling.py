@@ -0,0 +1,162 @@
+import contextlib
+import cProfile
+import functools
+import importlib
+import pstats
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple, Union
+
+
+# Hot paths of the AI as (phase, module, class name or None for a module function, function name)
+PROFILED_FUNCTIONS: List[Tuple[str, str, Union[str, None], str]] = [
+    ('move generation', 'ai.ai', 'AI', 'ai_get_next_positions'),
+    ('potential moves', 'ai.ai', None, 'get_potential_moves'),
+    ('potential moves', 'board.board', None, 'get_potential_moves'),
+    ('make/unmake', 'ai.ai', 'AI', 'ai_move_stack'),
+    ('make/unmake', 'ai.ai', 'AI', 'ai_revert_move_stack'),
+    ('evaluation', 'ai.ai', 'AI', 'heuristic'),
+    ('evaluation', 'ai.mlp_eval', 'MLPEvaluator', 'evaluate_position'),
+    ('batch evaluation', 'ai.batch_eval', 'BatchEvaluator', 'evaluate_children'),
+]
+
+
+class Profiler:
+    """
+    Measures the call counts and times of the hot paths of the AI, listed in `PROFILED_FUNCTIONS`.
+
+    The functions are only replaced by timing wrappers while the profiler is enabled, so the code runs
+    unchanged otherwise. Wrappers are installed on the classes, so AIs and evaluators created while the
+    profiler is enabled are measured, including evaluators which replace the heuristic. The cumulative
+    time of a phase includes the phases called from it, such as the potential moves of the mobility
+    term in the evaluation, the self time does not.
+
+    With a `cprofile_path`, the whole run is also recorded by cProfile and its statistics are written to
+    that file, which can be read with `pstats` or tools such as snakeviz.
+    """
+
+    def __init__(
+            self,
+            cprofile_path: Union[str, None] = None
+        ) -> None:
+        self.cprofile_path = cprofile_path
+        # Calls, cumulative time and self time of every phase
+        self.phase_stats: Dict[str, List] = {}
+        # Time spent in profiled calls made from each open profiled call, to compute self times
+        self.child_times: List[float] = []
+        self.originals: List[Tuple[object, str, Callable]] = []
+        self.cprofile = None
+        self.start_time = None
+        self.elapsed_time = 0.0
+
+    def __enter__(
+            self
+        ) -> 'Profiler':
+        self.enable()
+        return self
+
+    def __exit__(
+            self,
+            *exception_info
+        ) -> None:
+        self.disable()
+
+    def enable(
+            self
+        ) -> None:
+        for phase, module_name, class_name, function_name in PROFILED_FUNCTIONS:
+            module = importlib.import_module(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            # Inherited methods are wrapped on the class which defines them
+            if function_name not in vars(owner):
+                continue
+            function = vars(owner)[function_name]
+            self.originals.append((owner, function_name, function))
+            setattr(owner, function_name, self.wrap(function, self.phase_stats.setdefault(phase, [0, 0.0, 0.0])))
+
+        if self.cprofile_path:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.start_time = time.perf_counter()
+
+    def disable(
+            self
+        ) -> None:
+        self.elapsed_time += time.perf_counter() - self.start_time
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            self.cprofile = None
+        for owner, function_name, function in reversed(self.originals):
+            setattr(owner, function_name, function)
+        self.originals = []
+
+    def wrap(
+            self,
+            function: Callable,
+            stats: List
+        ) -> Callable:
+        child_times = self.child_times
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def profiled_function(*args, **kwargs):
+            child_times.append(0.0)
+            start_time = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed_time = perf_counter() - start_time
+                stats[0] += 1
+                stats[1] += elapsed_time
+                stats[2] += elapsed_time - child_times.pop()
+                if child_times:
+                    child_times[-1] += elapsed_time
+
+        return profiled_function
+
+    def report(
+            self,
+            output_file: TextIO = sys.stdout,
+            cprofile_lines: int = 20
+        ) -> None:
+        """
+        Prints the phases by cumulative time, and the most expensive functions of the cProfile run if there was one.
+
+        The time outside the profiled phases is mostly the search itself, the alpha-beta recursion and
+        move ordering, together with the game and the drawing.
+        """
+        print(f'{"phase":<20}{"calls":>12}{"cumulative [s]":>16}{"self [s]":>12}{"self %":>8}', file=output_file)
+        profiled_self_time = 0.0
+        for phase, (calls, cumulative_time, self_time) in sorted(self.phase_stats.items(), key=lambda item: -item[1][1]):
+            profiled_self_time += self_time
+            share = 100 * self_time / self.elapsed_time if self.elapsed_time else 0
+            print(f'{phase:<20}{calls:>12}{cumulative_time:>16.3f}{self_time:>12.3f}{share:>8.1f}', file=output_file)
+        other_time = self.elapsed_time - profiled_self_time
+        share = 100 * other_time / self.elapsed_time if self.elapsed_time else 0
+        print(f'{"other":<20}{"":>12}{"":>16}{other_time:>12.3f}{share:>8.1f}', file=output_file)
+        print(f'{"total":<20}{"":>12}{self.elapsed_time:>16.3f}', file=output_file)
+
+        if self.cprofile_path:
+            print(f'\ncProfile statistics written to {self.cprofile_path}', file=output_file)
+            pstats.Stats(self.cprofile_path, stream=output_file).sort_stats('cumulative').print_stats(cprofile_lines)
+
+
+@contextlib.contextmanager
+def profile_run(
+        is_enabled: bool,
+        cprofile_path: Union[str, None] = None,
+        output_file: TextIO = sys.stdout
+    ) -> Iterator[Union[Profiler, None]]:
+    """
+    Profiles the code in the with block and prints the report after it, if enabled or if a cProfile file is given.
+
+    Nothing is replaced when profiling is off, which is how the `--profile` options of the tools use it.
+    """
+    if not is_enabled and not cprofile_path:
+        yield None
+        return
+    profiler = Profiler(cprofile_path)
+    with profiler:
+        yield profiler
+    profiler.report(output_file)
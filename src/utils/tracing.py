@@ -0,0 +1,231 @@
+import contextlib
+import functools
+import importlib
+import json
+import random
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+
+# Traced methods of the AI as (method name, kind of node written to the trace)
+TRACED_METHODS: List[Tuple[str, str]] = [
+    ('search_root', 'root'),
+    ('minimax', 'minimax'),
+    ('quiescence', 'quiescence'),
+]
+
+
+def get_bound(
+        value: float
+    ) -> Union[int, None]:
+    """
+    Converts an alpha-beta bound for JSON, which has no infinities, with None for an open bound.
+    """
+    return None if value in (float('-inf'), float('inf')) else value
+
+
+def get_last_move(
+        position
+    ) -> List[int]:
+    """
+    Rebuilds the last move of a position as (source index, token level, destination index) from its undo record.
+
+    The undo record only keeps the number of moved tokens, but the source stack is left with the tokens
+    below the moved ones, so the level of the lowest moved token is the height of the source plus one.
+    """
+    source, destination, _ = position.undo_stack[-1]
+    return [source, position.heights[source] + 1, destination]
+
+
+class SearchTracer:
+    """
+    Streams the nodes visited by the AI search to a JSON lines file, for offline analysis with `trace_summary.py`.
+
+    Every search starts with a header line which holds the notation of the root position, followed by a
+    line per node once the node returns:
+
+        {"search": 0, "kind": "minimax", "ply": 2, "depth": 1, "move": [10, 3, 14], "alpha": -5, "beta": null,
+         "value": 3, "moves": 7, "children": 7, "cutoff": false}
+
+    The move is the (source index, token level, destination index) of the move which led to the node, in
+    the form of the moves of the search (see `get_last_move`). Moves are the number of generated moves and children the number of
+    child nodes searched, and a cutoff is a value outside the window, a fail high for the maximizing
+    player and a fail low for the minimizing one. Nodes of iterations stopped at a deadline are not written.
+
+    Nodes up to `full_plies` are always written. Deeper nodes are sampled by subtree, every node at ply
+    `full_plies + 1` is written together with its whole subtree with probability `sample_rate`, so
+    sampled subtrees stay complete and the counts of deeper plies can be scaled by `1 / sample_rate`.
+
+    The methods of `TRACED_METHODS` and the move generation are only replaced while the tracer is enabled,
+    so the search runs unchanged otherwise.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            sample_rate: float = 1.0,
+            full_plies: int = 1,
+            seed: int = 0
+        ) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.full_plies = full_plies
+        self.rng = random.Random(seed)
+        # Ply, generated moves, searched children and whether it is sampled, of every open node
+        self.node_stack: List[List] = []
+        self.searches_count = 0
+        self.nodes_count = 0
+        self.originals: List[Tuple[str, Callable]] = []
+        self.ai_class = None
+        self.trace_file = None
+
+    def __enter__(
+            self
+        ) -> 'SearchTracer':
+        self.enable()
+        return self
+
+    def __exit__(
+            self,
+            *exception_info
+        ) -> None:
+        self.disable()
+
+    def enable(
+            self
+        ) -> None:
+        self.ai_class = importlib.import_module('ai.ai').AI
+        self.trace_file = open(self.path, 'w')
+        for method_name, kind in TRACED_METHODS:
+            self.replace(method_name, self.wrap_node(getattr(self.ai_class, method_name), kind))
+        self.replace('search', self.wrap_search(self.ai_class.search))
+        self.replace('ai_get_next_positions', self.wrap_move_generation(self.ai_class.ai_get_next_positions))
+
+    def disable(
+            self
+        ) -> None:
+        for method_name, method in reversed(self.originals):
+            setattr(self.ai_class, method_name, method)
+        self.originals = []
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def replace(
+            self,
+            method_name: str,
+            traced_method: Callable
+        ) -> None:
+        self.originals.append((method_name, getattr(self.ai_class, method_name)))
+        setattr(self.ai_class, method_name, traced_method)
+
+    def wrap_search(
+            self,
+            search: Callable
+        ) -> Callable:
+        from board.notation import encode_position
+        from board.position import BLACK, WHITE
+        tracer = self
+
+        @functools.wraps(search)
+        def traced_search(ai, position, is_maximizing_player, *args, **kwargs):
+            notation = encode_position(position, WHITE if is_maximizing_player else BLACK, ai.white_points, ai.black_points)
+            tracer.write({
+                'search': tracer.searches_count,
+                'notation': notation,
+                'sample_rate': tracer.sample_rate,
+                'full_plies': tracer.full_plies,
+            })
+            try:
+                return search(ai, position, is_maximizing_player, *args, **kwargs)
+            finally:
+                tracer.searches_count += 1
+
+        return traced_search
+
+    def wrap_move_generation(
+            self,
+            ai_get_next_positions: Callable
+        ) -> Callable:
+        node_stack = self.node_stack
+
+        @functools.wraps(ai_get_next_positions)
+        def traced_move_generation(ai, *args, **kwargs):
+            next_positions = ai_get_next_positions(ai, *args, **kwargs)
+            # Moves generated outside a node, such as to choose the search limits, are not counted
+            if node_stack:
+                node_stack[-1][1] = len(next_positions)
+            return next_positions
+
+        return traced_move_generation
+
+    def wrap_node(
+            self,
+            method: Callable,
+            kind: str
+        ) -> Callable:
+        tracer = self
+        node_stack = self.node_stack
+
+        @functools.wraps(method)
+        def traced_method(ai, position, depth, is_maximizing_player, is_one_stack_left, alpha=float('-inf'), beta=float('inf'), *args):
+            ply = len(position.undo_stack) - ai.root_ply
+            if node_stack:
+                parent = node_stack[-1]
+                parent[2] += 1
+                if ply <= tracer.full_plies:
+                    is_sampled = True
+                elif parent[0] <= tracer.full_plies:
+                    is_sampled = tracer.rng.random() < tracer.sample_rate
+                else:
+                    is_sampled = parent[3]
+            else:
+                is_sampled = ply <= tracer.full_plies or tracer.rng.random() < tracer.sample_rate
+            node = [ply, 0, 0, is_sampled]
+            node_stack.append(node)
+            try:
+                result = method(ai, position, depth, is_maximizing_player, is_one_stack_left, alpha, beta, *args)
+            finally:
+                node_stack.pop()
+
+            if is_sampled:
+                value = result[0] if isinstance(result, tuple) else result
+                is_cutoff = value >= beta if is_maximizing_player else value <= alpha
+                tracer.write({
+                    'search': tracer.searches_count,
+                    'kind': kind,
+                    'ply': ply,
+                    'depth': depth,
+                    'move': get_last_move(position) if ply > 0 and position.undo_stack else None,
+                    'alpha': get_bound(alpha),
+                    'beta': get_bound(beta),
+                    'value': get_bound(value),
+                    'moves': node[1],
+                    'children': node[2],
+                    'cutoff': is_cutoff,
+                })
+                tracer.nodes_count += 1
+            return result
+
+        return traced_method
+
+    def write(
+            self,
+            record: Dict
+        ) -> None:
+        self.trace_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+@contextlib.contextmanager
+def trace_search(
+        path: Union[str, None],
+        sample_rate: float = 1.0
+    ) -> Iterator[Union[SearchTracer, None]]:
+    """
+    Traces the searches in the with block to the file if a path is given, which is how the `--trace` options of the tools use it.
+    """
+    if not path:
+        yield None
+        return
+    with SearchTracer(path, sample_rate) as tracer:
+        yield tracer
+    print(f'{tracer.nodes_count} nodes of {tracer.searches_count} searches traced to {path}')